@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AnaliticaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'analitica'
+
+    def ready(self):
+        import analitica.signals  # Mantiene VentaDiaria al pagar / anular ventas
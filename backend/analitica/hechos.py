@@ -0,0 +1,137 @@
+# analitica/hechos.py
+"""
+Mantenimiento de la tabla de hechos VentaDiaria.
+
+- aplicar_venta(venta, +1 / -1): suma o resta los ítems de una venta a sus
+  filas (día, producto, cliente). Es un único INSERT ... SELECT ... ON CONFLICT
+  DO UPDATE: el incremento ocurre dentro de la base, así dos ventas del mismo
+  cliente y producto confirmadas a la vez no se pisan ni chocan con la
+  restricción única (el ORM no tiene upsert con incremento).
+- recalcular(fecha, producto_id, cliente_id): recalcula una sola fila desde
+  ItemVenta. Lo usan las señales cuando cambian los ítems de una venta ya
+  pagada (un incremento no sirve: no se sabe qué había aportado el ítem).
+- reconstruir(desde, hasta): recalcula un rango desde ItemVenta (backfill).
+
+Las señales no ven bulk_create, QuerySet.update() ni SQL directo sobre Venta o
+ItemVenta (p. ej. seed_demo reescribe creado_en con .update()): después de
+escrituras así hay que correr `manage.py reconstruir_ventas_diarias`.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from catalogo.models import Producto
+from core.fechas import q_rango
+from ventas.models import ItemVenta
+
+from .models import VentaDiaria
+
+_HECHOS = VentaDiaria._meta.db_table
+_ITEMS = ItemVenta._meta.db_table
+_PRODUCTOS = Producto._meta.db_table
+
+_UPSERT = f"""
+    INSERT INTO {_HECHOS}
+        (fecha, producto_id, categoria_id, marca_id, cliente_id, cantidad, monto, ventas)
+    SELECT %s, i.producto_id, p.categoria_id, p.marca_id, %s,
+           %s * SUM(i.cantidad), %s * SUM(i.subtotal), %s
+    FROM {_ITEMS} i
+    JOIN {_PRODUCTOS} p ON p.id = i.producto_id
+    WHERE i.venta_id = %s
+    GROUP BY i.producto_id, p.categoria_id, p.marca_id
+    ON CONFLICT (fecha, producto_id, cliente_id) DO UPDATE SET
+        cantidad = {_HECHOS}.cantidad + EXCLUDED.cantidad,
+        monto = {_HECHOS}.monto + EXCLUDED.monto,
+        ventas = {_HECHOS}.ventas + EXCLUDED.ventas
+"""
+
+
+def aplicar_venta(venta, signo: int) -> None:
+    """+1 cuando la venta pasa a pagada, -1 cuando deja de estarlo."""
+    fecha = timezone.localdate(venta.creado_en)
+    with connection.cursor() as cursor:
+        cursor.execute(_UPSERT, [fecha, venta.cliente_id, signo, signo, signo, venta.pk])
+    if signo < 0:
+        VentaDiaria.objects.filter(
+            fecha=fecha, cliente_id=venta.cliente_id, ventas__lte=0
+        ).delete()
+
+
+def recalcular(fecha, producto_id, cliente_id) -> None:
+    """Deja la fila (fecha, producto, cliente) igual a lo que diría reconstruir()."""
+    agregado = ItemVenta.objects.filter(
+        q_rango("venta__creado_en", fecha, fecha),
+        venta__estado="pagada",
+        venta__cliente_id=cliente_id,
+        producto_id=producto_id,
+    ).aggregate(cant=Sum("cantidad"), total=Sum("subtotal"), n=Count("venta_id", distinct=True))
+    fila = VentaDiaria.objects.filter(fecha=fecha, producto_id=producto_id, cliente_id=cliente_id)
+    if not agregado["n"]:
+        fila.delete()
+        return
+    producto = Producto.objects.values("categoria_id", "marca_id").get(pk=producto_id)
+    VentaDiaria.objects.update_or_create(
+        fecha=fecha,
+        producto_id=producto_id,
+        cliente_id=cliente_id,
+        defaults={
+            "categoria_id": producto["categoria_id"],
+            "marca_id": producto["marca_id"],
+            "cantidad": agregado["cant"] or 0,
+            "monto": agregado["total"] or 0,
+            "ventas": agregado["n"],
+        },
+    )
+
+
+@transaction.atomic
+def reconstruir(desde=None, hasta=None, lote: int = 2000) -> int:
+    """
+    Borra y recalcula los hechos entre `desde` y `hasta` (fechas locales,
+    inclusive; None = sin límite). Devuelve cuántas filas quedaron.
+    """
+    hechos = VentaDiaria.objects.all()
+    items = ItemVenta.objects.filter(
+        q_rango("venta__creado_en", desde, hasta), venta__estado="pagada"
+    )
+    if desde:
+        hechos = hechos.filter(fecha__gte=desde)
+    if hasta:
+        hechos = hechos.filter(fecha__lte=hasta)
+    hechos.delete()
+
+    agregados = (
+        items.annotate(dia=TruncDate("venta__creado_en"))
+        .values(
+            "dia", "producto_id", "producto__categoria_id", "producto__marca_id",
+            "venta__cliente_id",
+        )
+        .annotate(cant=Sum("cantidad"), total=Sum("subtotal"), n=Count("venta_id", distinct=True))
+        .order_by()
+    )
+    filas = (
+        VentaDiaria(
+            fecha=a["dia"],
+            producto_id=a["producto_id"],
+            categoria_id=a["producto__categoria_id"],
+            marca_id=a["producto__marca_id"],
+            cliente_id=a["venta__cliente_id"],
+            cantidad=a["cant"] or 0,
+            monto=a["total"] or 0,
+            ventas=a["n"],
+        )
+        for a in agregados.iterator(chunk_size=lote)
+    )
+    total = 0
+    bloque = []
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) >= lote:
+            VentaDiaria.objects.bulk_create(bloque)
+            total += len(bloque)
+            bloque = []
+    if bloque:
+        VentaDiaria.objects.bulk_create(bloque)
+        total += len(bloque)
+    return total
@@ -0,0 +1,16 @@
+# analitica/management/commands/reconciliar_velocidad_ventas.py
+from django.core.management.base import BaseCommand
+
+from analitica.velocidad import reconciliar
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula en Producto la última venta y las unidades vendidas en 7/30/90 días "
+        "desde las ventas pagadas. Las ventanas móviles solo avanzan con esta "
+        "reconciliación: pensado para correr a diario desde cron."
+    )
+
+    def handle(self, *args, **opts):
+        productos = reconciliar()
+        self.stdout.write(self.style.SUCCESS(f"✔ Velocidad de ventas reconciliada: {productos} productos."))
@@ -0,0 +1,28 @@
+# analitica/management/commands/reconstruir_ventas_diarias.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analitica.hechos import reconstruir
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula la tabla de hechos VentaDiaria desde las ventas pagadas. "
+        "Sin fechas reconstruye todo (backfill); con --desde/--hasta solo ese rango."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", default=None, help="Fecha local inicial (YYYY-MM-DD)")
+        parser.add_argument("--hasta", default=None, help="Fecha local final, inclusive (YYYY-MM-DD)")
+
+    def handle(self, *args, **opts):
+        try:
+            desde = date.fromisoformat(opts["desde"]) if opts["desde"] else None
+            hasta = date.fromisoformat(opts["hasta"]) if opts["hasta"] else None
+        except ValueError as e:
+            raise CommandError(f"Fecha inválida: {e}")
+
+        filas = reconstruir(desde, hasta)
+        rango = f"{desde or '…'} a {hasta or '…'}"
+        self.stdout.write(self.style.SUCCESS(f"✔ VentaDiaria reconstruida ({rango}): {filas} filas."))
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-17 11:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('catalogo', '0002_initial'),
+        ('clientes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('cantidad', models.IntegerField(default=0)),
+                ('monto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('ventas', models.IntegerField(default=0)),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='catalogo.categoria')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ventas_diarias', to='clientes.cliente')),
+                ('marca', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='catalogo.marca')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ventas_diarias', to='catalogo.producto')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['fecha'], name='analitica_v_fecha_e45bfb_idx'), models.Index(fields=['producto', 'fecha'], name='analitica_v_product_a24d46_idx'), models.Index(fields=['categoria', 'fecha'], name='analitica_v_categor_d2b678_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ventadiaria',
+            constraint=models.UniqueConstraint(fields=('fecha', 'producto', 'cliente'), name='ventadiaria_unica'),
+        ),
+    ]
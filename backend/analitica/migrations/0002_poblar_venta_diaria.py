@@ -0,0 +1,54 @@
+# Carga inicial de VentaDiaria desde las ventas pagadas existentes
+# (misma agregación que analitica.hechos.reconstruir, con modelos históricos).
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def poblar(apps, schema_editor):
+    ItemVenta = apps.get_model("ventas", "ItemVenta")
+    VentaDiaria = apps.get_model("analitica", "VentaDiaria")
+
+    agregados = (
+        ItemVenta.objects.filter(venta__estado="pagada")
+        .annotate(dia=TruncDate("venta__creado_en"))
+        .values(
+            "dia", "producto_id", "producto__categoria_id", "producto__marca_id",
+            "venta__cliente_id",
+        )
+        .annotate(cant=Sum("cantidad"), total=Sum("subtotal"), n=Count("venta_id", distinct=True))
+        .order_by()
+    )
+    VentaDiaria.objects.bulk_create(
+        (
+            VentaDiaria(
+                fecha=a["dia"],
+                producto_id=a["producto_id"],
+                categoria_id=a["producto__categoria_id"],
+                marca_id=a["producto__marca_id"],
+                cliente_id=a["venta__cliente_id"],
+                cantidad=a["cant"] or 0,
+                monto=a["total"] or 0,
+                ventas=a["n"],
+            )
+            for a in agregados.iterator(chunk_size=2000)
+        ),
+        batch_size=2000,
+    )
+
+
+def vaciar(apps, schema_editor):
+    apps.get_model("analitica", "VentaDiaria").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analitica", "0001_venta_diaria"),
+        ("ventas", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar, vaciar),
+    ]
@@ -0,0 +1,52 @@
+# Carga inicial de la velocidad de venta en Producto
+# (misma consulta que analitica.velocidad.reconciliar, con modelos históricos).
+
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def poblar(apps, schema_editor):
+    Producto = apps.get_model("catalogo", "Producto")
+    ItemVenta = apps.get_model("ventas", "ItemVenta")
+    VentaDiaria = apps.get_model("analitica", "VentaDiaria")
+
+    hoy = timezone.localdate()
+    cambios = {
+        campo: Coalesce(
+            Subquery(
+                VentaDiaria.objects.filter(
+                    producto=OuterRef("pk"), fecha__gte=hoy - timedelta(days=dias - 1)
+                )
+                .order_by()
+                .values("producto")
+                .annotate(c=Sum("cantidad"))
+                .values("c")
+            ),
+            Value(0),
+        )
+        for campo, dias in (("vendidas_7d", 7), ("vendidas_30d", 30), ("vendidas_90d", 90))
+    }
+    cambios["ultima_venta_en"] = Subquery(
+        ItemVenta.objects.filter(producto=OuterRef("pk"), venta__estado="pagada")
+        .order_by()
+        .values("producto")
+        .annotate(m=Max("venta__creado_en"))
+        .values("m")
+    )
+    Producto.objects.update(**cambios)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analitica", "0002_poblar_venta_diaria"),
+        ("catalogo", "0004_producto_velocidad_ventas"),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar, migrations.RunPython.noop),
+    ]
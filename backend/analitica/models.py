@@ -1,3 +1,54 @@
+# analitica/models.py
 from django.db import models
 
-# Create your models here.
+
+class VentaDiaria(models.Model):
+    """
+    Tabla de hechos de ventas pagadas, pre-agregada por
+    (día, producto, cliente), con la categoría y la marca del producto
+    desnormalizadas para agrupar sin joins.
+
+    - fecha: día local (TIME_ZONE) de Venta.creado_en, igual que los filtros
+      `creado_en__date` de los reportes.
+    - cantidad / monto: suma de ItemVenta.cantidad / ItemVenta.subtotal.
+    - ventas: cuántas ventas aportan a la fila.
+
+    Se mantiene incrementalmente cuando una Venta pasa a "pagada" o deja de
+    estarlo, y se recalcula cuando a una venta pagada le cambian los ítems, el
+    día o el cliente (analitica/hechos.py, analitica/signals.py). Las escrituras
+    que no disparan señales (bulk_create, .update(), SQL directo) dejan la tabla
+    desfasada: para esas, backfills o desvíos, `manage.py reconstruir_ventas_diarias`.
+    """
+    fecha = models.DateField()
+    producto = models.ForeignKey(
+        "catalogo.Producto", on_delete=models.PROTECT, related_name="ventas_diarias"
+    )
+    categoria = models.ForeignKey(
+        "catalogo.Categoria", on_delete=models.PROTECT, related_name="+"
+    )
+    marca = models.ForeignKey(
+        "catalogo.Marca", on_delete=models.PROTECT, null=True, blank=True, related_name="+"
+    )
+    cliente = models.ForeignKey(
+        "clientes.Cliente", on_delete=models.PROTECT, related_name="ventas_diarias"
+    )
+    # Sin restricción de signo: una reversión nunca debería dejarlas negativas,
+    # pero si pasara no debe hacer fallar la anulación (la reconstrucción lo corrige)
+    cantidad = models.IntegerField(default=0)
+    monto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    ventas = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["fecha", "producto", "cliente"], name="ventadiaria_unica"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["fecha"]),
+            models.Index(fields=["producto", "fecha"]),
+            models.Index(fields=["categoria", "fecha"]),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} · producto {self.producto_id} · cliente {self.cliente_id}"
@@ -5,11 +5,14 @@ from datetime import timedelta, date
 from typing import List, Dict, Any, Optional, Tuple
 
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import F, Sum
 from django.db.models.functions import TruncDate
 
-from ventas.models import Venta, ItemVenta
 from catalogo.models import Producto
+from core.fechas import q_rango
+from ventas.models import Venta
+
+from .models import VentaDiaria
 
 
 # ============================
@@ -51,31 +54,32 @@ def get_daily_sales_series(
     Devuelve la serie de ventas diarias (total Bs) de los últimos `days_back` días.
 
     Filtros opcionales:
-      - product_id  → solo ventas de ese producto
-      - category_id → solo productos de esa categoría
+      - product_id  → solo lo vendido de ese producto
+      - category_id → solo lo vendido de productos de esa categoría
+    Con filtros se suman subtotales de ítems (VentaDiaria); sin filtros,
+    Venta.total.
     """
-    today = timezone.now().date()
+    today = timezone.localdate()
     start_date = today - timedelta(days=days_back - 1)
 
-    qs = Venta.objects.filter(
-        estado="pagada",
-        creado_en__date__gte=start_date,
-        creado_en__date__lte=today,
-    )
-
-    if product_id:
-        qs = qs.filter(items__producto_id=product_id)
-
-    if category_id:
-        qs = qs.filter(items__producto__categoria_id=category_id)
-
-    # Agregamos por día
-    daily = (
-        qs.annotate(dia=TruncDate("creado_en"))
-        .values("dia")
-        .annotate(total=Sum("total"))
-        .order_by("dia")
-    )
+    if product_id or category_id:
+        # Tabla de hechos: ya agregada por día local, sin joins a ítems / productos
+        qs = VentaDiaria.objects.filter(fecha__gte=start_date, fecha__lte=today)
+        if product_id:
+            qs = qs.filter(producto_id=product_id)
+        if category_id:
+            qs = qs.filter(categoria_id=category_id)
+        daily = qs.values(dia=F("fecha")).annotate(total=Sum("monto")).order_by("dia")
+    else:
+        # Sin filtros es el total vendido: Venta.total (con descuento e
+        # impuestos), igual que la serie del dashboard
+        daily = (
+            Venta.objects.filter(q_rango("creado_en", start_date, today), estado="pagada")
+            .annotate(dia=TruncDate("creado_en"))
+            .values("dia")
+            .annotate(total=Sum("total"))
+            .order_by("dia")
+        )
 
     mapping = {item["dia"]: float(item["total"] or 0.0) for item in daily}
 
@@ -100,26 +104,15 @@ def get_daily_product_series(
     - cantidad vendida
     - total en Bs
     """
-    today = timezone.now().date()
+    today = timezone.localdate()
     start_date = today - timedelta(days=days_back - 1)
 
-    qs = (
-        ItemVenta.objects.select_related("venta", "producto")
-        .filter(
-            venta__estado="pagada",
-            venta__creado_en__date__gte=start_date,
-            venta__creado_en__date__lte=today,
-            producto_id=product_id,
-        )
-    )
-
     agg = (
-        qs.annotate(dia=TruncDate("venta__creado_en"))
-        .values("dia")
-        .annotate(
-            cantidad=Sum("cantidad"),
-            total=Sum("subtotal"),
+        VentaDiaria.objects.filter(
+            producto_id=product_id, fecha__gte=start_date, fecha__lte=today
         )
+        .values(dia=F("fecha"))
+        .annotate(cantidad=Sum("cantidad"), total=Sum("monto"))
         .order_by("dia")
     )
 
@@ -208,7 +201,7 @@ def generate_sales_predictions(
     if len(ys) < 5:
         # Muy pocos datos → predicción = promedio plano
         avg = sum(ys) / len(ys) if ys else 0.0
-        today = timezone.now().date()
+        today = timezone.localdate()
         return [
             {
                 "fecha": (today + timedelta(days=i + 1)).strftime("%Y-%m-%d"),
@@ -219,7 +212,7 @@ def generate_sales_predictions(
 
     a, b = _linear_regression_xy(xs, ys)
 
-    last_date = timezone.now().date()
+    last_date = timezone.localdate()
     preds: List[Dict[str, Any]] = []
 
     for i in range(days_pred):
@@ -0,0 +1,105 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from ventas.models import ItemVenta, Venta
+
+from . import velocidad
+from .hechos import aplicar_venta, recalcular
+
+
+# ==========================
+# Hechos de ventas y velocidad por producto: transiciones hacia / desde "pagada"
+# ==========================
+
+_CAMPOS_VENTA = {"estado", "creado_en", "cliente", "cliente_id"}
+
+
+@receiver(pre_save, sender=Venta)
+def venta_por_guardar(sender, instance, update_fields=None, **kwargs):
+    # (estado, creado_en, cliente_id) anteriores, para comparar en post_save
+    if instance.pk is None:
+        instance._previo = None
+    elif update_fields is not None and not _CAMPOS_VENTA & set(update_fields):
+        # no se guarda nada que mueva los hechos
+        instance._previo = (instance.estado, instance.creado_en, instance.cliente_id)
+    else:
+        instance._previo = (
+            Venta.objects.filter(pk=instance.pk)
+            .values_list("estado", "creado_en", "cliente_id")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Venta)
+def venta_guardada(sender, instance, **kwargs):
+    previo = getattr(instance, "_previo", None)
+    antes = previo is not None and previo[0] == "pagada"
+    ahora = instance.estado == "pagada"
+    if ahora and not antes:
+        aplicar_venta(instance, +1)
+        velocidad.aplicar_venta(instance, +1)
+    elif antes and not ahora:
+        aplicar_venta(instance, -1)
+        velocidad.aplicar_venta(instance, -1)
+    elif ahora and (
+        timezone.localdate(previo[1]) != timezone.localdate(instance.creado_en)
+        or previo[2] != instance.cliente_id
+    ):
+        # Venta pagada que cambió de día o de cliente: sale de sus filas
+        # anteriores y entra en las nuevas
+        aplicar_venta(Venta(pk=instance.pk, creado_en=previo[1], cliente_id=previo[2]), -1)
+        aplicar_venta(instance, +1)
+        velocidad.reconciliar(ItemVenta.objects.filter(venta_id=instance.pk).values("producto_id"))
+
+
+@receiver(pre_delete, sender=Venta)
+def venta_por_borrar(sender, instance, **kwargs):
+    # Antes de borrar: en post_delete los ítems ya no existen
+    if Venta.objects.filter(pk=instance.pk, estado="pagada").exists():
+        aplicar_venta(instance, -1)
+        velocidad.aplicar_venta(instance, -1)
+
+
+# ==========================
+# Ítems agregados, editados o borrados en una venta ya pagada
+# ==========================
+
+def _recalcular_item(venta_id, *productos):
+    venta = (
+        Venta.objects.filter(pk=venta_id, estado="pagada")
+        .values_list("creado_en", "cliente_id")
+        .first()
+    )
+    if venta is None:
+        return  # venta no pagada: no aporta a los hechos
+    fecha = timezone.localdate(venta[0])
+    productos = set(productos)
+    for producto_id in productos:
+        recalcular(fecha, producto_id, venta[1])
+    velocidad.reconciliar(productos)  # lee las ventanas de VentaDiaria ya recalculada
+
+
+@receiver(pre_save, sender=ItemVenta)
+def item_por_guardar(sender, instance, **kwargs):
+    # Producto anterior: si cambia, su fila también hay que recalcularla
+    instance._producto_previo = (
+        ItemVenta.objects.filter(pk=instance.pk).values_list("producto_id", flat=True).first()
+        if instance.pk is not None
+        else None
+    )
+
+
+@receiver(post_save, sender=ItemVenta)
+def item_guardado(sender, instance, **kwargs):
+    previo = getattr(instance, "_producto_previo", None)
+    productos = [instance.producto_id] + ([previo] if previo is not None else [])
+    _recalcular_item(instance.venta_id, *productos)
+
+
+@receiver(post_delete, sender=ItemVenta)
+def item_borrado(sender, instance, origin=None, **kwargs):
+    # Al borrar la venta entera (cascada) ya la restó venta_por_borrar
+    if isinstance(origin, Venta) or getattr(origin, "model", None) is Venta:
+        return
+    _recalcular_item(instance.venta_id, instance.producto_id)
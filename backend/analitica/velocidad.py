@@ -0,0 +1,105 @@
+# analitica/velocidad.py
+"""
+Velocidad de venta desnormalizada en Producto:
+
+    ultima_venta_en                 última venta pagada que lo incluye
+    vendidas_7d / _30d / _90d       unidades vendidas en los últimos N días
+                                    locales, contando hoy
+
+- aplicar_venta(venta, +1 / -1): ajuste incremental cuando una venta pasa a
+  pagada o deja de estarlo. Es un único UPDATE sobre los productos de la
+  venta, con las cantidades en una subconsulta.
+- reconciliar(productos=None): recalcula las columnas desde VentaDiaria /
+  ItemVenta, de todos los productos o solo de los indicados. Las señales lo
+  usan acotado cuando a una venta pagada le cambian los ítems o el día, donde
+  un ajuste incremental no sabe qué había aportado antes.
+  Las ventanas móviles se corren solas con el paso de los días (una venta de
+  hace 31 días ya no cuenta en vendidas_30d), cosa que el ajuste incremental
+  no puede ver: hay que correrlo a diario (`manage.py reconciliar_velocidad_ventas`).
+
+Igual que con VentaDiaria, bulk_create, .update() o SQL directo sobre Venta /
+ItemVenta no disparan señales: después hay que reconstruir los hechos y luego
+reconciliar (VentaDiaria primero, porque las ventanas se leen de ahí).
+"""
+from datetime import timedelta
+
+from django.db.models import F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from catalogo.models import Producto
+from ventas.models import ItemVenta
+
+from .models import VentaDiaria
+
+VENTANAS = (("vendidas_7d", 7), ("vendidas_30d", 30), ("vendidas_90d", 90))
+
+
+def _desde(dias: int, hoy=None):
+    """Primer día local de la ventana de `dias` días que termina hoy."""
+    return (hoy or timezone.localdate()) - timedelta(days=dias - 1)
+
+
+def _ultima_venta(excluir_venta=None):
+    qs = ItemVenta.objects.filter(producto=OuterRef("pk"), venta__estado="pagada")
+    if excluir_venta is not None:
+        qs = qs.exclude(venta_id=excluir_venta)
+    return Subquery(
+        qs.order_by().values("producto").annotate(m=Max("venta__creado_en")).values("m")
+    )
+
+
+def aplicar_venta(venta, signo: int) -> int:
+    """+1 cuando la venta pasa a pagada, -1 cuando deja de estarlo."""
+    cantidad = Subquery(
+        ItemVenta.objects.filter(venta_id=venta.pk, producto=OuterRef("pk"))
+        .order_by()
+        .values("producto")
+        .annotate(c=Sum("cantidad"))
+        .values("c")
+    )
+    delta = signo * Coalesce(cantidad, Value(0))
+    dia = timezone.localdate(venta.creado_en)
+    cambios = {
+        campo: Greatest(F(campo) + delta, Value(0))
+        for campo, dias in VENTANAS
+        if dia >= _desde(dias)
+    }
+    if signo > 0:
+        cambios["ultima_venta_en"] = Greatest(
+            Coalesce("ultima_venta_en", Value(venta.creado_en)), Value(venta.creado_en)
+        )
+    else:
+        # Puede ser la más reciente: se busca la anterior (la venta se está
+        # borrando o ya no está pagada)
+        cambios["ultima_venta_en"] = _ultima_venta(excluir_venta=venta.pk)
+
+    productos = ItemVenta.objects.filter(venta_id=venta.pk).values("producto_id")
+    return Producto.objects.filter(pk__in=productos).update(**cambios)
+
+
+def reconciliar(productos=None) -> int:
+    """
+    Recalcula las columnas de los productos (todos, o los ids de `productos`)
+    en un único UPDATE con subconsultas correlacionadas (índice (producto,
+    fecha) de VentaDiaria). Devuelve cuántos productos se actualizaron.
+    """
+    hoy = timezone.localdate()
+    cambios = {
+        campo: Coalesce(
+            Subquery(
+                VentaDiaria.objects.filter(producto=OuterRef("pk"), fecha__gte=_desde(dias, hoy))
+                .order_by()
+                .values("producto")
+                .annotate(c=Sum("cantidad"))
+                .values("c")
+            ),
+            Value(0),
+        )
+        for campo, dias in VENTANAS
+    }
+    cambios["ultima_venta_en"] = _ultima_venta()
+    qs = Producto.objects.all()
+    if productos is not None:
+        qs = qs.filter(pk__in=productos)
+    return qs.update(**cambios)
@@ -12,6 +12,7 @@ from analitica.services import (
 
 # Interpretación de comandos de voz
 from ia.voice_intent import parse_voice_command, find_best_product
+from ia import registro
 
 
 @api_view(["GET"])
@@ -122,3 +123,14 @@ def voice_intent_view(request):
             }
 
     return Response(response_data, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def modelos_ia_view(request):
+    """
+    Estado de los modelos de IA en memoria de este worker (ia/registro.py):
+    hash, cuándo y en cuánto tiempo se cargaron, tamaño en disco y crecimiento
+    de memoria durante la carga.
+    """
+    return Response(registro.estadisticas(), status=status.HTTP_200_OK)
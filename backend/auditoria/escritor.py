@@ -0,0 +1,277 @@
+# auditoria/escritor.py
+"""
+Escritor asíncrono de RegistroAuditoria.
+
+El middleware solo encola un dict por petición; un hilo en segundo plano
+vacía la cola con bulk_create cada AUDITORIA_LOTE registros o cada
+AUDITORIA_INTERVALO_MS milisegundos, lo que ocurra primero. La respuesta
+nunca espera un INSERT de auditoría.
+
+- Cola acotada (AUDITORIA_COLA_MAX): si está llena el registro se descarta y
+  se cuenta en `descartados` (preferimos perder auditoría a frenar la API).
+- Si la base no está disponible, el lote se guarda como JSONL en
+  AUDITORIA_SPOOL_DIR y se reinserta cuando la base vuelve (cualquier worker).
+  Un registro inválido (IntegrityError / DataError) se descarta solo; nunca
+  devuelve al spool un lote que no va a poder insertarse.
+- Al terminar el proceso (atexit) se vacía lo pendiente.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, IntegrityError, DataError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import RegistroAuditoria
+
+logger = logging.getLogger(__name__)
+
+
+def _instancia(datos: dict) -> RegistroAuditoria:
+    """Arma el modelo desde el dict encolado; fecha/hora salen de creado_en."""
+    creado_en = datos["creado_en"]
+    if isinstance(creado_en, str):  # viene del spool
+        creado_en = parse_datetime(creado_en)
+    local = timezone.localtime(creado_en)
+    return RegistroAuditoria(
+        **{**datos, "creado_en": creado_en, "fecha": local.date(), "hora": local.time()}
+    )
+
+
+class EscritorAuditoria:
+    def __init__(self, max_cola=10_000, lote=200, intervalo_ms=1000, spool_dir=None):
+        self.cola = queue.Queue(maxsize=max_cola)
+        self.lote = lote
+        self.intervalo = intervalo_ms / 1000
+        self.spool_dir = Path(spool_dir) if spool_dir else None
+
+        self.descartados = 0     # cola llena o registro inválido
+        self.escritos = 0
+        self.en_spool = 0
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+        self._pid = None
+        self._proxima_revision_spool = 0.0
+
+    # ---------- API usada por el middleware ----------
+    def encolar(self, datos: dict) -> bool:
+        self._asegurar_hilo()
+        try:
+            self.cola.put_nowait(datos)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.descartados += 1
+                descartados = self.descartados
+            if descartados == 1 or descartados % 1000 == 0:
+                logger.warning("Cola de auditoría llena: %s registros descartados", descartados)
+            return False
+
+    def estadisticas(self) -> dict:
+        return {
+            "pendientes": self.cola.qsize(),
+            "escritos": self.escritos,
+            "descartados": self.descartados,
+            "en_spool": self.en_spool,
+        }
+
+    # ---------- Ciclo de vida del hilo ----------
+    def _asegurar_hilo(self):
+        # Tras un fork (gunicorn con --preload) el hilo del padre no existe en el hijo
+        if self._hilo is not None and self._pid == os.getpid() and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is not None and self._pid == os.getpid() and self._hilo.is_alive():
+                return
+            self._pid = os.getpid()
+            self._detener.clear()
+            self._hilo = threading.Thread(
+                target=self._bucle, name="auditoria-escritor", daemon=True
+            )
+            self._hilo.start()
+
+    def detener(self, timeout=5.0):
+        """Pide al hilo que termine y vacía lo que quede en la cola."""
+        self._detener.set()
+        if self._hilo is not None and self._hilo.is_alive():
+            self._hilo.join(timeout)
+        self.vaciar()
+
+    def _bucle(self):
+        try:
+            while not self._detener.is_set():
+                lote = self._tomar_lote()
+                if lote:
+                    self._escribir(lote)
+                elif time.monotonic() >= self._proxima_revision_spool:
+                    self._reprocesar_spool()
+        finally:
+            connection.close()
+
+    def _tomar_lote(self):
+        """Espera hasta completar un lote o hasta que pase el intervalo."""
+        lote = []
+        limite = time.monotonic() + self.intervalo
+        while len(lote) < self.lote:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                lote.append(self.cola.get(timeout=restante))
+            except queue.Empty:
+                break
+        return lote
+
+    def vaciar(self):
+        """Escribe en el hilo actual todo lo pendiente (al apagar o en pruebas)."""
+        while True:
+            lote = []
+            try:
+                while len(lote) < self.lote:
+                    lote.append(self.cola.get_nowait())
+            except queue.Empty:
+                pass
+            if not lote:
+                break
+            self._escribir(lote)
+
+    # ---------- Escritura ----------
+    def _escribir(self, lote):
+        try:
+            RegistroAuditoria.objects.bulk_create([_instancia(d) for d in lote])
+            self.escritos += len(lote)
+        except (IntegrityError, DataError):
+            # Algún registro es inválido (ej. usuario borrado): se insertan uno a uno
+            connection.close()
+            self._escribir_uno_a_uno(lote)
+        except DatabaseError:
+            logger.exception("Auditoría: base no disponible, lote de %s al spool", len(lote))
+            self._base_caida(lote)
+        except Exception:
+            logger.exception("Auditoría: error inesperado escribiendo %s registros", len(lote))
+            with self._lock:
+                self.descartados += len(lote)
+
+    def _escribir_uno_a_uno(self, lote) -> bool:
+        """
+        Inserta registro por registro descartando los inválidos. Si la base se
+        cae a mitad de camino, lo que falta va al spool y devuelve False.
+        """
+        for i, datos in enumerate(lote):
+            try:
+                _instancia(datos).save(force_insert=True)
+                self.escritos += 1
+            except (IntegrityError, DataError):
+                connection.close()
+                with self._lock:
+                    self.descartados += 1
+            except DatabaseError:
+                logger.exception(
+                    "Auditoría: base no disponible, %s registros al spool", len(lote) - i
+                )
+                self._base_caida(lote[i:])
+                return False
+        return True
+
+    def _base_caida(self, lote):
+        connection.close()
+        self._a_spool(lote)
+        # Reintenta el spool recién cuando pase un intervalo razonable
+        self._proxima_revision_spool = time.monotonic() + 30
+
+    # ---------- Spool en archivos ----------
+    def _a_spool(self, lote):
+        if not self.spool_dir:
+            with self._lock:
+                self.descartados += len(lote)
+            return
+        try:
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+            nombre = f"auditoria-{os.getpid()}-{uuid.uuid4().hex}.jsonl"
+            tmp = self.spool_dir / (nombre + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as fh:
+                for datos in lote:
+                    fh.write(json.dumps(datos, cls=DjangoJSONEncoder) + "\n")
+            tmp.rename(self.spool_dir / nombre)  # visible solo cuando está completo
+            self.en_spool += len(lote)
+        except OSError:
+            logger.exception("Auditoría: no se pudo escribir el spool")
+            with self._lock:
+                self.descartados += len(lote)
+
+    def _reprocesar_spool(self):
+        """Reinserta los archivos del spool; cada worker reclama un archivo renombrándolo."""
+        self._proxima_revision_spool = time.monotonic() + 30
+        if not self.spool_dir or not self.spool_dir.is_dir():
+            return
+        for archivo in sorted(self.spool_dir.glob("auditoria-*.jsonl")):
+            reclamado = archivo.with_name(archivo.name + f".{os.getpid()}")
+            try:
+                archivo.rename(reclamado)
+            except OSError:
+                continue  # otro worker lo tomó
+            with open(reclamado, encoding="utf-8") as fh:
+                lote = [json.loads(linea) for linea in fh if linea.strip()]
+            try:
+                with transaction.atomic():  # todo o nada: reintentar no duplica
+                    RegistroAuditoria.objects.bulk_create(
+                        [_instancia(d) for d in lote], batch_size=self.lote
+                    )
+            except (IntegrityError, DataError):
+                # Algún registro ya no es válido (ej. usuario borrado mientras
+                # la base estaba caída): se insertan uno a uno y se descarta ese.
+                # Lo que no llegue a escribirse vuelve al spool en un archivo nuevo.
+                connection.close()
+                escrito = self._escribir_uno_a_uno(lote)
+                reclamado.unlink()
+                if not escrito:
+                    return
+                logger.info("Auditoría: archivo de spool con registros inválidos reprocesado uno a uno")
+                continue
+            except DatabaseError:
+                connection.close()
+                reclamado.rename(archivo)  # sigue caída: se reintenta más tarde
+                return
+            reclamado.unlink()
+            self.escritos += len(lote)
+            logger.info("Auditoría: %s registros recuperados del spool", len(lote))
+
+
+_ESCRITOR = None
+_ESCRITOR_LOCK = threading.Lock()
+
+
+def escritor() -> EscritorAuditoria:
+    global _ESCRITOR
+    if _ESCRITOR is None:
+        with _ESCRITOR_LOCK:
+            if _ESCRITOR is None:
+                _ESCRITOR = EscritorAuditoria(
+                    max_cola=getattr(settings, "AUDITORIA_COLA_MAX", 10_000),
+                    lote=getattr(settings, "AUDITORIA_LOTE", 200),
+                    intervalo_ms=getattr(settings, "AUDITORIA_INTERVALO_MS", 1000),
+                    spool_dir=getattr(settings, "AUDITORIA_SPOOL_DIR", None),
+                )
+                atexit.register(_ESCRITOR.detener)
+    return _ESCRITOR
+
+
+def registrar(datos: dict) -> None:
+    """
+    Guarda un registro de auditoría. `datos` son campos de RegistroAuditoria
+    (usuario_id, accion, modulo, ...) más `creado_en` del momento de la petición.
+    """
+    if getattr(settings, "AUDITORIA_ASINCRONA", True):
+        escritor().encolar(datos)
+    else:
+        _instancia(datos).save(force_insert=True)
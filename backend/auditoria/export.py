@@ -1,188 +1,135 @@
-from django.http import HttpResponse
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.http import FileResponse
 from reportlab.lib.pagesizes import letter, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Table, TableStyle
 from reportlab.lib import colors
-import io
+from django.utils import timezone
+from itertools import islice
+import tempfile
 
-def exportar_auditoria_excel(queryset):
-    """Genera un archivo Excel a partir de un queryset de registros de auditoría."""
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="auditoria.xlsx"'
+from core.xlsx_stream import respuesta_xlsx
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Auditoría"
+# Filas que se piden al cursor de servidor por vuelta
+EXPORT_CHUNK = 2000
 
-    # Encabezados
-    headers = ["Fecha y Hora", "Usuario", "Módulo", "Acción", "Ruta", "Método", "Estado", "IP"]
-    ws.append(headers)
-
-    # Estilo para encabezados
-    bold_font = Font(bold=True)
-    for cell in ws[1]:
-        cell.font = bold_font
-        cell.alignment = Alignment(horizontal="center")
-
-    # Datos
-    for registro in queryset:
-        ws.append([
-            registro.creado_en.strftime("%Y-%m-%d %H:%M:%S"),
-            registro.usuario.username if registro.usuario else "Anónimo",
-            registro.modulo,
-            registro.accion,
-            registro.ruta,
-            registro.metodo,
-            registro.estado,
-            registro.ip,
-        ])
-
-    # Ajustar ancho de columnas
-    for col in ws.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        ws.column_dimensions[column].width = adjusted_width
-
-    wb.save(response)
-    return response
 
-def exportar_auditoria_pdf(queryset):
-    """Genera un archivo PDF a partir de un queryset de registros de auditoría."""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter))
-    elements = []
-
-    styles = getSampleStyleSheet()
-    elements.append(Paragraph("Bitácora de Auditoría", styles['h1']))
-
-    # Datos de la tabla
-    data = [["Fecha/Hora", "Usuario", "Módulo", "Acción", "Ruta", "Método", "Estado", "IP"]]
-    for registro in queryset:
-        data.append([
-            registro.creado_en.strftime("%y-%m-%d %H:%M"),
-            registro.usuario.username if registro.usuario else "Anónimo",
-            registro.modulo, registro.accion, registro.ruta, registro.metodo, registro.estado, registro.ip
-        ])
-
-    # Estilo de la tabla
-    style = TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ])
-
-    # Crear y añadir la tabla
-    table = Table(data)
-    table.setStyle(style)
-    elements.append(table)
-
-    doc.build(elements)
-    buffer.seek(0)
-    return HttpResponse(buffer, content_type='application/pdf', headers={'Content-Disposition': 'attachment; filename="auditoria.pdf"'})
-from django.http import HttpResponse
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
-import io
-
-def exportar_auditoria_excel(queryset):
-    """Genera un archivo Excel a partir de un queryset de registros de auditoría."""
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="auditoria.xlsx"'
+def _filas(queryset, formato_fecha):
+    """
+    Recorre la bitácora con values_list + iterator (cursor de servidor): no se
+    instancian modelos ni se carga el queryset entero en memoria.
+    """
+    filas = (
+        queryset.order_by("-creado_en", "-id")
+        .annotate(usuario_nombre=Coalesce("usuario__username", Value("Anónimo")))
+        .values_list(
+            "creado_en", "usuario_nombre", "modulo", "accion", "ruta", "metodo", "estado", "ip"
+        )
+        .iterator(chunk_size=EXPORT_CHUNK)
+    )
+    for creado_en, *resto in filas:
+        yield [timezone.localtime(creado_en).strftime(formato_fecha), *resto]
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Auditoría"
 
-    # Encabezados
+def exportar_auditoria_excel(queryset):
+    """Genera un archivo Excel (en streaming) a partir de un queryset de registros de auditoría."""
     headers = ["Fecha y Hora", "Usuario", "Módulo", "Acción", "Ruta", "Método", "Estado", "IP"]
-    ws.append(headers)
-
-    # Estilo para encabezados
-    bold_font = Font(bold=True)
-    for cell in ws[1]:
-        cell.font = bold_font
-        cell.alignment = Alignment(horizontal="center")
-
-    # Datos
-    for registro in queryset:
-        ws.append([
-            registro.creado_en.strftime("%Y-%m-%d %H:%M:%S"),
-            registro.usuario.username if registro.usuario else "Anónimo",
-            registro.modulo,
-            registro.accion,
-            registro.ruta,
-            registro.metodo,
-            registro.estado,
-            registro.ip,
-        ])
-
-    # Ajustar ancho de columnas
-    for col in ws.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        ws.column_dimensions[column].width = adjusted_width
-
-    wb.save(response)
-    return response
+    return respuesta_xlsx("auditoria.xlsx", headers, _filas(queryset, "%Y-%m-%d %H:%M:%S"), hoja="Auditoría")
+
+
+# ==========================
+# PDF por páginas
+# ==========================
+PAGINA = landscape(letter)
+MARGEN = 36
+ALTO_FILA = 14
+TAMANO_LETRA = 7
+# (encabezado, fracción del ancho útil)
+COLUMNAS_PDF = [
+    ("Fecha/Hora", 0.12), ("Usuario", 0.11), ("Módulo", 0.09), ("Acción", 0.18),
+    ("Ruta", 0.28), ("Método", 0.07), ("Estado", 0.06), ("IP", 0.09),
+]
+
+ESTILO_TABLA_PDF = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), TAMANO_LETRA),
+    ('TOPPADDING', (0, 0), (-1, -1), 1),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+])
+
+
+def renderizar_pdf_auditoria(queryset, destino, progreso=None) -> int:
+    """
+    Escribe la bitácora en PDF sobre `destino` (archivo o buffer) y devuelve
+    cuántas filas escribió.
+
+    En lugar de una única Table gigante (que reportlab parte página a página con
+    costo superlineal), cada página recibe su propio bloque de filas con anchos
+    y altos fijos calculados una sola vez, y se dibuja directo en el canvas.
+    Las celdas largas se recortan para no romper el alto fijo de fila.
+    """
+    ancho_util = PAGINA[0] - 2 * MARGEN
+    anchos = [ancho_util * f for _, f in COLUMNAS_PDF]
+    # Aproximación de caracteres que entran en cada columna (Helvetica 7pt)
+    max_chars = [max(4, int(a / (TAMANO_LETRA * 0.5))) for a in anchos]
+    encabezados = [h for h, _ in COLUMNAS_PDF]
+
+    alto_titulo = 30
+    filas_por_pagina = int((PAGINA[1] - 2 * MARGEN - alto_titulo) // ALTO_FILA) - 1
+
+    def recortar(fila):
+        out = []
+        for valor, limite in zip(fila, max_chars):
+            texto = "" if valor is None else str(valor)
+            out.append(texto if len(texto) <= limite else texto[: limite - 1] + "…")
+        return out
+
+    c = canvas.Canvas(destino, pagesize=PAGINA, pageCompression=1)
+    c.setTitle("Bitácora de Auditoría")
+    filas = _filas(queryset, "%y-%m-%d %H:%M")
+    total = 0
+    pagina = 0
+    while True:
+        bloque = [recortar(f) for f in islice(filas, filas_por_pagina)]
+        if not bloque and pagina:
+            break
+        pagina += 1
+        total += len(bloque)
+
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(MARGEN, PAGINA[1] - MARGEN - 14, "Bitácora de Auditoría")
+        c.setFont("Helvetica", 7)
+        c.drawRightString(PAGINA[0] - MARGEN, MARGEN / 2, f"Página {pagina}")
+
+        tabla = Table(
+            [encabezados] + bloque,
+            colWidths=anchos,
+            rowHeights=[ALTO_FILA] * (len(bloque) + 1),
+        )
+        tabla.setStyle(ESTILO_TABLA_PDF)
+        _, alto = tabla.wrapOn(c, ancho_util, PAGINA[1])
+        tabla.drawOn(c, MARGEN, PAGINA[1] - MARGEN - alto_titulo - alto)
+        c.showPage()
+
+        if progreso:
+            progreso(total)
+        if len(bloque) < filas_por_pagina:
+            break
+    c.save()
+    return total
+
 
 def exportar_auditoria_pdf(queryset):
     """Genera un archivo PDF a partir de un queryset de registros de auditoría."""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter))
-    elements = []
-
-    styles = getSampleStyleSheet()
-    elements.append(Paragraph("Bitácora de Auditoría", styles['h1']))
-
-    # Datos de la tabla
-    data = [["Fecha/Hora", "Usuario", "Módulo", "Acción", "Ruta", "Método", "Estado", "IP"]]
-    for registro in queryset:
-        data.append([
-            registro.creado_en.strftime("%y-%m-%d %H:%M"),
-            registro.usuario.username if registro.usuario else "Anónimo",
-            registro.modulo, registro.accion, registro.ruta, registro.metodo, registro.estado, registro.ip
-        ])
-
-    # Estilo de la tabla
-    style = TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ])
-
-    # Crear y añadir la tabla
-    table = Table(data)
-    table.setStyle(style)
-    elements.append(table)
-
-    doc.build(elements)
+    # Hasta 5 MB en memoria; más allá el buffer pasa a un archivo temporal
+    buffer = tempfile.SpooledTemporaryFile(max_size=5 * 1024 * 1024)
+    renderizar_pdf_auditoria(queryset, buffer)
     buffer.seek(0)
-    return HttpResponse(buffer, content_type='application/pdf', headers={'Content-Disposition': 'attachment; filename="auditoria.pdf"'})
\ No newline at end of file
+    return FileResponse(buffer, as_attachment=True, filename="auditoria.pdf", content_type="application/pdf")
@@ -0,0 +1,41 @@
+# auditoria/exportaciones.py
+"""
+Exportaciones de auditoría en segundo plano.
+
+Cuando el PDF supera AUDITORIA_PDF_MAX_FILAS no se genera dentro de la
+petición: se encola un ReportJob de tipo "auditoria" con los filtros de la
+bitácora y lo procesa el mismo worker de reportes (`manage.py
+procesar_reportes`). Estado, reintentos tras una caída del worker y descarga
+son los de cualquier ReportJob (/api/reportes/jobs/<id>/).
+"""
+from .filters import RegistroAuditoriaFilter
+from .models import RegistroAuditoria
+from .export import renderizar_pdf_auditoria
+
+
+def encolar_exportacion_pdf(request):
+    """Crea el ReportJob con los filtros de la petición y lo devuelve."""
+    from reportes.jobs import encolar
+    from reportes.models import ReportJob
+
+    return encolar(
+        request.user, "", "pdf", spec={}, meta={"filtros": request.query_params.dict()},
+        tipo=ReportJob.AUDITORIA,
+    )
+
+
+def queryset_filtrado(filtros: dict):
+    """Rearma el queryset de la bitácora con los mismos filtros que el listado."""
+    filtro = RegistroAuditoriaFilter(
+        filtros, queryset=RegistroAuditoria.objects.select_related("usuario")
+    )
+    if not filtro.is_valid():
+        raise ValueError(f"Filtros de auditoría inválidos: {dict(filtro.errors)}")
+    return filtro.qs
+
+
+def generar_pdf(job, destino, progreso=None) -> int:
+    """Escribe el PDF del job en `destino` y devuelve cuántas filas tiene."""
+    return renderizar_pdf_auditoria(
+        queryset_filtrado(job.meta.get("filtros") or {}), destino, progreso=progreso
+    )
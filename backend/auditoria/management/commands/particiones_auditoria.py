@@ -0,0 +1,108 @@
+# auditoria/management/commands/particiones_auditoria.py
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from auditoria.particiones import (
+    DEFAULT,
+    archivar_tabla,
+    crear_particion,
+    desacoplar_particion,
+    esta_particionada,
+    inicio_mes,
+    listar_particiones,
+    meses_en_default,
+    sumar_meses,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mantiene las particiones mensuales de la auditoría: crea los meses "
+        "próximos y desacopla (o archiva en .csv.gz) los meses más antiguos. "
+        "Pensado para correr a diario desde cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--meses-adelante", type=int, default=3,
+            help="Meses futuros que deben tener partición (además del actual)",
+        )
+        parser.add_argument(
+            "--retener-meses", type=int, default=None,
+            help="Meses completos a conservar; los anteriores se desacoplan",
+        )
+        parser.add_argument(
+            "--archivar-dir", default=None,
+            help="Si se indica, los meses desacoplados se vuelcan aquí como .csv.gz y se borran",
+        )
+        parser.add_argument(
+            "--listar", action="store_true", help="Solo muestra las particiones actuales",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Muestra lo que haría sin cambiar nada",
+        )
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "postgresql":
+            raise CommandError("Las particiones de auditoría requieren PostgreSQL.")
+
+        with connection.cursor() as cursor:
+            if not esta_particionada(cursor):
+                raise CommandError(
+                    "La tabla de auditoría no está particionada. Ejecuta 'migrate auditoria'."
+                )
+            if opts["listar"]:
+                self._listar(cursor)
+                return
+
+            self._crear_futuras(cursor, opts["meses_adelante"], opts["dry_run"])
+            if opts["retener_meses"] is not None:
+                self._retirar_viejas(
+                    cursor, opts["retener_meses"], opts["archivar_dir"], opts["dry_run"]
+                )
+
+    def _listar(self, cursor):
+        for nombre, desde, hasta in listar_particiones(cursor):
+            cursor.execute(f'SELECT count(*) FROM "{nombre}"')
+            filas = cursor.fetchone()[0]
+            rango = f"{desde:%Y-%m-%d} → {hasta:%Y-%m-%d}" if desde else "DEFAULT"
+            self.stdout.write(f"{nombre:<45} {rango:<25} {filas:>10} filas")
+
+    def _crear_futuras(self, cursor, meses, dry_run):
+        actual = inicio_mes()
+        # Meses que cayeron en DEFAULT (datos viejos o sin partición) + los próximos
+        pendientes = meses_en_default(cursor) + [sumar_meses(actual, i) for i in range(meses + 1)]
+        for inicio in sorted(set(pendientes)):
+            if dry_run:
+                self.stdout.write(f"[dry-run] asegurar partición {inicio:%Y-%m}")
+                continue
+            with transaction.atomic():
+                if crear_particion(cursor, inicio):
+                    self.stdout.write(self.style.SUCCESS(f"✔ Partición {inicio:%Y-%m} creada"))
+
+    def _retirar_viejas(self, cursor, retener, archivar_dir, dry_run):
+        corte = sumar_meses(inicio_mes(), -retener)
+        destino = Path(archivar_dir) if archivar_dir else None
+        if destino and not dry_run:
+            destino.mkdir(parents=True, exist_ok=True)
+
+        for nombre, desde, hasta in listar_particiones(cursor):
+            if nombre == DEFAULT or hasta is None or hasta > corte:
+                continue
+            if dry_run:
+                accion = "archivar" if destino else "desacoplar"
+                self.stdout.write(f"[dry-run] {accion} {nombre}")
+                continue
+            with transaction.atomic():
+                desacoplar_particion(cursor, nombre)
+                if destino:
+                    filas = archivar_tabla(cursor, nombre, destino / f"{nombre}.csv.gz")
+                    self.stdout.write(
+                        self.style.SUCCESS(f"✔ {nombre}: {filas} filas archivadas en {destino}")
+                    )
+                else:
+                    self.stdout.write(
+                        self.style.WARNING(f"⚠ {nombre} desacoplada (queda como tabla suelta)")
+                    )
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.6 on 2026-10-17 11:19
+
+import auditoria.models
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditoria', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='registroauditoria',
+            name='creado_en',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='registroauditoria',
+            name='fecha',
+            field=models.DateField(db_index=True, default=django.utils.timezone.localdate, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='registroauditoria',
+            name='hora',
+            field=models.TimeField(default=auditoria.models._hora_local, editable=False),
+        ),
+    ]
@@ -0,0 +1,118 @@
+# Convierte auditoria_registroauditoria en una tabla particionada por mes
+# (RANGE sobre creado_en). El estado de Django no cambia: sigue siendo el mismo
+# modelo; solo cambia el almacenamiento en PostgreSQL.
+
+from datetime import datetime
+
+from django.db import migrations
+from django.utils import timezone
+
+TABLA = "auditoria_registroauditoria"
+MESES_ADELANTE = 3
+
+
+def _inicio_mes(momento):
+    local = timezone.localtime(momento)
+    return timezone.make_aware(datetime(local.year, local.month, 1))
+
+
+def _siguiente_mes(inicio):
+    local = timezone.localtime(inicio)
+    anio, mes = (local.year + 1, 1) if local.month == 12 else (local.year, local.month + 1)
+    return timezone.make_aware(datetime(anio, mes, 1))
+
+
+def _reconstruir(cursor, particionada):
+    """
+    Crea la tabla nueva, copia las filas, borra la vieja y recrea sus índices y
+    FKs con los mismos nombres (leídos del catálogo), para que el estado de
+    migraciones de Django siga siendo válido.
+    """
+    nueva = f"{TABLA}_nueva"
+
+    cursor.execute(
+        """
+        SELECT indexdef FROM pg_indexes
+        WHERE tablename = %s AND indexname NOT IN (
+            SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'
+        )
+        """,
+        [TABLA, TABLA],
+    )
+    indices = [fila[0] for fila in cursor.fetchall()]
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f'
+        """,
+        [TABLA],
+    )
+    fks = cursor.fetchall()
+
+    if particionada:
+        # En una tabla particionada la PK debe incluir la clave de partición
+        cursor.execute(
+            f'CREATE TABLE "{nueva}" (LIKE "{TABLA}" INCLUDING DEFAULTS INCLUDING IDENTITY, '
+            f"PRIMARY KEY (id, creado_en)) PARTITION BY RANGE (creado_en)"
+        )
+        cursor.execute(f'CREATE TABLE "{TABLA}_default" PARTITION OF "{nueva}" DEFAULT')
+
+        cursor.execute(f'SELECT min(creado_en) FROM "{TABLA}"')
+        desde = cursor.fetchone()[0] or timezone.now()
+        inicio = _inicio_mes(desde)
+        limite = _inicio_mes(timezone.now())
+        for _ in range(MESES_ADELANTE):
+            limite = _siguiente_mes(limite)
+        while inicio <= limite:
+            fin = _siguiente_mes(inicio)
+            cursor.execute(
+                f'CREATE TABLE "{TABLA}_p{timezone.localtime(inicio):%Y_%m}" PARTITION OF "{nueva}" '
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [inicio.isoformat(), fin.isoformat()],
+            )
+            inicio = fin
+    else:
+        cursor.execute(
+            f'CREATE TABLE "{nueva}" (LIKE "{TABLA}" INCLUDING DEFAULTS INCLUDING IDENTITY, '
+            f"PRIMARY KEY (id))"
+        )
+
+    cursor.execute(f'INSERT INTO "{nueva}" SELECT * FROM "{TABLA}"')
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(max(id), 1)) FROM \"{nueva}\"",
+        [nueva],
+    )
+    cursor.execute(f'DROP TABLE "{TABLA}" CASCADE')
+    cursor.execute(f'ALTER TABLE "{nueva}" RENAME TO "{TABLA}"')
+    cursor.execute(f'ALTER TABLE "{TABLA}" RENAME CONSTRAINT "{nueva}_pkey" TO "{TABLA}_pkey"')
+
+    for definicion in indices:
+        # Los índices creados sobre la tabla padre se propagan a cada partición
+        cursor.execute(definicion)
+    for nombre, definicion in fks:
+        cursor.execute(f'ALTER TABLE "{TABLA}" ADD CONSTRAINT "{nombre}" {definicion}')
+
+
+def particionar(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        _reconstruir(cursor, particionada=True)
+
+
+def desparticionar(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        _reconstruir(cursor, particionada=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auditoria", "0003_tiempos_por_defecto"),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, desparticionar),
+    ]
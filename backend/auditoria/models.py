@@ -1,7 +1,15 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+
+
+def _hora_local():
+    return timezone.localtime().time()
+
 
 class RegistroAuditoria(models.Model):
+    # En PostgreSQL la tabla está particionada por mes sobre creado_en
+    # (migración 0004, mantenimiento con `manage.py particiones_auditoria`).
     usuario = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         null=True, blank=True,
@@ -16,10 +24,12 @@ class RegistroAuditoria(models.Model):
     estado = models.IntegerField(null=True, blank=True)    # status code de la respuesta
     payload = models.JSONField(null=True, blank=True)
 
-    # Marcas de tiempo (tienes ambas: fecha/hora separadas y timestamp completo)
-    fecha = models.DateField(auto_now_add=True, db_index=True)
-    hora = models.TimeField(auto_now_add=True)
-    creado_en = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Marcas de tiempo (tienes ambas: fecha/hora separadas y timestamp completo).
+    # Son defaults y no auto_now_add porque el escritor asíncrono inserta en lote
+    # más tarde y debe conservar el momento real de la petición.
+    fecha = models.DateField(default=timezone.localdate, editable=False, db_index=True)
+    hora = models.TimeField(default=_hora_local, editable=False)
+    creado_en = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
 
     class Meta:
         ordering = ["-creado_en"]
@@ -0,0 +1,112 @@
+# auditoria/pagination.py
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetAuditoriaPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre (creado_en, id).
+
+    En vez de OFFSET, cada página pide "las filas posteriores a la última vista":
+        WHERE creado_en < c OR (creado_en = c AND id < i)  ORDER BY creado_en, id
+    así el costo de una página es el mismo sea la primera o la del año pasado,
+    y no hace falta un COUNT(*) sobre toda la bitácora.
+
+    Parámetros:
+        ?cursor=<opaco>   devuelto en `next` / `previous`
+        ?page_size=N      por defecto 50, máximo 500
+        ?ordering=creado_en  más antiguos primero (por defecto, más recientes)
+    """
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self._page_size(request)
+        self.ascendente = request.query_params.get("ordering") == "creado_en"
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        creado_en, pk, hacia_atras = self._decodificar(cursor) if cursor else (None, None, False)
+
+        # Al retroceder se recorre en sentido inverso y luego se da vuelta la página
+        asc = self.ascendente != hacia_atras
+        if creado_en is not None:
+            if asc:
+                despues = Q(creado_en__gt=creado_en) | Q(creado_en=creado_en, pk__gt=pk)
+            else:
+                despues = Q(creado_en__lt=creado_en) | Q(creado_en=creado_en, pk__lt=pk)
+            queryset = queryset.filter(despues)
+        orden = ("creado_en", "id") if asc else ("-creado_en", "-id")
+
+        filas = list(queryset.order_by(*orden)[: self.page_size + 1])
+        hay_mas = len(filas) > self.page_size
+        filas = filas[: self.page_size]
+
+        if hacia_atras:
+            filas.reverse()
+            self.hay_siguiente, self.hay_anterior = True, hay_mas
+        else:
+            self.hay_siguiente, self.hay_anterior = hay_mas, cursor is not None
+        self.filas = filas
+        return filas
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_next_link(self):
+        if not self.hay_siguiente or not self.filas:
+            return None
+        return self._enlace(self.filas[-1], hacia_atras=False)
+
+    def get_previous_link(self):
+        if not self.hay_anterior or not self.filas:
+            return None
+        return self._enlace(self.filas[0], hacia_atras=True)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    # ---------- helpers ----------
+    def _page_size(self, request):
+        try:
+            valor = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(valor, self.max_page_size))
+
+    def _enlace(self, fila, hacia_atras):
+        crudo = f"{fila.creado_en.isoformat()}|{fila.pk}|{'p' if hacia_atras else 'n'}"
+        cursor = base64.urlsafe_b64encode(crudo.encode()).decode()
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.cursor_query_param, cursor)
+        if self.page_size == type(self).page_size:
+            url = remove_query_param(url, self.page_size_query_param)
+        return url
+
+    @staticmethod
+    def _decodificar(cursor):
+        try:
+            crudo = base64.urlsafe_b64decode(cursor.encode()).decode()
+            creado_en, pk, direccion = crudo.split("|")
+            return datetime.fromisoformat(creado_en), int(pk), direccion == "p"
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound("Cursor inválido.")
@@ -0,0 +1,136 @@
+# auditoria/particiones.py
+"""
+Particiones mensuales de RegistroAuditoria (PostgreSQL, RANGE sobre creado_en).
+
+La tabla se convierte en particionada en la migración 0004; este módulo tiene
+las operaciones que usa el comando `particiones_auditoria`:
+crear meses futuros, listar, desacoplar y archivar meses viejos.
+
+Los límites de cada mes se calculan en la zona horaria del proyecto
+(TIME_ZONE), así una partición coincide con un mes calendario local.
+"""
+import gzip
+import re
+from datetime import datetime
+
+from django.utils import timezone
+
+from .models import RegistroAuditoria
+
+TABLA = RegistroAuditoria._meta.db_table
+DEFAULT = f"{TABLA}_default"
+
+_LIMITES = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def inicio_mes(momento=None) -> datetime:
+    local = timezone.localtime(momento or timezone.now())
+    return local.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def sumar_meses(inicio: datetime, meses: int) -> datetime:
+    total = inicio.year * 12 + (inicio.month - 1) + meses
+    # Se rearma con make_aware para respetar cambios de offset entre meses
+    return timezone.make_aware(datetime(total // 12, total % 12 + 1, 1))
+
+
+def nombre_particion(inicio: datetime) -> str:
+    return f"{TABLA}_p{inicio:%Y_%m}"
+
+
+def esta_particionada(cursor) -> bool:
+    cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [TABLA])
+    fila = cursor.fetchone()
+    return bool(fila) and fila[0] == "p"
+
+
+def listar_particiones(cursor):
+    """[(nombre, desde, hasta)] ordenadas; la partición DEFAULT lleva (None, None)."""
+    cursor.execute(
+        """
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = %s
+        """,
+        [TABLA],
+    )
+    out = []
+    for nombre, limites in cursor.fetchall():
+        m = _LIMITES.search(limites)
+        if m:
+            desde, hasta = (timezone.localtime(datetime.fromisoformat(v)) for v in m.groups())
+            out.append((nombre, desde, hasta))
+        else:
+            out.append((nombre, None, None))
+    return sorted(out, key=lambda p: (p[1] is not None, p[1]))
+
+
+def meses_en_default(cursor):
+    """Inicios de mes (locales) que tienen filas en la partición DEFAULT."""
+    cursor.execute("SELECT to_regclass(%s)", [DEFAULT])
+    if not cursor.fetchone()[0]:
+        return []
+    cursor.execute(
+        f"""
+        SELECT DISTINCT date_trunc('month', creado_en AT TIME ZONE %s) FROM "{DEFAULT}"
+        """,
+        [timezone.get_current_timezone_name()],
+    )
+    return sorted(timezone.make_aware(fila[0]) for fila in cursor.fetchall())
+
+
+def crear_particion(cursor, inicio: datetime) -> bool:
+    """
+    Crea la partición del mes que empieza en `inicio` si no existe.
+
+    Se crea como tabla suelta, se le mueven las filas de ese mes que hayan caído
+    en la partición DEFAULT y recién entonces se adjunta; así funciona aunque
+    DEFAULT ya tenga datos del rango (un CREATE ... PARTITION OF fallaría).
+    """
+    nombre = nombre_particion(inicio)
+    cursor.execute("SELECT to_regclass(%s)", [nombre])
+    if cursor.fetchone()[0]:
+        return False
+
+    fin = sumar_meses(inicio, 1)
+    cursor.execute(
+        f'CREATE TABLE "{nombre}" (LIKE "{TABLA}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+    )
+    cursor.execute("SELECT to_regclass(%s)", [DEFAULT])
+    if cursor.fetchone()[0]:
+        cursor.execute(
+            f"""
+            WITH movidas AS (
+                DELETE FROM "{DEFAULT}"
+                WHERE creado_en >= %s AND creado_en < %s
+                RETURNING *
+            )
+            INSERT INTO "{nombre}" SELECT * FROM movidas
+            """,
+            [inicio, fin],
+        )
+    cursor.execute(
+        f'ALTER TABLE "{TABLA}" ATTACH PARTITION "{nombre}" FOR VALUES FROM (%s) TO (%s)',
+        [inicio.isoformat(), fin.isoformat()],
+    )
+    return True
+
+
+def desacoplar_particion(cursor, nombre: str) -> None:
+    """La partición queda como tabla independiente (fuera de las consultas)."""
+    cursor.execute(f'ALTER TABLE "{TABLA}" DETACH PARTITION "{nombre}"')
+
+
+def archivar_tabla(cursor, nombre: str, ruta) -> int:
+    """
+    Vuelca la tabla a un CSV comprimido (gzip, con encabezado) vía COPY y la
+    borra. Devuelve cuántas filas se archivaron.
+    """
+    cursor.execute(f'SELECT count(*) FROM "{nombre}"')
+    filas = cursor.fetchone()[0]
+    with gzip.open(ruta, "wb") as fh:
+        cursor.copy_expert(f'COPY "{nombre}" TO STDOUT WITH (FORMAT csv, HEADER true)', fh)
+    cursor.execute(f'DROP TABLE "{nombre}"')
+    return filas
@@ -0,0 +1,88 @@
+# auditoria/politica.py
+"""
+Política de auditoría: qué peticiones se registran.
+
+Se declara en settings.AUDITORIA_REGLAS como una lista ordenada de reglas
+(gana la primera que coincide):
+
+    {"prefijo": "/api/catalogo/", "modo": "mutaciones"}
+    {"exacta": "/", "modo": "nunca"}
+    {"regex": r"^/api/ventas/\\d+/recibo/$", "modo": "muestreo", "tasa": 0.05}
+
+Modos:
+    siempre     registra toda petición
+    mutaciones  solo POST/PUT/PATCH/DELETE
+    muestreo    mutaciones siempre; lecturas con probabilidad `tasa` (0..1)
+    nunca       no registra
+
+Las reglas se compilan una sola vez en una única expresión regular con un
+grupo por regla, así decidir es un solo `match` por petición.
+"""
+import random
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+MODOS = ("siempre", "mutaciones", "muestreo", "nunca")
+METODOS_MUTACION = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+
+
+class PoliticaAuditoria:
+    def __init__(self, reglas, modo_defecto="siempre"):
+        self.defecto = self._validar({"modo": modo_defecto}, "AUDITORIA_MODO_DEFECTO")
+        self.acciones = []
+        patrones = []
+        for i, regla in enumerate(reglas):
+            if "prefijo" in regla:
+                patron = re.escape(regla["prefijo"])
+            elif "exacta" in regla:
+                patron = re.escape(regla["exacta"]) + r"\Z"
+            elif "regex" in regla:
+                patron = regla["regex"].lstrip("^")
+                re.compile(patron)  # error claro si la regex es inválida
+            else:
+                raise ImproperlyConfigured(
+                    f"AUDITORIA_REGLAS[{i}]: falta 'prefijo', 'exacta' o 'regex'"
+                )
+            patrones.append(f"(?P<r{i}>{patron})")
+            self.acciones.append(self._validar(regla, f"AUDITORIA_REGLAS[{i}]"))
+
+        self._regex = re.compile("|".join(patrones)) if patrones else None
+
+    @staticmethod
+    def _validar(regla, origen):
+        modo = regla.get("modo")
+        if modo not in MODOS:
+            raise ImproperlyConfigured(f"{origen}: modo '{modo}' inválido (usa {MODOS})")
+        tasa = float(regla.get("tasa", 1.0))
+        if not 0 <= tasa <= 1:
+            raise ImproperlyConfigured(f"{origen}: 'tasa' debe estar entre 0 y 1")
+        return modo, tasa
+
+    def regla_para(self, ruta: str):
+        """(modo, tasa) de la primera regla que coincide con la ruta."""
+        if self._regex is not None:
+            m = self._regex.match(ruta)
+            if m:
+                return self.acciones[int(m.lastgroup[1:])]
+        return self.defecto
+
+    def debe_registrar(self, ruta: str, metodo: str) -> bool:
+        modo, tasa = self.regla_para(ruta)
+        if modo == "siempre":
+            return True
+        if modo == "nunca":
+            return False
+        if metodo in METODOS_MUTACION:
+            return True
+        if modo == "mutaciones":
+            return False
+        return random.random() < tasa  # muestreo de lecturas
+
+
+def cargar_politica() -> PoliticaAuditoria:
+    return PoliticaAuditoria(
+        getattr(settings, "AUDITORIA_REGLAS", []),
+        getattr(settings, "AUDITORIA_MODO_DEFECTO", "siempre"),
+    )
@@ -17,3 +17,10 @@ class RegistroAuditoriaSerializer(serializers.ModelSerializer):
 
     def get_usuario_username(self, obj):
         return getattr(obj.usuario, "username", "Anónimo")
+
+
+class RegistroAuditoriaListaSerializer(RegistroAuditoriaSerializer):
+    """Versión liviana para el listado: sin `payload` (solo en el detalle)."""
+
+    class Meta(RegistroAuditoriaSerializer.Meta):
+        fields = [f for f in RegistroAuditoriaSerializer.Meta.fields if f != "payload"]
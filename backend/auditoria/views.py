@@ -1,12 +1,15 @@
-from rest_framework import viewsets, permissions
+from django.conf import settings
+from django.urls import reverse
+from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import OrderingFilter
 from .models import RegistroAuditoria
-from .serializers import RegistroAuditoriaSerializer
+from .pagination import KeysetAuditoriaPagination
+from .serializers import RegistroAuditoriaSerializer, RegistroAuditoriaListaSerializer
 from .filters import RegistroAuditoriaFilter
 from .export import exportar_auditoria_excel, exportar_auditoria_pdf
+from .exportaciones import encolar_exportacion_pdf
 from cuentas.permissions import RequierePermisos
 
 class RegistroAuditoriaViewSet(viewsets.ReadOnlyModelViewSet):
@@ -15,20 +18,33 @@ class RegistroAuditoriaViewSet(viewsets.ReadOnlyModelViewSet):
     Permite listar y exportar los registros.
     
     GET /api/auditoria/
-      ?fecha_min=2025-10-01&fecha_max=2025-10-23
-      &modulo=ventas&usuario=3&estado=201
-      &q=productos&page=1&ordering=-creado_en
+      ?desde=2025-10-01T00:00&hasta=2025-10-23T23:59
+      &modulo=ventas&usuario=admin&estado=201
+      &q=productos&page_size=50&ordering=-creado_en
+
+    El listado se pagina por cursor sobre (creado_en, id): seguir `next` /
+    `previous` de la respuesta. No incluye `payload`; sí el detalle /api/auditoria/<id>/.
     """
     queryset = RegistroAuditoria.objects.select_related("usuario")
     serializer_class = RegistroAuditoriaSerializer
     permission_classes = [permissions.IsAuthenticated, RequierePermisos]
     required_perms = ["auditoria.ver"]
-    pagination_class = None # <-- Desactiva la paginación para esta vista
+    # El orden (creado_en desc/asc vía ?ordering) lo define la paginación keyset
+    pagination_class = KeysetAuditoriaPagination
 
-    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filter_backends = [DjangoFilterBackend]
     filterset_class = RegistroAuditoriaFilter
-    ordering_fields = ["creado_en", "metodo", "estado", "modulo"]
-    ordering = ['-creado_en'] # Orden por defecto
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action == "list":
+            qs = qs.defer("payload")  # el JSON no viaja ni se carga en memoria
+        return qs
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return RegistroAuditoriaListaSerializer
+        return RegistroAuditoriaSerializer
 
     @action(detail=False, methods=['get'], url_path='exportar-excel')
     def exportar_excel(self, request, *args, **kwargs):
@@ -43,7 +59,22 @@ class RegistroAuditoriaViewSet(viewsets.ReadOnlyModelViewSet):
     def exportar_pdf(self, request, *args, **kwargs):
         """
         Exporta los registros de auditoría filtrados a un archivo PDF.
+
+        Hasta AUDITORIA_PDF_MAX_FILAS se genera en la misma petición; por encima
+        encola un ReportJob (lo genera `manage.py procesar_reportes`) y responde
+        202 con su `job_id` y la URL de estado en /api/reportes/jobs/<id>/.
         """
         queryset = self.filter_queryset(self.get_queryset())
-        response = exportar_auditoria_pdf(queryset)
-        return response
+        limite = getattr(settings, "AUDITORIA_PDF_MAX_FILAS", 5000)
+        # COUNT acotado: no recorre toda la bitácora para saber si supera el límite
+        if queryset.order_by()[: limite + 1].count() > limite:
+            job = encolar_exportacion_pdf(request)
+            return Response(
+                {
+                    "job_id": job.pk,
+                    "estado": job.estado,
+                    "estado_url": request.build_absolute_uri(reverse("reporte_job", args=[job.pk])),
+                },
+                status=status.HTTP_202_ACCEPTED,
+            )
+        return exportar_auditoria_pdf(queryset)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CatalogoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'catalogo'
+
+    def ready(self):
+        import catalogo.signals  # Invalida el índice de ofertas al cambiar una Oferta
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-17 11:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['producto', 'creado_en'], name='movinv_producto_creado_idx'),
+        ),
+    ]
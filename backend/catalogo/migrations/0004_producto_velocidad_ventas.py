@@ -0,0 +1,41 @@
+# Generated by Django 5.0.6 on 2026-10-17 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0003_movimiento_producto_creado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='ultima_venta_en',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='vendidas_30d',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='vendidas_7d',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='vendidas_90d',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['ultima_venta_en'], name='producto_ultima_venta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['vendidas_30d'], name='producto_vendidas_30d_idx'),
+        ),
+    ]
@@ -128,12 +128,22 @@ class Producto(models.Model):
     creado_en = models.DateTimeField(auto_now_add=True)
     actualizado_en = models.DateTimeField(auto_now=True)
     imagen = models.ImageField(upload_to='productos/', null=True, blank=True)
+
+    # Velocidad de venta (solo ventas pagadas), desnormalizada para que los
+    # reportes filtren y ordenen sin agregar ItemVenta. La mantiene
+    # analitica/velocidad.py; no se edita a mano.
+    ultima_venta_en = models.DateTimeField(null=True, blank=True, editable=False)
+    vendidas_7d = models.IntegerField(default=0, editable=False)
+    vendidas_30d = models.IntegerField(default=0, editable=False)
+    vendidas_90d = models.IntegerField(default=0, editable=False)
     
     class Meta:
         ordering = ["nombre"]
         indexes = [
             models.Index(fields=["codigo"]),
             models.Index(fields=["nombre"]),
+            models.Index(fields=["ultima_venta_en"], name="producto_ultima_venta_idx"),
+            models.Index(fields=["vendidas_30d"], name="producto_vendidas_30d_idx"),
         ]
 
     def __str__(self) -> str:
@@ -142,32 +152,25 @@ class Producto(models.Model):
     @property
     def oferta_activa(self):
         """
-        Busca la mejor oferta activa para este producto.
-        La prioridad es: oferta específica > oferta de marca > oferta de categoría.
+        Busca la mejor oferta activa para este producto: la de mayor descuento
+        entre las específicas, las de su marca y las de su categoría.
+        Se resuelve en memoria con el índice de ofertas (catalogo.services),
+        sin consultar la base por cada producto.
         Devuelve el objeto Oferta o None.
         """
-        from django.db.models import Q
-
-        # Construir el filtro para buscar ofertas aplicables a este producto
-        filtro_aplicable = Q(productos_especificos=self)
-        if self.marca_id:
-            filtro_aplicable |= Q(marcas=self.marca)
-        if self.categoria_id:
-            filtro_aplicable |= Q(categorias=self.categoria)
+        from .services import indice_ofertas  # import local para evitar ciclos
 
-        # Buscar la mejor oferta (mayor descuento) que aplique
-        mejor_oferta = Oferta.objects.activas().filter(filtro_aplicable).order_by('-porcentaje_descuento').first()
-        return mejor_oferta
+        return indice_ofertas().mejor_oferta(self)
 
     @property
     def precio_final(self):
         """Calcula el precio final aplicando el mejor descuento activo."""
+        from .services import aplicar_descuento
+
         oferta = self.oferta_activa
         if not oferta:
             return self.precio
-        
-        descuento = self.precio * (oferta.porcentaje_descuento / 100)
-        return self.precio - descuento
+        return aplicar_descuento(self.precio, oferta.porcentaje_descuento)
 
     def save(self, *args, **kwargs):
         """
@@ -204,6 +207,10 @@ class MovimientoInventario(models.Model):
 
     class Meta:
         ordering = ["-creado_en"]
+        indexes = [
+            # "¿tuvo movimientos en el período?" por producto (reportes sin movimiento)
+            models.Index(fields=["producto", "creado_en"], name="movinv_producto_creado_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.creado_en:%Y-%m-%d %H:%M} {self.tipo} {self.cantidad} {self.producto_id}"
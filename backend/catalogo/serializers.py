@@ -131,6 +131,10 @@ class ProductoSerializer(serializers.ModelSerializer):
             "actualizado_en",
             "imagen",
             "imagen_url",
+            "ultima_venta_en",
+            "vendidas_7d",
+            "vendidas_30d",
+            "vendidas_90d",
         ]
         extra_kwargs = {
             "imagen": {"write_only": True, "required": False},
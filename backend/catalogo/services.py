@@ -0,0 +1,329 @@
+# catalogo/services.py
+from __future__ import annotations
+
+import threading
+import time
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (
+    Case,
+    DecimalField,
+    Exists,
+    F,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Round
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import MovimientoInventario, Oferta, Producto
+
+
+def aplicar_descuento(precio: Decimal, porcentaje: Decimal) -> Decimal:
+    """Precio con el descuento aplicado, redondeado a centavos (igual que en SQL)."""
+    final = precio - precio * (porcentaje / 100)
+    return final.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+# ==========================
+# Índice de ofertas vigentes
+# ==========================
+
+def _prioridad(oferta: Oferta):
+    """Mayor descuento gana; ante empate, la oferta más reciente."""
+    return (oferta.porcentaje_descuento, oferta.fecha_inicio, oferta.pk)
+
+
+class IndiceOfertas:
+    """
+    Ofertas vigentes indexadas por id de producto, de marca y de categoría.
+
+    Por cada clave se guarda solo la oferta de mayor descuento, así resolver la
+    mejor oferta de un producto es comparar como mucho tres candidatas en memoria
+    (sin consultas). Las ofertas llegan con sus M2M precargados, de modo que
+    `OfertaSerializer` tampoco consulta al serializarlas anidadas.
+    """
+
+    def __init__(self, ofertas, ahora=None):
+        self.ahora = ahora or timezone.now()
+        self.por_producto: Dict[int, Oferta] = {}
+        self.por_marca: Dict[int, Oferta] = {}
+        self.por_categoria: Dict[int, Oferta] = {}
+        # Momento en que alguna oferta empieza o termina → hay que reconstruir
+        self.vigente_hasta = None
+
+        for oferta in ofertas:
+            if oferta.fecha_inicio > self.ahora:
+                self._caduca_en(oferta.fecha_inicio)
+                continue
+            self._caduca_en(oferta.fecha_fin)
+            for p in oferta.productos_especificos.all():
+                self._registrar(self.por_producto, p.pk, oferta)
+            for m in oferta.marcas.all():
+                self._registrar(self.por_marca, m.pk, oferta)
+            for c in oferta.categorias.all():
+                self._registrar(self.por_categoria, c.pk, oferta)
+
+    @classmethod
+    def construir(cls) -> "IndiceOfertas":
+        """Carga las ofertas activas no vencidas (4 consultas en total)."""
+        ahora = timezone.now()
+        ofertas = (
+            Oferta.objects.filter(activa=True, fecha_fin__gte=ahora)
+            .prefetch_related("productos_especificos", "marcas", "categorias")
+        )
+        return cls(ofertas, ahora=ahora)
+
+    def _caduca_en(self, momento):
+        if self.vigente_hasta is None or momento < self.vigente_hasta:
+            self.vigente_hasta = momento
+
+    @staticmethod
+    def _registrar(tabla: Dict[int, Oferta], clave: int, oferta: Oferta):
+        actual = tabla.get(clave)
+        if actual is None or _prioridad(oferta) > _prioridad(actual):
+            tabla[clave] = oferta
+
+    def vigente(self, ahora=None) -> bool:
+        ahora = ahora or timezone.now()
+        return self.vigente_hasta is None or ahora < self.vigente_hasta
+
+    def mejor_oferta(self, producto) -> Optional[Oferta]:
+        """Mejor oferta para el producto entre específicas, de marca y de categoría."""
+        candidatas = [
+            self.por_producto.get(producto.pk),
+            self.por_marca.get(producto.marca_id) if producto.marca_id else None,
+            self.por_categoria.get(producto.categoria_id) if producto.categoria_id else None,
+        ]
+        candidatas = [o for o in candidatas if o is not None]
+        if not candidatas:
+            return None
+        return max(candidatas, key=_prioridad)
+
+    def precio_final(self, producto) -> Decimal:
+        oferta = self.mejor_oferta(producto)
+        if not oferta:
+            return producto.precio
+        return aplicar_descuento(producto.precio, oferta.porcentaje_descuento)
+
+
+# ==========================
+# Caché del índice (por proceso, con versión compartida)
+# ==========================
+_VERSION_KEY = "catalogo:ofertas:version"
+_INDICE: Optional[IndiceOfertas] = None
+_INDICE_VERSION = None
+_INDICE_LOCK = threading.Lock()
+
+
+def version_ofertas() -> int:
+    """
+    Versión de las ofertas en el caché compartido: la incrementan las signals
+    de Oferta y sus M2M (catalogo/signals.py) y cada worker compara la suya
+    con esta para saber si su índice quedó viejo.
+    """
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        # Igual que en cuentas.services: partir del reloj garantiza que una
+        # versión recreada sea mayor que cualquiera usada antes.
+        cache.add(_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(_VERSION_KEY)
+    return version
+
+
+def indice_ofertas() -> IndiceOfertas:
+    """
+    Devuelve el índice de ofertas del proceso, reconstruyéndolo si:
+      - cambió la versión compartida (una oferta o su alcance cambió en
+        cualquier worker: los precios de carrito y checkout salen de acá),
+      - alguna oferta empezó o terminó desde que se construyó.
+    """
+    global _INDICE, _INDICE_VERSION
+
+    version = version_ofertas()
+    indice = _INDICE
+    if indice is not None and _INDICE_VERSION == version and indice.vigente():
+        return indice
+
+    with _INDICE_LOCK:
+        if _INDICE is None or _INDICE is indice:  # nadie lo reconstruyó mientras esperábamos
+            _INDICE = IndiceOfertas.construir()
+            _INDICE_VERSION = version
+        return _INDICE
+
+
+def invalidar_indice_ofertas() -> None:
+    """Invalida el índice en todos los procesos (incrementa la versión compartida)."""
+    global _INDICE
+    _INDICE = None
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:  # la clave no existía o expiró
+        version_ofertas()
+
+
+# ==========================
+# Precios en bloque (SQL)
+# ==========================
+
+def _mejor_oferta_subquery(ahora):
+    """
+    Ofertas vigentes que aplican al producto de la consulta externa, de mayor a
+    menor descuento. Cada alcance (producto, marca, categoría) es un EXISTS
+    sobre su tabla intermedia, así no se multiplican filas entre las tres M2M.
+    """
+    through_prod = Oferta.productos_especificos.through
+    through_marca = Oferta.marcas.through
+    through_cat = Oferta.categorias.through
+
+    return (
+        Oferta.objects.filter(activa=True, fecha_inicio__lte=ahora, fecha_fin__gte=ahora)
+        .filter(
+            Exists(through_prod.objects.filter(
+                oferta_id=OuterRef("pk"), producto_id=OuterRef(OuterRef("pk"))
+            ))
+            | Exists(through_marca.objects.filter(
+                oferta_id=OuterRef("pk"), marca_id=OuterRef(OuterRef("marca_id"))
+            ))
+            | Exists(through_cat.objects.filter(
+                oferta_id=OuterRef("pk"), categoria_id=OuterRef(OuterRef("categoria_id"))
+            ))
+        )
+        .order_by("-porcentaje_descuento", "-fecha_inicio", "-pk")
+    )
+
+
+def anotar_precio_final(qs: QuerySet) -> QuerySet:
+    """
+    Anota en un queryset de Producto:
+      - mejor_oferta_id: id de la oferta ganadora (o None)
+      - precio_con_oferta: precio final redondeado a centavos
+    Todo se calcula en la misma sentencia SQL del queryset.
+    """
+    mejor = _mejor_oferta_subquery(timezone.now())
+    porcentaje = Subquery(mejor.values("porcentaje_descuento")[:1])
+    money = DecimalField(max_digits=12, decimal_places=2)
+
+    return qs.annotate(
+        mejor_oferta_id=Subquery(mejor.values("pk")[:1]),
+        precio_con_oferta=Round(
+            F("precio") - F("precio") * Coalesce(porcentaje, Value(Decimal("0"))) / 100,
+            2,
+            output_field=money,
+        ),
+    )
+
+
+def precios_finales(
+    productos: Union[QuerySet, Iterable[int]],
+) -> Dict[int, Tuple[Decimal, Optional[int]]]:
+    """
+    Precio final de muchos productos en una sola consulta.
+
+    Acepta un queryset de Producto o una lista de ids y devuelve
+    {id: (precio_final, oferta_id)}. Los ids inexistentes no aparecen.
+    """
+    if isinstance(productos, QuerySet):
+        qs = productos.order_by()
+    else:
+        qs = Producto.objects.filter(pk__in=list(productos))
+
+    filas = anotar_precio_final(qs).values_list("pk", "precio_con_oferta", "mejor_oferta_id")
+    return {pk: (precio, oferta_id) for pk, precio, oferta_id in filas}
+
+
+# ==========================
+# Movimientos de stock en bloque
+# ==========================
+
+def agrupar_cantidades(pares: Iterable[Tuple[int, int]]) -> Dict[int, int]:
+    """Suma cantidades por producto: [(producto_id, cantidad), ...] → {producto_id: total}."""
+    out: Dict[int, int] = {}
+    for producto_id, cantidad in pares:
+        out[producto_id] = out.get(producto_id, 0) + int(cantidad)
+    return out
+
+
+# Se emite tras cada mover_stock. El UPDATE en bloque no dispara post_save de
+# Producto, así que quien cachee datos derivados del stock escucha esta señal
+# (argumentos: productos=[ids], tipo="IN"|"OUT").
+stock_movido = Signal()
+
+
+@transaction.atomic(savepoint=False)
+def mover_stock(cantidades: Dict[int, int], tipo: str, motivo: str, usuario=None) -> None:
+    """
+    Aplica entradas ("IN") o salidas ("OUT") de stock a varios productos a la vez.
+
+    1) Bloquea las filas de Producto con SELECT ... FOR UPDATE en orden de id,
+       así dos transacciones concurrentes nunca se bloquean en orden cruzado.
+    2) Actualiza todos los stocks en un único UPDATE con F("stock") ± cantidad.
+       Para salidas, el WHERE exige stock suficiente por producto; si alguna
+       fila no se actualiza se aborta la transacción (nunca se sobrevende).
+    3) Registra los movimientos con un solo bulk_create.
+
+    Lanza ValueError si un producto no existe o no tiene stock suficiente.
+    """
+    cantidades = {pid: cant for pid, cant in cantidades.items() if cant > 0}
+    if not cantidades:
+        return
+
+    ids = sorted(cantidades)
+    bloqueados = {
+        pk: (nombre, stock)
+        for pk, nombre, stock in (
+            Producto.objects.select_for_update()
+            .filter(pk__in=ids)
+            .order_by("pk")
+            .values_list("pk", "nombre", "stock")
+        )
+    }
+
+    faltantes = [pid for pid in ids if pid not in bloqueados]
+    if faltantes:
+        raise ValueError(f"Productos no encontrados: {faltantes}")
+
+    if tipo == "OUT":
+        for pid in ids:
+            nombre, stock = bloqueados[pid]
+            if stock < cantidades[pid]:
+                raise ValueError(
+                    f"Stock insuficiente para {nombre}. "
+                    f"Disponible: {stock}, requerido: {cantidades[pid]}"
+                )
+        delta = [When(pk=pid, then=F("stock") - cant) for pid, cant in cantidades.items()]
+        condicion = Q()
+        for pid, cant in cantidades.items():
+            condicion |= Q(pk=pid, stock__gte=cant)
+    else:
+        delta = [When(pk=pid, then=F("stock") + cant) for pid, cant in cantidades.items()]
+        condicion = Q(pk__in=ids)
+
+    actualizados = Producto.objects.filter(condicion).update(
+        stock=Case(*delta, default=F("stock"))
+    )
+    if actualizados != len(ids):
+        # Defensa extra: con las filas bloqueadas no debería ocurrir
+        raise ValueError("No se pudo actualizar el stock de todos los productos.")
+
+    MovimientoInventario.objects.bulk_create(
+        [
+            MovimientoInventario(
+                producto_id=pid,
+                tipo=tipo,
+                cantidad=cantidades[pid],
+                motivo=motivo,
+                usuario=usuario,
+            )
+            for pid in ids
+        ]
+    )
+    stock_movido.send(sender=Producto, productos=ids, tipo=tipo)
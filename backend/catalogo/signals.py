@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Oferta
+from .services import invalidar_indice_ofertas
+
+
+def _invalidar_al_confirmar():
+    """Invalida ahora y otra vez al confirmar, para no cachear datos sin commit."""
+    invalidar_indice_ofertas()
+    transaction.on_commit(invalidar_indice_ofertas)
+
+
+@receiver(post_save, sender=Oferta)
+@receiver(post_delete, sender=Oferta)
+def oferta_cambiada(sender, **kwargs):
+    _invalidar_al_confirmar()
+
+
+@receiver(m2m_changed, sender=Oferta.productos_especificos.through)
+@receiver(m2m_changed, sender=Oferta.marcas.through)
+@receiver(m2m_changed, sender=Oferta.categorias.through)
+def oferta_alcance_cambiado(sender, action, **kwargs):
+    """Se dispara cuando cambian los productos, marcas o categorías de una oferta."""
+    if action in ("post_add", "post_remove", "post_clear"):
+        _invalidar_al_confirmar()
@@ -75,7 +75,6 @@ class ProductoViewSet(viewsets.ModelViewSet):
         # si quieres que el móvil solo vea productos activos, descomenta la siguiente línea:
         # .filter(activo=True)
         .select_related("categoria", "marca")
-        .prefetch_related("ofertas_especificas")
         .order_by("nombre")
     )
     serializer_class = ProductoSerializer
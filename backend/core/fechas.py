@@ -0,0 +1,64 @@
+# core/fechas.py
+"""
+Rangos de fechas locales → filtros sargables sobre DateTimeField.
+
+`creado_en__date__gte=...` convierte cada fila a fecha local
+(`(creado_en AT TIME ZONE 'America/La_Paz')::date`) antes de comparar, así que
+ningún índice sobre creado_en sirve. Aquí se hace al revés: los días locales del
+rango se convierten una sola vez a instantes con zona y se filtra con un rango
+semiabierto sobre la columna tal cual:
+
+    creado_en >= <inicio de `desde`>  AND  creado_en < <inicio del día siguiente a `hasta`>
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Tuple, Union
+
+from django.db.models import Q
+from django.utils import timezone
+
+FechaLike = Union[date, datetime, str, None]
+
+
+def a_fecha(valor: FechaLike) -> Optional[date]:
+    """date | datetime | 'YYYY-MM-DD' (o ISO con hora) → date local; None/'' → None."""
+    if valor in (None, ""):
+        return None
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).date() if timezone.is_aware(valor) else valor.date()
+    if isinstance(valor, date):
+        return valor
+    try:
+        return date.fromisoformat(str(valor).strip()[:10])
+    except ValueError:
+        raise ValueError(f"Fecha inválida: {valor!r} (se espera YYYY-MM-DD)")
+
+
+def inicio_dia(dia: date) -> datetime:
+    """Medianoche local (TIME_ZONE) de `dia`, con zona."""
+    return timezone.make_aware(datetime.combine(dia, time.min), timezone.get_default_timezone())
+
+
+def rango_local(desde: FechaLike = None, hasta: FechaLike = None) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Días locales [desde, hasta] (ambos inclusive) → (inicio, fin) con zona,
+    semiabierto: inicio <= t < fin. Un extremo ausente queda en None.
+    """
+    d, h = a_fecha(desde), a_fecha(hasta)
+    inicio = inicio_dia(d) if d else None
+    fin = inicio_dia(h + timedelta(days=1)) if h else None
+    return inicio, fin
+
+
+def q_rango(campo: str, desde: FechaLike = None, hasta: FechaLike = None) -> Q:
+    """
+    Q sargable para `campo` (DateTimeField, puede cruzar relaciones):
+        Venta.objects.filter(q_rango("creado_en", "2025-09-01", "2025-09-30"))
+        ItemVenta.objects.filter(q_rango("venta__creado_en", desde, hasta))
+    """
+    inicio, fin = rango_local(desde, hasta)
+    q = Q()
+    if inicio is not None:
+        q &= Q(**{f"{campo}__gte": inicio})
+    if fin is not None:
+        q &= Q(**{f"{campo}__lt": fin})
+    return q
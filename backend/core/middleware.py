@@ -1,6 +1,8 @@
 import json
+from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
-from auditoria.models import RegistroAuditoria
+from auditoria.escritor import registrar
+from auditoria.politica import cargar_politica
 
 def _get_client_ip(request):
     # Respeta proxies reversos si en algún momento usas uno
@@ -18,8 +20,16 @@ def _clean_payload(payload):
     return {k: "[REDACTED]" if k in sensitive_keys else v for k, v in payload.items()}
 
 class AuditoriaMiddleware(MiddlewareMixin):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        # Reglas de settings.AUDITORIA_REGLAS compiladas una vez al arrancar
+        self.politica = cargar_politica()
+
     def process_response(self, request, response):
         try:
+            if not self.politica.debe_registrar(request.path, request.method):
+                return response
+
             user = getattr(request, "user", None)
 
             # Capturamos request body solo para métodos que mutan
@@ -53,8 +63,9 @@ class AuditoriaMiddleware(MiddlewareMixin):
                     model_name = getattr(view.queryset.model, '_meta', {}).verbose_name or 'Recurso'
                     accion = f"{action_name} {model_name}"
 
-            RegistroAuditoria.objects.create(
-                usuario=user if getattr(user, "is_authenticated", False) else None,
+            # Se encola: un hilo lo inserta en lote (auditoria/escritor.py)
+            registrar(dict(
+                usuario_id=user.pk if getattr(user, "is_authenticated", False) else None,
                 accion=str(accion)[:100],
                 modulo=str(modulo)[:50],
                 ip=_get_client_ip(request),
@@ -63,7 +74,8 @@ class AuditoriaMiddleware(MiddlewareMixin):
                 metodo=request.method[:10],
                 estado=getattr(response, "status_code", None),
                 payload=payload,
-            )
+                creado_en=timezone.now(),
+            ))
         except Exception:
             # La auditoría jamás debe romper la respuesta
             pass
@@ -127,6 +127,20 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "core.wsgi.application"
 
+# ================================
+# Caché
+# ================================
+# Por defecto en archivos: lo comparten todos los workers de gunicorn del host,
+# así una invalidación (ej. versión de permisos) se ve en todos.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "/tmp/gestion_comercial_cache"),
+    }
+}
+
 # ================================
 # Base de datos
 # ================================
@@ -160,8 +174,13 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # Incrusta los permisos (y su versión) en el token; ver cuentas/services.py
+    "TOKEN_OBTAIN_SERIALIZER": "cuentas.serializers.TokenConPermisosSerializer",
 }
 
+# Segundos que se cachea el set de permisos de cada usuario
+PERMISOS_CACHE_TTL = int(os.getenv("PERMISOS_CACHE_TTL", "300"))
+
 # ================================
 # Validadores de contraseña
 # ================================
@@ -275,6 +294,65 @@ LOGGING = {
     "root": {"handlers": ["console"], "level": "INFO"},
 }
 
+# ================================
+# Auditoría
+# ================================
+# El middleware encola y un hilo inserta en lote (auditoria/escritor.py).
+# AUDITORIA_ASINCRONA=0 vuelve al INSERT síncrono por petición.
+AUDITORIA_ASINCRONA = os.getenv("AUDITORIA_ASINCRONA", "1") == "1"
+AUDITORIA_COLA_MAX = int(os.getenv("AUDITORIA_COLA_MAX", "10000"))
+AUDITORIA_LOTE = int(os.getenv("AUDITORIA_LOTE", "200"))
+AUDITORIA_INTERVALO_MS = int(os.getenv("AUDITORIA_INTERVALO_MS", "1000"))
+# Lotes que no pudieron escribirse por caída de la base; se reinsertan al volver
+AUDITORIA_SPOOL_DIR = os.getenv("AUDITORIA_SPOOL_DIR", "/tmp/gestion_comercial_auditoria_spool")
+
+# Por encima de estas filas el PDF de auditoría se encola como ReportJob
+# (lo genera `manage.py procesar_reportes`)
+AUDITORIA_PDF_MAX_FILAS = int(os.getenv("AUDITORIA_PDF_MAX_FILAS", "5000"))
+
+# Qué se registra (ver auditoria/politica.py). Gana la primera regla que coincide;
+# modos: siempre | mutaciones | muestreo (con "tasa") | nunca.
+AUDITORIA_MODO_DEFECTO = os.getenv("AUDITORIA_MODO_DEFECTO", "siempre")
+AUDITORIA_REGLAS = [
+    # Health checks, estáticos y documentación de la API
+    {"exacta": "/", "modo": "nunca"},
+    {"prefijo": "/health/", "modo": "nunca"},
+    {"prefijo": "/static/", "modo": "nunca"},
+    {"prefijo": "/media/", "modo": "nunca"},
+    {"prefijo": "/favicon.ico", "modo": "nunca"},
+    {"prefijo": "/api/esquema/", "modo": "nunca"},
+    {"prefijo": "/api/docs/", "modo": "nunca"},
+    # Lecturas de alta frecuencia: catálogo y dashboards
+    {"prefijo": "/api/catalogo/", "modo": "mutaciones"},
+    {"prefijo": "/api/analitica/", "modo": "muestreo", "tasa": 0.05},
+]
+
+# ================================
+# Reportes: exportaciones en segundo plano
+# ================================
+# Si la estimación supera este número de filas, el Excel/PDF no se genera en la
+# petición: se crea un ReportJob y lo procesa `manage.py procesar_reportes`.
+REPORTES_SYNC_MAX_FILAS = int(os.getenv("REPORTES_SYNC_MAX_FILAS", "2000"))
+REPORTES_WORKER_INTERVALO = float(os.getenv("REPORTES_WORKER_INTERVALO", "2"))
+# Un job "procesando" por más de estos minutos se considera abandonado
+REPORTES_JOB_TIMEOUT_MIN = int(os.getenv("REPORTES_JOB_TIMEOUT_MIN", "30"))
+REPORTES_JOB_MAX_INTENTOS = int(os.getenv("REPORTES_JOB_MAX_INTENTOS", "3"))
+
+# Previsualización en pantalla: filas por página (offset / limit) y máximo aceptado
+REPORTES_PREVIEW_LIMIT = int(os.getenv("REPORTES_PREVIEW_LIMIT", "100"))
+REPORTES_PREVIEW_LIMIT_MAX = int(os.getenv("REPORTES_PREVIEW_LIMIT_MAX", "1000"))
+
+# Caché de run_prompt (reportes/cache.py): prompt → spec y spec → filas.
+# Las filas se invalidan solas al cambiar ventas o stock/precios; el TTL es el
+# máximo que puede vivir una entrada aunque no haya cambios (se recorta hasta
+# el próximo inicio / fin de una oferta activa).
+REPORTES_CACHE_TTL = int(os.getenv("REPORTES_CACHE_TTL", "600"))
+REPORTES_CACHE_TTL_SPEC = int(os.getenv("REPORTES_CACHE_TTL_SPEC", "86400"))
+REPORTES_CACHE_MAX_FILAS = int(os.getenv("REPORTES_CACHE_MAX_FILAS", "5000"))
+# Dashboard: pasados estos segundos se sirve el dato anterior y se recalcula
+# en segundo plano (una sola vez para todos los usuarios)
+REPORTES_DASHBOARD_TTL = int(os.getenv("REPORTES_DASHBOARD_TTL", "45"))
+
 # ================================
 # Stripe
 # ================================
@@ -7,6 +7,7 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/wsgi/
 """
 
+import gc
 import os
 
 from django.core.wsgi import get_wsgi_application
@@ -14,3 +15,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Modelos de IA en memoria antes de atender peticiones. Con `gunicorn --preload`
+# esto corre en el master: los workers heredan los objetos ya cargados y
+# gc.freeze() evita que el recolector los recorra (y copie sus páginas) en cada
+# worker.
+from ia import registro  # noqa: E402
+
+registro.precargar()
+gc.freeze()
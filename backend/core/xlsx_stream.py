@@ -0,0 +1,218 @@
+# core/xlsx_stream.py
+"""
+Escritor XLSX en streaming.
+
+Genera el .xlsx (un zip de XMLs) mientras se recorren las filas y va
+entregando los bytes comprimidos por trozos, así un StreamingHttpResponse
+empieza a enviar de inmediato y la memoria no crece con la cantidad de filas
+(openpyxl, incluso en modo write-only, arma el zip recién al guardar).
+
+Los anchos de columna se calculan con las primeras `muestra_anchos` filas:
+el elemento <cols> va antes de los datos en la hoja, así que no se puede
+esperar a ver todas.
+
+Los estilos son fijos (styles.xml) y se aplican por columna: cada celda solo
+lleva el índice `s="N"` de su columna, no hay objetos de estilo por celda.
+"""
+import io
+import re
+import zipfile
+from collections import deque
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Sequence
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+
+CONTENT_TYPE_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Caracteres de control no permitidos en XML 1.0
+_INVALIDOS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Índices de <cellXfs> en styles.xml
+ESTILO_NORMAL = 0
+ESTILO_ENCABEZADO = 1
+ESTILO_ENCABEZADO_OSCURO = 2  # negrita blanca sobre 1E293B, centrado, con borde
+ESTILO_BORDE = 3              # texto / números con borde fino
+ESTILO_MONEDA = 4             # "$"#,##0.00, a la derecha, con borde
+ESTILO_CENTRADO = 5           # centrado, con borde
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+</Types>"""
+
+_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="{hoja}" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+
+_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+
+_STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<numFmts count="1"><numFmt numFmtId="164" formatCode="&quot;$&quot;#,##0.00_-"/></numFmts>
+<fonts count="3"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><color rgb="FFFFFFFF"/><name val="Calibri"/></font></fonts>
+<fills count="3"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill><fill><patternFill patternType="solid"><fgColor rgb="FF1E293B"/><bgColor rgb="FF1E293B"/></patternFill></fill></fills>
+<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border><border><left style="thin"><color rgb="FFDDDDDD"/></left><right style="thin"><color rgb="FFDDDDDD"/></right><top style="thin"><color rgb="FFDDDDDD"/></top><bottom style="thin"><color rgb="FFDDDDDD"/></bottom><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="6">
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1" applyAlignment="1"><alignment horizontal="center"/></xf>
+<xf numFmtId="0" fontId="2" fillId="2" borderId="1" xfId="0" applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1"><alignment horizontal="center" vertical="center"/></xf>
+<xf numFmtId="0" fontId="0" fillId="0" borderId="1" xfId="0" applyBorder="1"/>
+<xf numFmtId="164" fontId="0" fillId="0" borderId="1" xfId="0" applyNumberFormat="1" applyBorder="1" applyAlignment="1"><alignment horizontal="right"/></xf>
+<xf numFmtId="0" fontId="0" fillId="0" borderId="1" xfId="0" applyBorder="1" applyAlignment="1"><alignment horizontal="center"/></xf>
+</cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>"""
+
+
+def _letra(indice: int) -> str:
+    """0 → A, 25 → Z, 26 → AA ..."""
+    letras = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _texto(valor) -> str:
+    if isinstance(valor, datetime):
+        return valor.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return str(valor)
+
+
+def _celda(ref: str, valor, estilo: int) -> str:
+    s = f' s="{estilo}"' if estilo else ""
+    if valor is None or valor == "":
+        return ""
+    if isinstance(valor, bool):
+        return f'<c r="{ref}" t="b"{s}><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float, Decimal)):
+        return f'<c r="{ref}"{s}><v>{valor}</v></c>'
+    texto = escape(_INVALIDOS.sub("", _texto(valor)))
+    return f'<c r="{ref}" t="inlineStr"{s}><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _fila(numero: int, valores: Sequence, letras: Sequence[str], estilos: Sequence[int]) -> str:
+    celdas = "".join(
+        _celda(f"{letras[i]}{numero}", v, estilos[i]) for i, v in enumerate(valores)
+    )
+    return f'<row r="{numero}">{celdas}</row>'
+
+
+class _Salida(io.RawIOBase):
+    """Destino no posicionable para zipfile: acumula bytes hasta que se retiran."""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._partes.append(bytes(b))
+        return len(b)
+
+    def retirar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def xlsx_en_stream(
+    encabezados: Sequence[str],
+    filas: Iterable[Sequence],
+    hoja: str = "Hoja1",
+    muestra_anchos: int = 500,
+    filas_por_bloque: int = 1000,
+    estilo_encabezado: int = ESTILO_ENCABEZADO,
+    estilos_columnas: Optional[Sequence[int]] = None,
+    ancho_minimo: int = 8,
+    ancho_maximo: int = 60,
+) -> Iterator[bytes]:
+    """
+    Genera los bytes de un .xlsx con una sola hoja. `filas` puede ser cualquier
+    iterable (por ejemplo `queryset.values_list(...).iterator()`): se consume una
+    única vez y solo se retienen en memoria las filas de la muestra.
+
+    `estilos_columnas`: un índice ESTILO_* por columna (por defecto, ESTILO_NORMAL).
+    """
+    filas = iter(filas)
+    muestra = deque(islice(filas, muestra_anchos))
+    letras = [_letra(i) for i in range(len(encabezados))]
+    estilos = list(estilos_columnas or [ESTILO_NORMAL] * len(encabezados))
+
+    anchos = [len(str(h)) for h in encabezados]
+    for fila in muestra:
+        for i, v in enumerate(fila):
+            if v is not None:
+                anchos[i] = max(anchos[i], len(_texto(v)))
+    cols = "".join(
+        f'<col min="{i + 1}" max="{i + 1}" width="{min(max(a + 2, ancho_minimo), ancho_maximo)}" customWidth="1"/>'
+        for i, a in enumerate(anchos)
+    )
+
+    salida = _Salida()
+    with zipfile.ZipFile(salida, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _RELS)
+        zf.writestr("xl/workbook.xml", _WORKBOOK.format(hoja=escape(hoja[:31])))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        zf.writestr("xl/styles.xml", _STYLES)
+        yield salida.retirar()
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as hoja_xml:
+            hoja_xml.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" '
+                b'activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>'
+                + f"<cols>{cols}</cols><sheetData>".encode()
+                + _fila(1, encabezados, letras, [estilo_encabezado] * len(encabezados)).encode()
+            )
+            numero = 1
+            bloque = []
+            for fila in _encadenar(muestra, filas):
+                numero += 1
+                bloque.append(_fila(numero, fila, letras, estilos))
+                if len(bloque) >= filas_por_bloque:
+                    hoja_xml.write("".join(bloque).encode())
+                    bloque.clear()
+                    yield salida.retirar()
+            hoja_xml.write(("".join(bloque) + "</sheetData></worksheet>").encode())
+    yield salida.retirar()
+
+
+def _encadenar(muestra, resto):
+    # La muestra se suelta a medida que se escribe, no queda retenida
+    while muestra:
+        yield muestra.popleft()
+    yield from resto
+
+
+def respuesta_xlsx(nombre_archivo: str, encabezados, filas, **kwargs) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(
+        xlsx_en_stream(encabezados, filas, **kwargs), content_type=CONTENT_TYPE_XLSX
+    )
+    response["Content-Disposition"] = f'attachment; filename="{nombre_archivo}"'
+    return response
@@ -1,6 +1,8 @@
 # cuentas/permissions.py
 from rest_framework.permissions import BasePermission
 
+from .services import permisos_de_request
+
 class RequierePermisos(BasePermission):
     """
     Lee de la vista los permisos requeridos en `required_perms` (lista de strings).
@@ -20,8 +22,5 @@ class RequierePermisos(BasePermission):
         # Administrador Django (is_superuser) permite todo
         if user.is_superuser:
             return True
-        # Si el usuario tiene TODOS los permisos requeridos
-        for code in required:
-            if not getattr(user, "tiene_permiso", lambda c: False)(code):
-                return False
-        return True
+        # Si el usuario tiene TODOS los permisos requeridos (set cacheado, ver cuentas/services.py)
+        return permisos_de_request(request).issuperset(required)
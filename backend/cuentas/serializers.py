@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import Usuario, Rol, Permiso
+from .services import agregar_claims_permisos
 
 
 class PermisoSerializer(serializers.ModelSerializer):
@@ -57,4 +59,17 @@ class UsuarioSerializer(serializers.ModelSerializer):
         # Hashear la contraseña si se está actualizando
         if "password" in validated_data:
             validated_data["password"] = make_password(validated_data["password"])
-        return super().update(instance, validated_data)
\ No newline at end of file
+        return super().update(instance, validated_data)
+
+
+class TokenConPermisosSerializer(TokenObtainPairSerializer):
+    """
+    Login JWT que incrusta los permisos del usuario en el token, para que
+    `RequierePermisos` no consulte la base mientras la versión siga vigente.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        agregar_claims_permisos(token, user)
+        return token
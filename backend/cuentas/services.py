@@ -0,0 +1,105 @@
+# cuentas/services.py
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Permiso
+
+_VERSION_KEY = "cuentas:permisos:version"
+
+
+# ==========================
+# Versión global de permisos
+# ==========================
+
+def version_permisos() -> int:
+    """
+    Versión actual de la asignación roles/permisos. Forma parte de cada clave
+    cacheada, así invalidar todo es solo incrementarla (ver cuentas/signals.py).
+    """
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        # Se parte del reloj para que, si la clave se pierde del caché, la nueva
+        # versión sea siempre mayor que cualquiera usada antes.
+        cache.add(_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(_VERSION_KEY)
+    return version
+
+
+def invalidar_permisos() -> None:
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:  # la clave no existía o expiró
+        version_permisos()
+
+
+# ==========================
+# Permisos por usuario
+# ==========================
+
+def _calcular_permisos(usuario) -> frozenset:
+    if usuario.is_superuser:
+        # Un superusuario tiene todos los permisos de nuestro sistema.
+        qs = Permiso.objects.all()
+    else:
+        qs = Permiso.objects.filter(roles__usuarios=usuario)
+    return frozenset(qs.values_list("codigo", flat=True).distinct())
+
+
+def permisos_de_usuario(usuario) -> frozenset:
+    """
+    Códigos de permiso del usuario a través de sus roles.
+
+    Se calcula con una sola consulta y se guarda en el caché de Django con la
+    versión de permisos en la clave; además se memoriza en la instancia para
+    que varias comprobaciones en la misma petición no vuelvan al caché.
+    """
+    if not usuario or usuario.is_anonymous or not usuario.is_active:
+        return frozenset()
+
+    version = version_permisos()
+    memo = getattr(usuario, "_permisos_cache", None)
+    if memo and memo[0] == version:
+        return memo[1]
+
+    clave = f"cuentas:permisos:{version}:{usuario.pk}:{int(usuario.is_superuser)}"
+    permisos = cache.get(clave)
+    if permisos is None:
+        permisos = _calcular_permisos(usuario)
+        cache.set(clave, permisos, getattr(settings, "PERMISOS_CACHE_TTL", 300))
+
+    usuario._permisos_cache = (version, permisos)
+    return permisos
+
+
+# ==========================
+# Claim en el token JWT
+# ==========================
+
+def agregar_claims_permisos(token, usuario) -> None:
+    """Incrusta en el token los permisos del usuario y la versión con que se calcularon."""
+    token["permisos"] = sorted(permisos_de_usuario(usuario))
+    token["permisos_v"] = version_permisos()
+    token["permisos_su"] = usuario.is_superuser
+
+
+def permisos_de_request(request) -> frozenset:
+    """
+    Permisos del usuario autenticado en la petición.
+
+    Si el token JWT trae el claim `permisos` calculado con la versión vigente
+    (y el usuario no cambió su condición de superusuario) se usa directamente,
+    sin consultas. Si no, se recurre al caché de `permisos_de_usuario`.
+    """
+    user = request.user
+    token = request.auth
+    if token is not None and hasattr(token, "get"):
+        permisos = token.get("permisos")
+        if (
+            permisos is not None
+            and token.get("permisos_v") == version_permisos()
+            and token.get("permisos_su") == user.is_superuser
+        ):
+            return frozenset(permisos)
+    return permisos_de_usuario(user)
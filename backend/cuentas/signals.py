@@ -1,8 +1,12 @@
-from django.db.models.signals import m2m_changed
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from clientes.models import Cliente
 
+from .models import Rol, Permiso
+from .services import invalidar_permisos
+
 def _crear_o_actualizar_perfil_cliente(usuario):
     """Función helper para crear el perfil de cliente si tiene el rol."""
     if usuario.roles.filter(nombre="Cliente").exists():
@@ -20,4 +24,30 @@ def manejar_cambio_de_roles(sender, instance, action, **kwargs):
     """Se dispara cuando los roles de un usuario cambian."""
     if action == "post_add":
         # 'instance' aquí es el objeto Usuario
-        _crear_o_actualizar_perfil_cliente(instance)
\ No newline at end of file
+        _crear_o_actualizar_perfil_cliente(instance)
+
+
+# ==========================
+# Invalidación del caché de permisos
+# ==========================
+
+def _invalidar_permisos_al_confirmar():
+    """Invalida ahora y otra vez al confirmar, para no cachear datos sin commit."""
+    invalidar_permisos()
+    transaction.on_commit(invalidar_permisos)
+
+
+@receiver(m2m_changed, sender=get_user_model().roles.through)
+@receiver(m2m_changed, sender=Rol.permisos.through)
+def permisos_reasignados(sender, action, **kwargs):
+    """Cambiaron los roles de un usuario o los permisos de un rol."""
+    if action in ("post_add", "post_remove", "post_clear"):
+        _invalidar_permisos_al_confirmar()
+
+
+@receiver(post_save, sender=Permiso)
+@receiver(post_delete, sender=Permiso)
+@receiver(post_delete, sender=Rol)
+def permisos_catalogo_cambiado(sender, **kwargs):
+    """Un código de permiso cambió/se borró, o se borró un rol con sus asignaciones."""
+    _invalidar_permisos_al_confirmar()
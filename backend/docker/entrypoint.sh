@@ -69,6 +69,48 @@ python manage.py migrate --noinput
 echo "🧹 Collectstatic (si corresponde)…"
 python manage.py collectstatic --noinput || true
 
-# ---------- Arranque del proceso principal ----------
+# ---------- Arranque ----------
+# El worker de exportaciones (ReportJob) puede correr en su propio contenedor
+# con la misma imagen:  REPORTES_WORKER=0 ... python manage.py procesar_reportes
+# Con REPORTES_WORKER=1 (por defecto, despliegue de un solo contenedor) este
+# script lo supervisa: lo relanza si termina con error y, al recibir SIGTERM,
+# se lo reenvía junto con el proceso principal para que ambos cierren limpio.
+if [ "${REPORTES_WORKER:-1}" != "1" ]; then
+  echo "🔥 Lanzando proceso: $*"
+  exec "$@"
+fi
+
+echo "🗂️ Lanzando worker de reportes supervisado…"
+(
+  hijo=""
+  trap 'if [ -n "$hijo" ]; then kill -TERM "$hijo" 2>/dev/null || true; wait "$hijo"; fi; exit 0' TERM INT
+  while true; do
+    python manage.py procesar_reportes &
+    hijo=$!
+    if wait "$hijo"; then
+      exit 0  # terminó por su cuenta (SIGTERM atendido): no se relanza
+    else
+      codigo=$?
+    fi
+    echo "⚠️ Worker de reportes terminó con código ${codigo}; se relanza en 5 s…"
+    hijo=""
+    sleep 5 & wait $!
+  done
+) &
+WORKER_PID=$!
+
 echo "🔥 Lanzando proceso: $*"
-exec "$@"
+"$@" &
+MAIN_PID=$!
+
+trap 'kill -TERM "$MAIN_PID" "$WORKER_PID" 2>/dev/null || true' TERM INT
+set +e
+# wait vuelve apenas llega una señal: se espera hasta que el proceso termine de verdad
+wait "$MAIN_PID"; codigo=$?
+while kill -0 "$MAIN_PID" 2>/dev/null; do
+  wait "$MAIN_PID"; codigo=$?
+done
+# Si el proceso principal cae, el contenedor termina (y el orquestador lo reinicia)
+kill -TERM "$WORKER_PID" 2>/dev/null || true
+wait "$WORKER_PID"
+exit "$codigo"
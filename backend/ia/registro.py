@@ -0,0 +1,192 @@
+# ia/registro.py
+"""
+Registro de modelos de ia/ compartido por todo el proceso.
+
+- obtener(nombre): el artefacto ya cargado (o None si no existe / no carga).
+  Cada archivo se carga una sola vez por proceso, no en cada predicción.
+- Recarga en caliente: en cada obtener() se mira el os.stat del archivo; si
+  cambió mtime o tamaño se calcula su sha256 y, si el contenido es otro (p. ej.
+  tras `manage.py train_models`, aunque corra en otro proceso), se vuelve a
+  cargar. Si la carga nueva falla se sigue sirviendo la anterior.
+- guardar(nombre, objeto): lo usan los entrenamientos; escribe a un temporal y
+  lo renombra, así ningún proceso lee un archivo a medio escribir.
+- precargar(): carga todo lo que exista. core/wsgi.py lo llama al importar la
+  app: con `gunicorn --preload` ocurre en el master antes del fork y los
+  workers comparten esas páginas (copy-on-write).
+- estadisticas(): tiempo de carga, tamaño, memoria y hash de cada artefacto.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+try:
+    import joblib
+except Exception:
+    joblib = None
+
+logger = logging.getLogger(__name__)
+
+ARTEFACTOS: Dict[str, str] = {
+    "intenciones": os.path.join(settings.BASE_DIR, "ia", "prompt_intent_model.joblib"),
+    "predicciones": os.path.join(settings.BASE_DIR, "ia", "sales_prediction_model.joblib"),
+}
+
+
+def _rss_bytes() -> Optional[int]:
+    """Memoria residente del proceso (Linux); None donde no hay /proc."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _sha256(ruta: str) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+class _Entrada:
+    def __init__(self, nombre: str, ruta: str):
+        self.nombre = nombre
+        self.ruta = ruta
+        self.objeto = None
+        self.firma = None          # (mtime_ns, tamaño) del último archivo visto
+        self.sha256 = None         # hash del archivo cargado
+        self.cargado_en = None
+        self.segundos_carga = None
+        self.bytes_archivo = None
+        self.bytes_memoria = None  # crecimiento del RSS durante la carga (aprox.)
+        self.cargas = 0
+        self.errores = 0
+        self.ultimo_error = None
+        self._lock = threading.Lock()
+
+    def obtener(self):
+        try:
+            st = os.stat(self.ruta)
+        except OSError:
+            return self.objeto  # borrado: se sigue usando lo que haya en memoria
+        firma = (st.st_mtime_ns, st.st_size)
+        if firma != self.firma:
+            with self._lock:
+                if firma != self.firma:
+                    self._revisar(firma)
+        return self.objeto
+
+    def _revisar(self, firma):
+        if not joblib:
+            self.firma = firma
+            return
+        try:
+            sha = _sha256(self.ruta)
+            if sha != self.sha256:
+                self._cargar(sha, firma[1])
+        except Exception as e:
+            self.errores += 1
+            self.ultimo_error = str(e)
+            logger.exception("No se pudo cargar el modelo %s (%s)", self.nombre, self.ruta)
+        # también tras un error: no se reintenta hasta que el archivo cambie
+        self.firma = firma
+
+    def _cargar(self, sha: str, tamano: int):
+        rss_antes = _rss_bytes()
+        t0 = time.perf_counter()
+        objeto = joblib.load(self.ruta)
+        self.segundos_carga = time.perf_counter() - t0
+        rss_despues = _rss_bytes()
+        self.bytes_memoria = (
+            max(rss_despues - rss_antes, 0) if rss_antes is not None and rss_despues is not None else None
+        )
+        self.objeto = objeto
+        self.sha256 = sha
+        self.bytes_archivo = tamano
+        self.cargado_en = timezone.now()
+        self.cargas += 1
+        logger.info(
+            "Modelo %s cargado en %.3f s (%s bytes en disco, pid %s)",
+            self.nombre, self.segundos_carga, tamano, os.getpid(),
+        )
+
+    def estadisticas(self) -> Dict[str, Any]:
+        return {
+            "ruta": self.ruta,
+            "cargado": self.objeto is not None,
+            "sha256": self.sha256,
+            "cargado_en": self.cargado_en.isoformat() if self.cargado_en else None,
+            "segundos_carga": self.segundos_carga,
+            "bytes_archivo": self.bytes_archivo,
+            "bytes_memoria": self.bytes_memoria,
+            "cargas": self.cargas,
+            "errores": self.errores,
+            "ultimo_error": self.ultimo_error,
+        }
+
+
+_ENTRADAS = {nombre: _Entrada(nombre, ruta) for nombre, ruta in ARTEFACTOS.items()}
+
+
+def _entrada(nombre: str) -> _Entrada:
+    try:
+        return _ENTRADAS[nombre]
+    except KeyError:
+        raise ValueError(f"Modelo desconocido: {nombre!r} (hay {', '.join(ARTEFACTOS)})")
+
+
+def ruta(nombre: str) -> str:
+    return _entrada(nombre).ruta
+
+
+def obtener(nombre: str):
+    """Artefacto cargado (recargado si el archivo cambió), o None si no hay."""
+    return _entrada(nombre).obtener()
+
+
+def version(nombre: str) -> Optional[str]:
+    """sha256 del artefacto en uso (None si no hay); cambia al recargarse."""
+    entrada = _entrada(nombre)
+    entrada.obtener()
+    return entrada.sha256
+
+
+def guardar(nombre: str, objeto) -> str:
+    """Serializa `objeto` con joblib de forma atómica y lo deja cargado en este proceso."""
+    destino = ruta(nombre)
+    carpeta = os.path.dirname(destino)
+    os.makedirs(carpeta, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=carpeta, suffix=".joblib.tmp")
+    os.close(fd)
+    try:
+        joblib.dump(objeto, tmp)
+        os.chmod(tmp, 0o644)  # mkstemp lo crea 0600
+        os.replace(tmp, destino)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    obtener(nombre)
+    return destino
+
+
+def precargar() -> None:
+    """Carga todos los artefactos que existan (arranque del servidor)."""
+    for entrada in _ENTRADAS.values():
+        entrada.obtener()
+
+
+def estadisticas() -> Dict[str, Any]:
+    return {
+        "pid": os.getpid(),
+        "rss_bytes": _rss_bytes(),
+        "modelos": {nombre: e.estadisticas() for nombre, e in _ENTRADAS.items()},
+    }
@@ -1,17 +1,17 @@
 # ia/train_intents.py
 from __future__ import annotations
-import os, joblib, numpy as np
+import numpy as np
 from dataclasses import dataclass
 from typing import List, Tuple
-from django.conf import settings
 from sklearn.pipeline import Pipeline
 from sklearn.linear_model import LogisticRegression
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.model_selection import train_test_split, StratifiedKFold, cross_val_score
 from sklearn.metrics import classification_report
+from . import registro
 from .dataset import get_full_dataset
 
-MODEL_PATH = os.path.join(settings.BASE_DIR, "ia", "prompt_intent_model.joblib")
+MODEL_PATH = registro.ruta("intenciones")
 
 SPANISH_STOPWORDS = [
     "a","acá","ahí","al","algo","algún","alguna","algunas","alguno","algunos","allá","alli","allí",
@@ -69,8 +69,7 @@ def train_model() -> TrainResult:
     y_pred = pipe.predict(X_test)
     report = classification_report(y_test, y_pred, digits=2, zero_division=0)
 
-    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-    joblib.dump(pipe, MODEL_PATH)
+    registro.guardar("intenciones", pipe)
     print("=== Cross-Validation Accuracy (k-fold) ===")
     print(f"CV Accuracy: {cv_acc:.3f}")
     print("=== Test Report ===")
@@ -80,12 +79,8 @@ def train_model() -> TrainResult:
     return TrainResult(model_path=MODEL_PATH, classes=list(pipe.classes_), report=report, cv_accuracy=cv_acc)
 
 def load_model():
-    if not os.path.exists(MODEL_PATH):
-        return None
-    try:
-        return joblib.load(MODEL_PATH)
-    except Exception:
-        return None
+    """Modelo en memoria del proceso (ver ia/registro.py); None si no hay."""
+    return registro.obtener("intenciones")
 
 def predict_intent(text: str) -> Tuple[str, float]:
     model = load_model()
@@ -1,35 +1,36 @@
 # ia/train_predictions.py
-import os
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error
-import joblib
 from datetime import timedelta
 
-from django.conf import settings
 from django.db import models
+from django.db.models.functions import TruncDate
 from ventas.models import Venta
 
+from . import registro
+
 
 def get_sales_data():
     """
     Obtiene los datos de ventas diarias de la base de datos y los prepara para el modelo.
     """
-    # Obtenemos ventas pagadas, agrupadas por día
+    # Ventas pagadas por día local: el objetivo es Venta.total (con descuento
+    # e impuestos), no los subtotales de ítems de VentaDiaria
     sales = (
         Venta.objects.filter(estado="pagada")
-        .values("creado_en__date")
-        .annotate(total_ventas=models.Sum("total"))
-        .order_by("creado_en__date")
+        .annotate(fecha=TruncDate("creado_en"))
+        .values("fecha")
+        .annotate(ventas=models.Sum("total"))
+        .order_by("fecha")
     )
 
     if not sales:
         return pd.DataFrame()
 
     df = pd.DataFrame(list(sales))
-    df = df.rename(columns={"creado_en__date": "fecha", "total_ventas": "ventas"})
     df["fecha"] = pd.to_datetime(df["fecha"])
     df = df.set_index("fecha")
 
@@ -84,9 +85,8 @@ def train_model():
     rmse = np.sqrt(mean_squared_error(y_test, preds))
     print(f"Entrenamiento completado. RMSE en set de prueba: {rmse:.2f}")
 
-    # Guardamos el modelo serializado
-    model_path = os.path.join(settings.BASE_DIR, "ia", "sales_prediction_model.joblib")
-    joblib.dump(model, model_path)
+    # Guardamos el modelo serializado (los procesos que lo usan lo recargan solos)
+    model_path = registro.guardar("predicciones", model)
     print(f"Modelo guardado en: {model_path}")
 
     return model_path
@@ -94,13 +94,13 @@ def train_model():
 
 def generate_predictions(days_to_predict=30):
     """
-    Carga el modelo guardado y genera predicciones para los próximos N días.
+    Usa el modelo guardado (ya en memoria, ver ia/registro.py) y genera
+    predicciones para los próximos N días.
     """
-    model_path = os.path.join(settings.BASE_DIR, "ia", "sales_prediction_model.joblib")
-    if not os.path.exists(model_path):
+    model = registro.obtener("predicciones")
+    if model is None:
         return []
 
-    model = joblib.load(model_path)
     future_dates = pd.date_range(start=pd.Timestamp.now().date(), periods=days_to_predict + 1)
     future_df = pd.DataFrame(index=future_dates)
     future_df = create_features(future_df)
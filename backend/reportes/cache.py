@@ -0,0 +1,190 @@
+# reportes/cache.py
+"""
+Caché de dos niveles para run_prompt.
+
+1) Prompt normalizado → spec interpretada. La clave incluye la fecha local:
+   "este mes" u "hoy" se resuelven a fechas absolutas al parsear, así que la
+   misma frase da otra spec al día siguiente.
+2) Spec canónica (fechas ya absolutas, sin `format`) → (headers, rows,
+   warnings). Pantalla, Excel y PDF del mismo reporte comparten la entrada.
+   La clave lleva la versión de datos: cuando una Venta cambia de estado o un
+   Producto cambia stock/precio se incrementa (reportes/signals.py) y todas
+   las entradas anteriores quedan huérfanas hasta que vence su TTL.
+   Las ofertas que empiezan o terminan por la hora (sin que nadie las guarde)
+   no disparan señales: por eso el TTL de cada entrada se recorta hasta el
+   próximo inicio / fin de una oferta activa (ttl_resultado).
+
+Aparte, el dashboard (igual para todos los usuarios) se guarda en una sola
+entrada con refresco anticipado: ver dashboard_cacheado.
+"""
+import hashlib
+import json
+import logging
+import math
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from catalogo.models import Oferta
+
+logger = logging.getLogger(__name__)
+
+_VERSION_KEY = "reportes:datos:version"
+_ESPACIOS = re.compile(r"\s+")
+
+
+# ==========================
+# Versión de datos
+# ==========================
+
+def version_datos() -> int:
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        # Igual que en cuentas.services: partir del reloj garantiza que una
+        # versión recreada sea mayor que cualquiera usada antes.
+        cache.add(_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(_VERSION_KEY)
+    return version
+
+
+def invalidar_datos() -> None:
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:  # la clave no existía o expiró
+        version_datos()
+
+
+# ==========================
+# Nivel 1: prompt → spec
+# ==========================
+
+def normalizar_prompt(prompt: str) -> str:
+    """Minúsculas y espacios colapsados (el parser trabaja sobre este texto)."""
+    return _ESPACIOS.sub(" ", (prompt or "").lower()).strip()
+
+
+def _hash(texto: str) -> str:
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def _clave_spec(prompt_normalizado: str) -> str:
+    return f"reportes:spec:{timezone.localdate():%Y%m%d}:{_hash(prompt_normalizado)}"
+
+
+def spec_cacheada(prompt_normalizado: str) -> Optional[Dict[str, Any]]:
+    return cache.get(_clave_spec(prompt_normalizado))
+
+
+def guardar_spec(prompt_normalizado: str, spec: Dict[str, Any]) -> None:
+    cache.set(_clave_spec(prompt_normalizado), spec, settings.REPORTES_CACHE_TTL_SPEC)
+
+
+# ==========================
+# Nivel 2: spec → resultado
+# ==========================
+
+def spec_canonica(spec: Dict[str, Any]) -> str:
+    """JSON estable de lo que determina el resultado (el formato de salida no)."""
+    datos = {
+        k: v for k, v in spec.items()
+        if k not in ("format", "compresion") and v is not None
+    }
+    return json.dumps(datos, sort_keys=True, default=str, ensure_ascii=False)
+
+
+def clave_resultado(spec: Dict[str, Any]) -> str:
+    """
+    Se calcula ANTES de consultar: si los datos cambian mientras se ejecuta el
+    reporte, el resultado queda guardado bajo la versión vieja y no se sirve.
+    """
+    return f"reportes:resultado:{version_datos()}:{_hash(spec_canonica(spec))}"
+
+
+def resultado_cacheado(clave: str):
+    return cache.get(clave)
+
+
+def ttl_resultado() -> int:
+    """
+    REPORTES_CACHE_TTL, recortado a los segundos que faltan para que una
+    oferta activa empiece o termine: ahí cambia el precio final sin que se
+    guarde nada, y un resultado cacheado seguiría mostrando el precio anterior.
+    """
+    ahora = timezone.now()
+    limites = Oferta.objects.filter(activa=True).aggregate(
+        inicio=Min("fecha_inicio", filter=Q(fecha_inicio__gt=ahora)),
+        fin=Min("fecha_fin", filter=Q(fecha_fin__gt=ahora)),
+    )
+    ttl = settings.REPORTES_CACHE_TTL
+    for limite in limites.values():
+        if limite is not None:
+            ttl = min(ttl, math.ceil((limite - ahora).total_seconds()))
+    return ttl
+
+
+def guardar_resultado(clave: str, headers, rows, warnings) -> None:
+    # Resultados muy grandes no compensan: serializarlos cuesta casi lo mismo
+    # que recalcularlos y desplazarían entradas más útiles.
+    if len(rows) > settings.REPORTES_CACHE_MAX_FILAS:
+        return
+    cache.set(clave, (list(headers), list(rows), list(warnings)), ttl_resultado())
+
+
+# ==========================
+# Dashboard: entrada compartida con refresco anticipado
+# ==========================
+
+_DASHBOARD_KEY = "reportes:dashboard"
+_DASHBOARD_LOCK = "reportes:dashboard:recalculando"
+
+
+def _recalcular_dashboard(calcular: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    data = calcular()
+    # La entrada dura bastante más que el TTL: mientras exista siempre hay algo
+    # que servir; pasado el TTL solo se marca como "a refrescar".
+    cache.set(
+        _DASHBOARD_KEY,
+        {"data": data, "generado": time.time()},
+        settings.REPORTES_DASHBOARD_TTL * 10,
+    )
+    return data
+
+
+def _refrescar_en_segundo_plano(calcular: Callable[[], Dict[str, Any]]) -> None:
+    try:
+        _recalcular_dashboard(calcular)
+    except Exception:
+        logger.exception("No se pudo refrescar el dashboard")
+    finally:
+        cache.delete(_DASHBOARD_LOCK)
+        connection.close()  # el hilo abrió su propia conexión
+
+
+def dashboard_cacheado(calcular: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    - Entrada con menos de REPORTES_DASHBOARD_TTL segundos: se sirve tal cual.
+    - Más vieja: se sirve igual y un único hilo (candado con cache.add, válido
+      entre workers si el caché es compartido) la recalcula para los siguientes.
+    - Sin entrada (arranque o caché vaciado): se calcula en la petición.
+    Así la latencia no depende de cuántos usuarios abren el dashboard: a lo sumo
+    hay un recálculo en curso por TTL.
+    """
+    entrada = cache.get(_DASHBOARD_KEY)
+    if entrada is None:
+        return _recalcular_dashboard(calcular)
+
+    edad = time.time() - entrada["generado"]
+    if edad >= settings.REPORTES_DASHBOARD_TTL and cache.add(
+        _DASHBOARD_LOCK, 1, settings.REPORTES_DASHBOARD_TTL
+    ):
+        threading.Thread(
+            target=_refrescar_en_segundo_plano, args=(calcular,), daemon=True
+        ).start()
+    return entrada["data"]
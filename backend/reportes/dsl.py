@@ -23,7 +23,7 @@ class Spec:
     order_by: Optional[str] = None  # clave de métrica o dimensión
     order_dir: OrderDir = "desc"
     limit: Optional[int] = None
-    format: Literal["pantalla","pdf","excel"] = "pantalla"
+    format: Literal["pantalla","pdf","excel","csv","parquet","arrow"] = "pantalla"
 
     def ensure_defaults(self):
         if not self.metrics: self.metrics = ["monto_total"]
@@ -1,7 +1,7 @@
 # reportes/intent_parser.py
 import re
 import unicodedata
-from typing import Tuple, List
+from typing import Dict, List, Optional, Sequence, Tuple
 from rapidfuzz import process, fuzz
 import dateparser
 
@@ -11,11 +11,15 @@ from .catalog import SYNONYMS_DIM, SYNONYMS_MET, DIMENSIONS, METRICS
 def _strip_accents(s: str) -> str:
     return "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
 
+_RE_NO_PERMITIDOS = re.compile(r"[^a-z0-9/_\-\s]")
+_RE_ESPACIOS = re.compile(r"\s+")
+_RE_TOKEN = re.compile(r"[a-z0-9/_\-]{3,}")
+
 def _clean(t: str) -> str:
     t = (t or "").lower().strip()
     t = _strip_accents(t)
-    t = re.sub(r"[^a-z0-9/_\-\s]", " ", t)
-    return re.sub(r"\s+", " ", t).strip()
+    t = _RE_NO_PERMITIDOS.sub(" ", t)
+    return _RE_ESPACIOS.sub(" ", t).strip()
 
 PLURAL_DIM_MAP = {
     "clientes": "cliente",
@@ -35,25 +39,52 @@ def _singular_dim(tok: str) -> str:
         return t[:-1]
     return t
 
-def _best_key(token: str, mapping: dict, cutoff=80):
-    token = _clean(token)
-    if not token:
-        return None
-    pairs = []
-    for k, arr in mapping.items():
-        for s in [k] + list(arr or []):
-            pairs.append((k, _clean(s)))
-    choices = [p[1] for p in pairs if p[1]]
-    if not choices:
-        return None
-    m = process.extractOne(token, choices, scorer=fuzz.WRatio, score_cutoff=cutoff)
-    if not m:
-        return None
-    matched = m[0]
-    for k, s in pairs:
-        if s == matched:
-            return k
-    return None
+class _Vocabulario:
+    """
+    Sinónimos de un catálogo ya limpios, armados una sola vez:
+    - exactos: sinónimo → clave (un token idéntico a un sinónimo no necesita fuzzy)
+    - opciones / claves: arrays paralelos para rapidfuzz.process.cdist
+    Si el mismo sinónimo aparece en dos claves gana la primera (como antes).
+    """
+
+    def __init__(self, mapping: Dict[str, List[str]]):
+        self.exactos: Dict[str, str] = {}
+        for k, arr in mapping.items():
+            for s in [k] + list(arr or []):
+                s = _clean(s)
+                if s:
+                    self.exactos.setdefault(s, k)
+        self.opciones = list(self.exactos)
+        self.claves = [self.exactos[s] for s in self.opciones]
+
+_VOC_DIM = _Vocabulario(SYNONYMS_DIM)
+_VOC_MET = _Vocabulario(SYNONYMS_MET)
+_VOC_ORDEN = _Vocabulario({**SYNONYMS_MET, **SYNONYMS_DIM})
+
+def _best_keys(tokens: Sequence[str], voc: _Vocabulario, cutoff=80) -> List[Optional[str]]:
+    """
+    Clave más parecida para cada token (None si ninguna llega a `cutoff`).
+    Los exactos salen del dict; el resto se puntúa contra todos los sinónimos
+    en una sola llamada a cdist (WRatio, igual que extractOne: ante empate,
+    el primer sinónimo).
+    """
+    tokens = [_clean(t) for t in tokens]
+    out: List[Optional[str]] = [voc.exactos.get(t) for t in tokens]
+    pendientes = [i for i, t in enumerate(tokens) if t and out[i] is None]
+    if pendientes and voc.opciones:
+        scores = process.cdist(
+            [tokens[i] for i in pendientes], voc.opciones,
+            scorer=fuzz.WRatio, score_cutoff=cutoff,
+        )
+        mejores = scores.argmax(axis=1)
+        for fila, i in enumerate(pendientes):
+            j = mejores[fila]
+            if scores[fila, j] >= cutoff:
+                out[i] = voc.claves[j]
+    return out
+
+def _best_key(token: str, voc: _Vocabulario, cutoff=80) -> Optional[str]:
+    return _best_keys([token], voc, cutoff)[0]
 
 def _relative_range(text: str):
     p = _clean(text)
@@ -103,6 +134,12 @@ def parse_prompt_to_spec(prompt: str) -> Tuple[Spec, list]:
         spec.format = "pdf"
     elif "excel" in p or "xlsx" in p:
         spec.format = "excel"
+    elif re.search(r"\bcsv\b", p):
+        spec.format = "csv"
+    elif "parquet" in p:
+        spec.format = "parquet"
+    elif re.search(r"\b(arrow|feather)\b", p):
+        spec.format = "arrow"
 
     # intención (ventas por defecto)
     if re.search(r"\b(stock|inventario)\b", p):
@@ -118,8 +155,7 @@ def parse_prompt_to_spec(prompt: str) -> Tuple[Spec, list]:
 
     # métricas detectadas (si no hay, fijaremos una por defecto abajo)
     mets = []
-    for tk in re.findall(r"[a-z0-9/_\-]{3,}", p):
-        k = _best_key(tk, SYNONYMS_MET)
+    for k in _best_keys(_RE_TOKEN.findall(p), _VOC_MET):
         if k and k in METRICS and k not in mets:
             mets.append(k)
     if mets:
@@ -133,9 +169,7 @@ def parse_prompt_to_spec(prompt: str) -> Tuple[Spec, list]:
         parts = [t.strip() for t in re.split(r"[,\s]y\s|,", raw)]
         if len(parts) == 1:
             parts = [t for t in re.split(r"[,\s]+", raw) if t]
-        for t in parts:
-            t = _singular_dim(t)
-            k = _best_key(t, SYNONYMS_DIM)
+        for k in _best_keys([_singular_dim(t) for t in parts], _VOC_DIM):
             if k and k in DIMENSIONS and k not in dims:
                 dims.append(k)
     if dims:
@@ -187,7 +221,7 @@ def parse_prompt_to_spec(prompt: str) -> Tuple[Spec, list]:
     mord = re.search(r"orden(?:ar)?\s+por\s+([a-z0-9 _/\-]+)(?:\s+(asc|desc))?", p)
     if mord:
         target = mord.group(1).strip()
-        k = _best_key(target, {**SYNONYMS_MET, **SYNONYMS_DIM})
+        k = _best_key(target, _VOC_ORDEN)
         if k:
             spec.order_by = k
             if mord.group(2) in ("asc", "desc"):
@@ -0,0 +1,150 @@
+# reportes/jobs.py
+"""
+Cola de exportaciones en la base de datos (sin broker externo).
+
+- encolar(): la vista crea el ReportJob "pendiente" y responde 202 con su id.
+- tomar_siguiente(): el worker reclama el job más antiguo con
+  SELECT ... FOR UPDATE SKIP LOCKED; varios workers pueden correr a la vez sin
+  tomar el mismo job ni bloquearse entre sí.
+- procesar(): ejecuta el spec, genera el archivo y lo guarda en el storage de
+  media (local o S3, según DEFAULT_FILE_STORAGE). Las filas de catálogo
+  llegan de un cursor de servidor y el Excel se escribe por trozos a un
+  archivo temporal: ni las filas ni el archivo completo quedan en memoria.
+  Los jobs de tipo "auditoria" generan el PDF de la bitácora
+  (auditoria/exportaciones.py).
+
+El comando `procesar_reportes` es el loop del worker.
+"""
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from auditoria.exportaciones import generar_pdf, queryset_filtrado
+
+from .models import ReportJob
+from .runner import completar_con_query_builder, ejecutar_en_stream
+from .services import exportar_en_stream
+
+logger = logging.getLogger(__name__)
+
+
+def encolar(usuario, prompt: str, formato: str, spec: dict, meta: dict,
+            filas_estimadas: int = 0, tipo: str = ReportJob.REPORTE) -> ReportJob:
+    return ReportJob.objects.create(
+        usuario=usuario if getattr(usuario, "is_authenticated", False) else None,
+        tipo=tipo,
+        prompt=prompt or "",
+        formato=formato,
+        spec=spec,
+        meta=meta,
+        filas_estimadas=filas_estimadas,
+    )
+
+
+def tomar_siguiente():
+    """Reclama el job pendiente más antiguo (o None si la cola está vacía)."""
+    with transaction.atomic():
+        job = (
+            ReportJob.objects.select_for_update(skip_locked=True)
+            .filter(estado=ReportJob.PENDIENTE)
+            .order_by("creado_en", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.estado = ReportJob.PROCESANDO
+        job.progreso = 5
+        job.intentos += 1
+        job.iniciado_en = timezone.now()
+        job.save(update_fields=["estado", "progreso", "intentos", "iniciado_en"])
+    return job
+
+
+def _avance(job: ReportJob, progreso: int) -> None:
+    job.progreso = progreso
+    job.save(update_fields=["progreso"])
+
+
+def _contadas(rows, contador: list):
+    for fila in rows:
+        contador[0] += 1
+        yield fila
+
+
+def _avance_por_filas(job: ReportJob, total: int, cada: int = 2000):
+    """Progreso 5..90 según filas escritas, actualizado cada `cada` filas."""
+    ultimo = 0
+
+    def actualizar(filas):
+        nonlocal ultimo
+        if filas - ultimo >= cada and total:
+            ultimo = filas
+            _avance(job, 5 + min(85, 85 * filas // total))
+
+    return actualizar
+
+
+def _procesar_reporte(job: ReportJob, tmp) -> str:
+    headers, rows, _warnings = ejecutar_en_stream(job.spec)
+    headers, rows = completar_con_query_builder(job.meta, headers, rows)
+    _avance(job, 50)
+
+    contador = [0]
+    contenido, _content_type, nombre = exportar_en_stream(
+        job.formato, headers, _contadas(rows, contador), job.meta
+    )
+    for trozo in contenido:
+        tmp.write(trozo)
+    job.filas = contador[0]
+    return nombre
+
+
+def _procesar_auditoria(job: ReportJob, tmp) -> str:
+    job.filas_estimadas = queryset_filtrado(job.meta.get("filtros") or {}).order_by().count()
+    job.save(update_fields=["filas_estimadas"])
+    job.filas = generar_pdf(job, tmp, progreso=_avance_por_filas(job, job.filas_estimadas))
+    return "auditoria.pdf"
+
+
+def procesar(job: ReportJob) -> ReportJob:
+    generar = _procesar_auditoria if job.tipo == ReportJob.AUDITORIA else _procesar_reporte
+    try:
+        with tempfile.TemporaryFile() as tmp:
+            nombre = generar(job, tmp)
+            _avance(job, 90)
+            tmp.seek(0)
+            job.archivo.save(nombre, File(tmp), save=False)
+        job.estado = ReportJob.LISTO
+        job.progreso = 100
+        job.error = ""
+    except Exception as exc:
+        logger.exception("Falló el ReportJob %s", job.pk)
+        job.estado = ReportJob.ERROR
+        job.error = str(exc)
+    job.terminado_en = timezone.now()
+    job.save(update_fields=["archivo", "filas", "estado", "progreso", "error", "terminado_en"])
+    return job
+
+
+def reencolar_colgados(minutos=None) -> int:
+    """
+    Jobs que quedaron "procesando" más de `minutos` (el worker murió a mitad):
+    vuelven a la cola, o pasan a error si ya agotaron REPORTES_JOB_MAX_INTENTOS.
+    """
+    minutos = minutos or settings.REPORTES_JOB_TIMEOUT_MIN
+    limite = timezone.now() - timedelta(minutes=minutos)
+    colgados = ReportJob.objects.filter(
+        estado=ReportJob.PROCESANDO, iniciado_en__lt=limite
+    )
+    agotados = colgados.filter(intentos__gte=settings.REPORTES_JOB_MAX_INTENTOS).update(
+        estado=ReportJob.ERROR,
+        error="El worker no terminó el reporte a tiempo.",
+        terminado_en=timezone.now(),
+    )
+    reencolados = colgados.update(estado=ReportJob.PENDIENTE, progreso=0)
+    return agotados + reencolados
@@ -0,0 +1,64 @@
+# reportes/management/commands/bench_parse_prompt.py
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ia.dataset import get_full_dataset
+from reportes.cache import normalizar_prompt
+from reportes.models import PromptLog
+from reportes.parser import _intencion_modelo, _intencion_por_reglas, _parsear, parse_prompt
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide parses por segundo de reportes.parser.parse_prompt sobre los prompts "
+        "de ia/dataset.py y de PromptLog: con el modelo IA en cada prompt (como "
+        "antes), con reglas primero sin caché y con el caché LRU."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticiones", type=int, default=20, help="Pasadas sobre el lote de prompts")
+        parser.add_argument("--logs", type=int, default=5000, help="Máximo de prompts tomados de PromptLog")
+
+    def handle(self, *args, **opts):
+        prompts = [t for t, _ in get_full_dataset()]
+        prompts += list(
+            PromptLog.objects.order_by("-created_at").values_list("prompt_text", flat=True)[: opts["logs"]]
+        )
+        prompts = [normalizar_prompt(t) for t in prompts if t]
+        if not prompts:
+            raise CommandError("No hay prompts en el dataset ni en PromptLog.")
+
+        hoy = datetime.now().date()  # el mismo "hoy" que usa parse_prompt
+        sin_cache = _parsear.__wrapped__
+
+        decididos = {p for p in prompts if _intencion_por_reglas(p, {})}
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{len(prompts)} prompts ({len(set(prompts))} distintos), "
+            f"{sum(p in decididos for p in prompts)} resueltos por reglas sin consultar el modelo"
+        ))
+
+        def modelo_siempre(p):
+            # los no decididos ya pasan por el modelo dentro de _parsear
+            if p in decididos:
+                _intencion_modelo(p)
+            return sin_cache(p, hoy)
+
+        variantes = [
+            ("modelo en cada prompt (antes)", modelo_siempre),
+            ("reglas primero, sin caché", lambda p: sin_cache(p, hoy)),
+            ("reglas primero + LRU", parse_prompt),
+        ]
+        _intencion_modelo("")  # carga el modelo fuera de la medición
+        for nombre, parsear in variantes:
+            _parsear.cache_clear()
+            t0 = time.perf_counter()
+            for _ in range(opts["repeticiones"]):
+                for p in prompts:
+                    parsear(p)
+            segundos = time.perf_counter() - t0
+            total = len(prompts) * opts["repeticiones"]
+            self.stdout.write(self.style.SUCCESS(
+                f"▶ {nombre}: {total / segundos:,.0f} parses/s ({segundos * 1000 / total:.3f} ms por prompt)"
+            ))
@@ -0,0 +1,59 @@
+# reportes/management/commands/bench_rango_fechas.py
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.fechas import a_fecha, q_rango
+from ventas.models import Venta
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el filtro de fechas con cast (creado_en__date__gte/lte) contra el "
+        "rango semiabierto de core.fechas sobre Venta(estado, creado_en): muestra el "
+        "plan de PostgreSQL y la mediana de tiempo de cada uno."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", default=None, help="Fecha local inicial (por defecto, hace 7 días)")
+        parser.add_argument("--hasta", default=None, help="Fecha local final, inclusive (por defecto, hoy)")
+        parser.add_argument("--repeticiones", type=int, default=20, help="Corridas por variante")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "postgresql":
+            raise CommandError("El benchmark compara planes de PostgreSQL.")
+        try:
+            hasta = a_fecha(opts["hasta"]) or timezone.localdate()
+            desde = a_fecha(opts["desde"]) or hasta - timedelta(days=6)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        pagadas = Venta.objects.filter(estado="pagada").order_by()
+        variantes = [
+            ("creado_en__date (cast)",
+             pagadas.filter(creado_en__date__gte=desde, creado_en__date__lte=hasta)),
+            ("q_rango (sargable)",
+             pagadas.filter(q_rango("creado_en", desde, hasta))),
+        ]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Ventas pagadas del {desde} al {hasta} ({Venta.objects.count()} ventas en la tabla)"
+        ))
+        for nombre, qs in variantes:
+            tiempos = []
+            for _ in range(opts["repeticiones"]):
+                t0 = time.perf_counter()
+                resultado = qs.aggregate(total=Sum("total"))
+                tiempos.append((time.perf_counter() - t0) * 1000)
+
+            plan = qs.explain(analyze=True)
+            self.stdout.write(self.style.SUCCESS(
+                f"\n▶ {nombre}: total={resultado['total']} mediana={statistics.median(tiempos):.2f} ms"
+            ))
+            for linea in plan.splitlines():
+                self.stdout.write(f"    {linea}")
@@ -0,0 +1,80 @@
+# reportes/management/commands/procesar_reportes.py
+import logging
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from reportes.jobs import procesar, reencolar_colgados, tomar_siguiente
+
+logger = logging.getLogger(__name__)
+
+# Espera antes de reintentar cuando la base no responde (reinicio, failover)
+ESPERA_BASE_CAIDA = 5
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de exportaciones: toma ReportJobs pendientes de la base "
+        "(FOR UPDATE SKIP LOCKED) y genera sus archivos. Se pueden correr "
+        "varios en paralelo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--una-vez", action="store_true",
+            help="Procesa los jobs pendientes y termina (útil desde cron)",
+        )
+        parser.add_argument(
+            "--intervalo", type=float, default=settings.REPORTES_WORKER_INTERVALO,
+            help="Segundos de espera cuando la cola está vacía",
+        )
+
+    def handle(self, *args, **opts):
+        self._seguir = True
+        signal.signal(signal.SIGTERM, self._detener)
+        signal.signal(signal.SIGINT, self._detener)
+
+        self._barrer()
+        ultimo_barrido = time.monotonic()
+        while self._seguir:
+            try:
+                close_old_connections()
+                job = tomar_siguiente()
+                if job is not None:
+                    job = procesar(job)
+                    estilo = self.style.SUCCESS if job.estado == job.LISTO else self.style.ERROR
+                    self.stdout.write(estilo(f"{job} filas={job.filas} {job.error}".rstrip()))
+                    continue
+
+                if opts["una_vez"]:
+                    break
+                if time.monotonic() - ultimo_barrido > 60:
+                    self._barrer()
+                    ultimo_barrido = time.monotonic()
+            except DatabaseError:
+                # Un job a medio guardar queda "procesando" y lo recupera
+                # reencolar_colgados cuando vence REPORTES_JOB_TIMEOUT_MIN
+                if opts["una_vez"]:
+                    raise  # desde cron: que falle y lo reintente la próxima corrida
+                logger.exception("Worker de reportes: base no disponible, reintento en %s s", ESPERA_BASE_CAIDA)
+                close_old_connections()
+                time.sleep(ESPERA_BASE_CAIDA)
+                continue
+            time.sleep(opts["intervalo"])
+
+    def _barrer(self):
+        try:
+            reencolados = reencolar_colgados()
+        except DatabaseError:
+            logger.exception("Worker de reportes: no se pudieron revisar los jobs colgados")
+            close_old_connections()
+            return
+        if reencolados:
+            self.stdout.write(f"↺ {reencolados} job(s) colgados reencolados o marcados con error.")
+
+    def _detener(self, signum, frame):
+        # Termina el job en curso y sale
+        self._seguir = False
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-17 11:49
+
+from django.db import migrations, models
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportes', '0002_report_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportjob',
+            name='formato',
+            field=models.CharField(choices=[('excel', 'Excel'), ('pdf', 'PDF'), ('csv', 'CSV'), ('parquet', 'Parquet'), ('arrow', 'Arrow IPC')], max_length=10),
+        ),
+    ]
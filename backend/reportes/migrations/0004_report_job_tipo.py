@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-17 12:04
+
+from django.db import migrations, models
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportes', '0003_report_job_formatos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportjob',
+            name='tipo',
+            field=models.CharField(choices=[('reporte', 'Reporte'), ('auditoria', 'Bitácora de auditoría')], default='reporte', max_length=12),
+        ),
+    ]
@@ -1,6 +1,9 @@
 # reportes/models.py
+import uuid
+
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class PromptLog(models.Model):
@@ -37,3 +40,89 @@ class PromptLog(models.Model):
 
     def __str__(self):
         return f"[{self.created_at:%Y-%m-%d %H:%M}] {self.prompt_text[:60]}"
+
+
+def _ruta_artefacto(instance, filename):
+    # Nombre no adivinable: el archivo se descarga solo por el endpoint del job
+    extension = filename.split(".", 1)[-1]  # conserva "csv.gz"
+    return f"reportes/jobs/{timezone.now():%Y/%m}/{uuid.uuid4().hex}.{extension}"
+
+
+class ReportJob(models.Model):
+    """
+    Exportación de reporte (Excel / PDF / CSV / Parquet / Arrow) generada
+    fuera de la petición.
+
+    La vista la crea en estado "pendiente" cuando el reporte estimado es grande;
+    el comando `procesar_reportes` la toma con SELECT ... FOR UPDATE SKIP LOCKED,
+    la ejecuta y deja el archivo en el storage de media (`archivo`).
+
+    - tipo: "reporte" (spec de reportes) o "auditoria" (PDF de la bitácora;
+      los filtros de la petición van en meta["filtros"], ver
+      auditoria/exportaciones.py). Cada tipo exige su permiso para consultar
+      o descargar el job (PERMISOS).
+    - spec: spec tal como la devolvió el parser (la que se ejecuta).
+    - meta: spec ajustada por la vista (fechas, cliente, formato) para el
+      encabezado del PDF y el fallback con query_builder.
+    """
+    REPORTE = "reporte"
+    AUDITORIA = "auditoria"
+    TIPOS = [
+        (REPORTE, "Reporte"),
+        (AUDITORIA, "Bitácora de auditoría"),
+    ]
+    PERMISOS = {
+        REPORTE: "reportes.exportar",
+        AUDITORIA: "auditoria.ver",
+    }
+
+    PENDIENTE = "pendiente"
+    PROCESANDO = "procesando"
+    LISTO = "listo"
+    ERROR = "error"
+    ESTADOS = [
+        (PENDIENTE, "Pendiente"),
+        (PROCESANDO, "Procesando"),
+        (LISTO, "Listo"),
+        (ERROR, "Error"),
+    ]
+    FORMATOS = [
+        ("excel", "Excel"),
+        ("pdf", "PDF"),
+        ("csv", "CSV"),
+        ("parquet", "Parquet"),
+        ("arrow", "Arrow IPC"),
+    ]
+
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="report_jobs",
+    )
+    tipo = models.CharField(max_length=12, choices=TIPOS, default=REPORTE)
+    prompt = models.TextField(blank=True)
+    formato = models.CharField(max_length=10, choices=FORMATOS)
+    spec = models.JSONField(default=dict)
+    meta = models.JSONField(default=dict)
+    estado = models.CharField(max_length=12, choices=ESTADOS, default=PENDIENTE)
+    progreso = models.PositiveSmallIntegerField(default=0)  # 0..100
+    filas_estimadas = models.PositiveIntegerField(default=0)
+    filas = models.PositiveIntegerField(null=True, blank=True)
+    archivo = models.FileField(upload_to=_ruta_artefacto, blank=True)
+    error = models.TextField(blank=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    creado_en = models.DateTimeField(auto_now_add=True)
+    iniciado_en = models.DateTimeField(null=True, blank=True)
+    terminado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # la cola: WHERE estado = 'pendiente' ORDER BY creado_en
+            models.Index(fields=["estado", "creado_en"]),
+        ]
+        ordering = ["-creado_en"]
+
+    def __str__(self):
+        return f"ReportJob #{self.pk} {self.formato} ({self.estado})"
@@ -1,14 +1,13 @@
 # reportes/parser.py
-import os
+import calendar
 import re
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from typing import Dict, Any, Optional
-from django.conf import settings
 
-try:
-    import joblib
-except Exception:
-    joblib = None
+from ia import registro
+
+from .cache import normalizar_prompt
 
 # ------------------------------
 # Utiles de fecha (simple)
@@ -41,41 +40,149 @@ def _norm_fecha(s: str) -> str:
     return s  # ya está YYYY-MM-DD
 
 # ------------------------------
-# Cargador del modelo IA (opcional)
+# Modelo IA (opcional, ver ia/registro.py)
 # ------------------------------
-_MODEL = None
-
-def _load_model():
-    """Carga ia/prompt_intent_model.joblib si existe (silencioso)."""
-    global _MODEL
-    if _MODEL is not None:
-        return _MODEL
-    if not joblib:
+def _intencion_modelo(p: str) -> Optional[str]:
+    """Intención según el modelo entrenado, o None si no hay modelo o no está seguro."""
+    model = registro.obtener("intenciones")
+    if model is None:
         return None
-    path = os.path.join(settings.BASE_DIR, "ia", "prompt_intent_model.joblib")
-    if os.path.exists(path):
-        try:
-            _MODEL = joblib.load(path)
-        except Exception:
-            _MODEL = None
-    return _MODEL
+    try:
+        proba = model.predict_proba([p])[0]
+        top_i = int(proba.argmax())
+        if proba[top_i] >= 0.60:  # umbral de confianza
+            return str(model.classes_[top_i])
+    except Exception:
+        pass
+    return None
+
+# ------------------------------
+# Reglas (compiladas una sola vez)
+# ------------------------------
+_FECHA = r"(\d{2}/\d{2}/\d{4}|\d{4}-\d{2}-\d{2})"
+_TEXTO = r"([a-z0-9áéíóúñ \-_/]+)"
+
+RE_CARRITO_VERBO = re.compile(r"\b(agrega|añade|quiero|pon|mete)\b")
+RE_CARRITO_DESTINO = re.compile(r"\b(carrito|compra|pedido)\b")
+RE_CARRITO_ITEM = re.compile(
+    r"(?:agrega|añade|quiero|pon|mete)\s+(?:(\d+)\s+)?(.+?)\s+(?:al|a la)\s+(?:carrito|compra|pedido)"
+)
+
+RE_INVENTARIO = re.compile(r"\b(inventario|stock|existenc)")
+RE_STOCK_BAJO = (
+    re.compile(r"\b(poco|bajo|menor|reponer|renovar)\b.*\bstock\b"),
+    re.compile(r"\bstock\s+(bajo|menor|crítico|critico)\b"),
+)
+
+RE_RANGO = re.compile(rf"del\s+{_FECHA}\s+al\s+{_FECHA}")
+RE_FECHAS = re.compile(_FECHA)
+RE_MES_DE = re.compile(r"mes de ([a-zñ]+)")
+RE_ULTIMOS = re.compile(r"[uú]ltim[oa]s\s+(\d{1,3})\s+(d[ií]as?|semanas?|mes(?:es)?)\b")
+
+RE_CSV = re.compile(r"\bcsv\b")
+RE_GZIP = re.compile(r"\b(gzip|gz|comprimid[oa])\b")
+RE_ARROW = re.compile(r"\b(arrow|feather)\b")
+
+RE_TOP = re.compile(r"\btop\s+(\d{1,3})\b")
+RE_CANTIDAD = re.compile(r"\b(?:los\s+)?(\d{1,3})\s+(?:productos?|items?)\b")
+RE_UMBRAL = re.compile(r"(?:menor(?:\s*a)?|<)\s*(\d{1,6})")
+
+RE_CATEGORIA = re.compile(rf"categor[ií]a\s+{_TEXTO}")
+RE_MARCA = re.compile(rf"marca\s+{_TEXTO}")
+RE_CONTIENE = re.compile(rf"(?:que\s+contenga|contiene|con\s+nombre)\s+{_TEXTO}")
+RE_CLIENTE = re.compile(r"(?:del|de|para(?:\s+el)?)\s+cliente\s+([a-z0-9áéíóúñ ]{2,})")
+RE_FIN_CLIENTE = re.compile(r"\s+(?:en|del|de|desde|hasta|al|por|y|con|que|mes|año|anio)\b")
+
+RE_ASC = re.compile(r"(menor a mayor|ascendente|asc\b)")
+RE_DESC = re.compile(r"(mayor a menor|descendente|desc\b)")
+RE_ORDEN_STOCK = re.compile(r"ordenad[oa]s?\s+por\s+stock")
+
+RE_AGRUPACION = (
+    (re.compile(r"por\s+cliente"), "cliente"),
+    (re.compile(r"por\s+categori"), "categoria"),
+    (re.compile(r"por\s+producto"), "producto"),
+)
+
+
+def _ajuste_sin_movimiento(p: str, out: Dict[str, Any]) -> None:
+    # "sin movimientos de inventario" → MovimientoInventario; si no, ventas
+    out["movimiento"] = "inventario" if RE_INVENTARIO.search(p) else "ventas"
+
+
+def _ajuste_stock(p: str, out: Dict[str, Any]) -> None:
+    if any(r.search(p) for r in RE_STOCK_BAJO):
+        out["intent"] = "stock_bajo"
+
+
+def _ajuste_menos_vendidos(p: str, out: Dict[str, Any]) -> None:
+    # Top invertido: queremos los menos vendidos
+    out["order_by"] = "unidades"
+    out["order_dir"] = "asc"
+
+
+# (patrón, intención, ajuste opcional). Gana la primera que coincide; si
+# ninguna coincide decide el modelo. El orden importa: "sin movimiento" va
+# antes que "stock" ("sin movimientos de inventario" no es un reporte de
+# stock) y "compras" al final (cuenta como ventas salvo que otra regla diga
+# algo más específico).
+REGLAS_INTENCION = (
+    (re.compile(r"\b(precio|precios|lista de precios)\b"), "precios", None),
+    (re.compile(r"(sin venta|no se vendi[oó]|sin movimiento|no vendidos)"), "sin_movimiento", _ajuste_sin_movimiento),
+    (re.compile(r"\b(stock|inventario|existenc)\b"), "stock", _ajuste_stock),
+    (re.compile(r"(m[aá]s\s+vendid|top\s*\d+|ranking|estrella|populares)"), "top_productos", None),
+    (re.compile(r"(menos\s+vendid)"), "top_productos", _ajuste_menos_vendidos),
+    (re.compile(r"\b(compra|compras|orden(es)?)\b"), "ventas", None),
+)
+
+
+def _intencion_por_reglas(p: str, out: Dict[str, Any]) -> bool:
+    """Aplica la primera regla que coincide. False si ninguna es decisiva."""
+    for patron, intent, ajuste in REGLAS_INTENCION:
+        if patron.search(p):
+            out["intent"] = intent
+            if ajuste:
+                ajuste(p, out)
+            return True
+    return False
 
 # ------------------------------
 # Parser principal
 # ------------------------------
+# Los resultados se memorizan por (prompt normalizado, día, versión del
+# modelo): "hoy" o "este mes" dan otras fechas al día siguiente, y un modelo
+# reentrenado puede clasificar distinto.
+CACHE_PROMPTS = 1024
+
+
 def parse_prompt(prompt: str) -> Dict[str, Any]:
     """
     Devuelve un dict con:
      - intent: ventas | stock | stock_bajo | precios | top_productos | sin_movimiento | agregar_carrito
      - group_by: 'producto' | 'cliente' | 'categoria'
      - start_date, end_date (YYYY-MM-DD o None)
-     - format: pantalla | pdf | excel
+     - format: pantalla | pdf | excel | csv | parquet | arrow
+     - compresion: 'gzip' (solo csv)
      - limit, threshold
      - categoria, marca, contiene, cliente
      - order_by, order_dir (para top/menos vendidos)
+     - movimiento: 'ventas' | 'inventario' (para sin_movimiento)
+
+    Primero corren las reglas; el modelo IA solo se consulta si ninguna
+    decide la intención.
     """
-    p = (prompt or "").lower().strip()
+    # copia: quien llama suele completar o corregir la spec
+    return dict(_parsear(
+        normalizar_prompt(prompt), datetime.now().date(), registro.version("intenciones")
+    ))
+
 
+def limpiar_cache() -> None:
+    """Vacía los resultados memorizados."""
+    _parsear.cache_clear()
+
+
+@lru_cache(maxsize=CACHE_PROMPTS)
+def _parsear(p: str, today: date, version_modelo: Optional[str] = None) -> Dict[str, Any]:
     out: Dict[str, Any] = {
         "intent": "ventas",
         "group_by": "producto",
@@ -90,71 +197,33 @@ def parse_prompt(prompt: str) -> Dict[str, Any]:
         "cliente": None,
         "order_by": None,
         "order_dir": None,
+        "movimiento": None,
+        "compresion": None,
     }
 
     # ---- 0) INTENCIÓN ESPECIAL: agregar al carrito ----
     # ejemplos: "agrega 2 licuadoras al carrito", "quiero 3 mouse gamer a la compra"
-    if re.search(r"\b(agrega|añade|quiero|pon|mete)\b", p) and re.search(r"\b(carrito|compra|pedido)\b", p):
+    if RE_CARRITO_VERBO.search(p) and RE_CARRITO_DESTINO.search(p):
         out["intent"] = "agregar_carrito"
-        m_prod = re.search(
-            r"(?:agrega|añade|quiero|pon|mete)\s+(?:(\d+)\s+)?(.+?)\s+(?:al|a la)\s+(?:carrito|compra|pedido)",
-            p
-        )
+        m_prod = RE_CARRITO_ITEM.search(p)
         if m_prod:
             out["limit"] = int(m_prod.group(1) or 1)         # cantidad
             out["contiene"] = m_prod.group(2).strip()        # nombre del producto
         return out  # retornamos de inmediato
 
-    # ---- 1) IA: clasifica intención si hay modelo entrenado ----
-    model = _load_model()
-    if model is not None:
-        try:
-            proba = model.predict_proba([p])[0]
-            labels = model.classes_
-            top_i = int(proba.argmax())
-            if proba[top_i] >= 0.60:  # umbral de confianza
-                out["intent"] = labels[top_i]
-        except Exception:
-            pass
-
-    # ---- 2) Reglas complementarias / override ----
-    # "compras" se considera ventas (sin cambiar el intent si IA ya puso otro)
-    if re.search(r"\b(compra|compras|orden(es)?)\b", p):
-        out["intent"] = "ventas"
-
-    if re.search(r"\b(precio|precios|lista de precios)\b", p):
-        out["intent"] = "precios"
-
-    elif re.search(r"\b(stock|inventario|existenc)\b", p):
-        out["intent"] = "stock"
-        if re.search(r"\b(poco|bajo|menor|reponer|renovar)\b.*\bstock\b", p) or \
-           re.search(r"\bstock\s+(bajo|menor|crítico|critico)\b", p):
-            out["intent"] = "stock_bajo"
-
-    elif re.search(r"(m[aá]s\s+vendid|top\s*\d+|ranking|estrella|populares)", p):
-        out["intent"] = "top_productos"
-
-    elif re.search(r"(sin venta|no se vendi[oó]|sin movimiento|no vendidos)", p):
-        out["intent"] = "sin_movimiento"
-    
-    elif re.search(r"(menos\s+vendid)", p):
-        # Top invertido: queremos los menos vendidos
-        out["intent"] = "top_productos"
-        out["order_by"] = "unidades"
-        out["order_dir"] = "asc"
+    # ---- 1) Intención: reglas; el modelo IA solo si ninguna decide ----
+    if not _intencion_por_reglas(p, out):
+        out["intent"] = _intencion_modelo(p) or out["intent"]
 
-    # ---- 3) Fechas ----
+    # ---- 2) Fechas ----
     # formato explícito "del DD/MM/YYYY al DD/MM/YYYY" (o YYYY-MM-DD)
-    r = re.search(
-        r"del\s+(\d{2}/\d{2}/\d{4}|\d{4}-\d{2}-\d{2})\s+al\s+(\d{2}/\d{2}/\d{4}|\d{4}-\d{2}-\d{2})",
-        p
-    )
+    r = RE_RANGO.search(p)
     if r:
         out["start_date"] = _norm_fecha(r.group(1))
         out["end_date"] = _norm_fecha(r.group(2))
     else:
         # fechas sueltas
-        fechas = re.findall(r"(\d{2}/\d{2}/\d{4}|\d{4}-\d{2}-\d{2})", p)
+        fechas = RE_FECHAS.findall(p)
         if len(fechas) >= 1:
             out["start_date"] = _norm_fecha(fechas[0])
         if len(fechas) >= 2:
@@ -162,105 +231,117 @@ def parse_prompt(prompt: str) -> Dict[str, Any]:
 
         # "mes de septiembre", "mensual de octubre"
         if not out["start_date"] and ("mes de " in p or "mensual" in p):
-            m = re.search(r"mes de ([a-zñ]+)", p)
+            m = RE_MES_DE.search(p)
             if m:
                 month_name = m.group(1)
                 mes = SPANISH_MONTHS.get(month_name)
                 if mes:
-                    year = datetime.now().year
+                    year = today.year
                     out["start_date"] = f"{year}-{mes:02d}-01"
                     out["end_date"] = f"{year}-{mes:02d}-{_ultimo_dia_mes(mes, year):02d}"
 
         # "este mes"
         if "este mes" in p and not out["start_date"]:
-            today = datetime.now().date()
             out["start_date"] = today.replace(day=1).strftime("%Y-%m-%d")
             out["end_date"] = today.strftime("%Y-%m-%d")
 
         # "hoy"
         if "hoy" in p and not out["start_date"]:
-            today = datetime.now().date().strftime("%Y-%m-%d")
-            out["start_date"] = today
-            out["end_date"] = today
+            out["start_date"] = today.strftime("%Y-%m-%d")
+            out["end_date"] = today.strftime("%Y-%m-%d")
 
         # "ayer"
         if "ayer" in p and not out["start_date"]:
-            d = datetime.now().date() - timedelta(days=1)
+            d = today - timedelta(days=1)
             out["start_date"] = d.strftime("%Y-%m-%d")
             out["end_date"] = d.strftime("%Y-%m-%d")
 
-        # "último mes", "mes pasado" (dejamos que el builder use fallback 30 días si no se setea)
-        if ("último mes" in p or "ultimo mes" in p or "mes pasado" in p) and not out["start_date"]:
-            # sin setear: el service / builder aplica fallback (últimos 30 días)
-            pass
+        # "últimos N días / semanas / meses" (hasta hoy)
+        mult = RE_ULTIMOS.search(p)
+        if mult and not out["start_date"]:
+            n, unidad = int(mult.group(1)), mult.group(2)
+            if unidad.startswith("mes"):
+                mes = today.month - n
+                year = today.year + (mes - 1) // 12
+                mes = (mes - 1) % 12 + 1
+                desde = today.replace(
+                    year=year, month=mes, day=min(today.day, calendar.monthrange(year, mes)[1])
+                )
+            else:
+                desde = today - timedelta(days=n * (7 if unidad.startswith("semana") else 1))
+            out["start_date"] = desde.strftime("%Y-%m-%d")
+            out["end_date"] = today.strftime("%Y-%m-%d")
+
+        # "último mes", "mes pasado": sin setear, el service / builder aplica
+        # fallback (últimos 30 días)
 
-    # ---- 4) Formato ----
+    # ---- 3) Formato ----
     if "pdf" in p:
         out["format"] = "pdf"
     elif "excel" in p or "xlsx" in p:
         out["format"] = "excel"
-    else:
-        out["format"] = "pantalla"
-
-    # ---- 5) Limit (top) ----
-    mtop = re.search(r"\btop\s+(\d{1,3})\b", p)
+    elif RE_CSV.search(p):
+        out["format"] = "csv"
+        if RE_GZIP.search(p):
+            out["compresion"] = "gzip"
+    elif "parquet" in p:
+        out["format"] = "parquet"
+    elif RE_ARROW.search(p):
+        out["format"] = "arrow"
+
+    # ---- 4) Limit (top) ----
+    mtop = RE_TOP.search(p)
     if mtop:
         out["limit"] = int(mtop.group(1))
     if out["limit"] is None:
-        mcount = re.search(r"\b(?:los\s+)?(\d{1,3})\s+(?:productos?|items?)\b", p)
+        mcount = RE_CANTIDAD.search(p)
         if mcount:
             out["limit"] = int(mcount.group(1))
 
-    # ---- 6) Threshold (para stock bajo) ----
-    mth = re.search(r"(?:menor(?:\s*a)?|<)\s*(\d{1,6})", p)
+    # ---- 5) Threshold (para stock bajo) ----
+    mth = RE_UMBRAL.search(p)
     if mth:
-        out["threshold"] = int(
-            mth.group(2) if mth.lastindex and mth.group(2) else mth.group(1)
-        )
+        out["threshold"] = int(mth.group(1))
 
-    # ---- 7) Filtros simples (categoría, marca, nombre de producto) ----
-    mc = re.search(r"categor[ií]a\s+([a-z0-9áéíóúñ \-_/]+)", p)
+    # ---- 6) Filtros simples (categoría, marca, nombre de producto) ----
+    mc = RE_CATEGORIA.search(p)
     if mc:
         out["categoria"] = mc.group(1).strip()
 
-    mm = re.search(r"marca\s+([a-z0-9áéíóúñ \-_/]+)", p)
+    mm = RE_MARCA.search(p)
     if mm:
         out["marca"] = mm.group(1).strip()
 
-    mn = re.search(r"(?:que\s+contenga|contiene|con\s+nombre)\s+([a-z0-9áéíóúñ \-_/]+)", p)
+    mn = RE_CONTIENE.search(p)
     if mn:
         out["contiene"] = mn.group(1).strip()
 
-    # ---- 8) Filtro por cliente (nombre / doc) ----
+    # ---- 7) Filtro por cliente (nombre / doc) ----
     # ejemplos:
     #   "del cliente juan perez"
     #   "para el cliente carlos"
     #   "ventas del cliente maria en este mes"
-    mcli = re.search(r"(?:del|de|para(?:\s+el)?)\s+cliente\s+([a-z0-9áéíóúñ ]{2,})", p)
+    mcli = RE_CLIENTE.search(p)
     if mcli:
-        raw = mcli.group(1).strip()
         # cortamos en palabras típicas que marcan el fin del nombre
-        raw = re.split(r"\s+(?:en|del|de|desde|hasta|al|por|y|con|que|mes|año|anio)\b", raw)[0].strip()
+        raw = RE_FIN_CLIENTE.split(mcli.group(1).strip())[0].strip()
         if raw:
             out["cliente"] = raw
 
-    # ---- 9) Orden (legacy: por si lo necesitas desde services) ----
-    if re.search(r"(menor a mayor|ascendente|asc\b)", p):
+    # ---- 8) Orden (legacy: por si lo necesitas desde services) ----
+    if RE_ASC.search(p):
         out["order_dir"] = "asc"
-    elif re.search(r"(mayor a menor|descendente|desc\b)", p):
+    elif RE_DESC.search(p):
         out["order_dir"] = "desc"
 
-    if re.search(r"ordenad[oa]s?\s+por\s+stock", p):
+    if RE_ORDEN_STOCK.search(p):
         out["order_by"] = "stock"
 
-    # ---- 10) Agrupación (group_by) ----
-    # "por cliente", "por categoría", "por producto"
-    if re.search(r"por\s+cliente", p):
-        out["group_by"] = "cliente"
-    elif re.search(r"por\s+categori", p):
-        out["group_by"] = "categoria"
-    elif re.search(r"por\s+producto", p):
-        out["group_by"] = "producto"
-    # (default ya es "producto")
+    # ---- 9) Agrupación (group_by) ----
+    # "por cliente", "por categoría", "por producto" (default ya es "producto")
+    for patron, campo in RE_AGRUPACION:
+        if patron.search(p):
+            out["group_by"] = campo
+            break
 
     return out
@@ -1,15 +1,18 @@
 # reportes/queries_extra.py
-from django.db.models import Sum, Q
+from django.db.models import Exists, OuterRef
+from analitica.models import VentaDiaria
 from catalogo.models import Producto
-from ventas.models import ItemVenta
+from core.fechas import a_fecha
 
 def productos_sin_movimiento(start_date=None, end_date=None, categoria=None):
-    vendidos = ItemVenta.objects.all()
-    if start_date: vendidos = vendidos.filter(venta__creado_en__date__gte=start_date)
-    if end_date: vendidos = vendidos.filter(venta__creado_en__date__lte=end_date)
-    vendidos = vendidos.values_list("producto_id", flat=True).distinct()
+    # NOT EXISTS sobre la tabla de hechos (solo ventas pagadas)
+    vendidos = VentaDiaria.objects.filter(producto=OuterRef("pk"))
+    if start_date:
+        vendidos = vendidos.filter(fecha__gte=a_fecha(start_date))
+    if end_date:
+        vendidos = vendidos.filter(fecha__lte=a_fecha(end_date))
 
-    q = Producto.objects.filter(activo=True).exclude(id__in=vendidos)
+    q = Producto.objects.filter(activo=True).filter(~Exists(vendidos))
     if categoria:
         q = q.filter(categoria__nombre__icontains=categoria)
 
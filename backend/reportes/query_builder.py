@@ -7,6 +7,7 @@ from django.db.models.functions import (
     TruncDay, TruncMonth, TruncWeek, Coalesce, ExtractQuarter
 )
 
+from core.fechas import q_rango
 from ventas.models import ItemVenta  # ventas_itemventa
 # Venta: cliente(FK), fecha(DateTime/Date), estado('Pagada'/'Pendiente'/...), total (Decimal)
 # ItemVenta: venta(FK), producto(FK), cantidad, subtotal, precio_unit
@@ -74,10 +75,7 @@ def build_queryset(spec: Dict[str, Any]) -> Tuple[List[str], List[List]]:
 
     # 2) Fechas (fallback 30 días)
     dini, dfin = _fallback_dates(start, end)
-    base = base.filter(
-        venta__creado_en__date__gte=dini.date(),
-        venta__creado_en__date__lte=dfin.date()
-    )
+    base = base.filter(q_rango("venta__creado_en", dini.date(), dfin.date()))
 
     # 3) Auto-ajustes por intent
     if intent == "top_productos":
@@ -1,16 +1,27 @@
 # reportes/runner.py
-from typing import List, Dict, Any
+from itertools import chain
+from typing import List, Dict, Any, Optional
 
 from .parser import parse_prompt
 from .services import (
+    AGRUPACIONES_VENTAS,
     consultar_ventas,
     consultar_top_productos,
     consultar_sin_movimiento,
     consultar_stock,
     consultar_stock_bajo,
     consultar_precios,
+    contar_filas,
 )
 from .logger import log_prompt
+from .cache import (
+    clave_resultado,
+    guardar_resultado,
+    guardar_spec,
+    normalizar_prompt,
+    resultado_cacheado,
+    spec_cacheada,
+)
 
 # Si quieres seguir usando query_builder como fallback:
 try:
@@ -34,17 +45,95 @@ def _safe_log(user, prompt: str, spec: Dict[str, Any]) -> None:
 def run_prompt(prompt: str, user=None, parse_only: bool = False):
     """
     Interpreta un prompt en lenguaje natural y ejecuta el reporte correspondiente.
+    La interpretación y el resultado salen del caché cuando se puede
+    (ver reportes/cache.py).
 
     Retorna:
       - Si parse_only=True → solo el spec (dict).
       - Si parse_only=False → (spec, headers, rows, warnings)
     """
-    spec = parse_prompt(prompt or "")
+    texto = normalizar_prompt(prompt)
+    spec = spec_cacheada(texto)
+    if spec is None:
+        spec = parse_prompt(texto)
+        guardar_spec(texto, spec)
     _safe_log(user, prompt, spec)
 
     if parse_only:
         return spec
 
+    headers, rows, warnings = ejecutar_spec(spec)
+    return spec, headers, rows, warnings
+
+
+def ejecutar_spec(spec: Dict[str, Any]):
+    """
+    Ejecuta un spec ya interpretado → (headers, rows, warnings).
+    Separado de run_prompt para que el worker de ReportJob lo reutilice sin
+    volver a parsear ni loguear el prompt.
+
+    El resultado se cachea por spec canónica y versión de datos (reportes/cache.py).
+    """
+    clave = clave_resultado(spec)
+    cacheado = resultado_cacheado(clave)
+    if cacheado is not None:
+        return cacheado
+
+    headers, rows, warnings = _ejecutar(spec)
+    if not warnings:
+        guardar_resultado(clave, headers, rows, warnings)
+    return headers, rows, warnings
+
+
+# Reportes de catálogo: la página se pide a la base con LIMIT/OFFSET
+_PAGINABLES_EN_BASE = ("sin_movimiento", "stock", "stock_bajo", "precios")
+
+
+def _paginable_en_base(spec: Dict[str, Any]) -> bool:
+    """Catálogo, o detalle de ventas por folio (una fila por venta, sin cota)."""
+    intent = spec.get("intent", "ventas")
+    if intent == "ventas":
+        return (spec.get("group_by") or "producto") not in AGRUPACIONES_VENTAS
+    return intent in _PAGINABLES_EN_BASE
+
+
+def ejecutar_pagina(spec: Dict[str, Any], offset: int, page_size: int):
+    """
+    Una página de la previsualización → (headers, rows, warnings, total_count).
+
+    - Reportes de catálogo y detalle de ventas por folio: se consulta solo la
+      página y el total sale de un COUNT; el resultado entero no se arma ni se
+      serializa en cada petición.
+    - Reportes agrupados (ventas por producto / cliente / categoría, top): el
+      resultado completo está acotado por la agrupación y queda en caché
+      (ejecutar_spec); se recorta la página.
+    """
+    if _paginable_en_base(spec):
+        headers, rows, warnings = _ejecutar(spec, offset=offset, page_size=page_size)
+        return headers, rows, warnings, contar_filas(spec)
+
+    headers, rows, warnings = ejecutar_spec(spec)
+    return headers, rows[offset:offset + page_size], warnings, len(rows)
+
+
+def ejecutar_en_stream(spec: Dict[str, Any]):
+    """
+    Para exportaciones grandes → (headers, rows, warnings) donde `rows` de los
+    reportes de catálogo y del detalle por folio es un generador sobre un
+    cursor de servidor: el archivo se escribe a medida que llegan las filas,
+    sin lista intermedia. El resto pasa por ejecutar_spec (y su caché).
+    """
+    if _paginable_en_base(spec):
+        return _ejecutar(spec, stream=True)
+    return ejecutar_spec(spec)
+
+
+def _ejecutar(
+    spec: Dict[str, Any],
+    offset: int = 0,
+    page_size: Optional[int] = None,
+    stream: bool = False,
+):
     intent = spec.get("intent", "ventas")
     headers: List[str] = []
     rows: List[List[Any]] = []
@@ -70,6 +159,9 @@ def run_prompt(prompt: str, user=None, parse_only: bool = False):
             group_by,
             cliente=cliente,
             contiene=contiene,
+            offset=offset,
+            page_size=page_size,
+            stream=stream,
         )
 
     # ----------------------------------------
@@ -94,6 +186,10 @@ def run_prompt(prompt: str, user=None, parse_only: bool = False):
             start_date,
             end_date,
             categoria=categoria,
+            movimiento=spec.get("movimiento"),
+            offset=offset,
+            page_size=page_size,
+            stream=stream,
         )
 
     # ----------------------------------------
@@ -104,6 +200,9 @@ def run_prompt(prompt: str, user=None, parse_only: bool = False):
             categoria=categoria,
             marca=marca,
             contiene=contiene,
+            offset=offset,
+            page_size=page_size,
+            stream=stream,
         )
 
     elif intent == "stock_bajo":
@@ -111,6 +210,9 @@ def run_prompt(prompt: str, user=None, parse_only: bool = False):
             threshold=threshold,
             categoria=categoria,
             limit=limit,
+            offset=offset,
+            page_size=page_size,
+            stream=stream,
         )
 
     elif intent == "precios":
@@ -118,6 +220,9 @@ def run_prompt(prompt: str, user=None, parse_only: bool = False):
             categoria=categoria,
             marca=marca,
             contiene=contiene,
+            offset=offset,
+            page_size=page_size,
+            stream=stream,
         )
 
     # ----------------------------------------
@@ -138,4 +243,27 @@ def run_prompt(prompt: str, user=None, parse_only: bool = False):
                 "Devuelvo un resultado vacío."
             )
 
-    return spec, headers, rows, warnings
+    return headers, rows, warnings
+
+
+def completar_con_query_builder(spec: Dict[str, Any], headers, rows):
+    """
+    Para exportar: si la consulta específica no devolvió nada, intenta
+    con query_builder antes de rendirse.
+
+    `rows` puede ser un generador (ejecutar_en_stream): se pide la primera
+    fila para saber si está vacío y se vuelve a anteponer. Eso ya ejecuta la
+    consulta, así que un error de base aparece aquí y no a mitad de la descarga.
+    """
+    if not isinstance(rows, list):
+        rows = iter(rows)
+        primera = next(rows, None)
+        if primera is not None:
+            return headers, chain([primera], rows)
+        rows = []
+    if not headers and not rows and build_queryset is not None:
+        try:
+            headers, rows = build_queryset(spec)
+        except Exception:
+            pass
+    return headers, rows
@@ -1,20 +1,37 @@
 # reportes/services.py
+import csv
+import zlib
 from io import BytesIO
-from typing import Tuple, Dict, Any, List, Optional
+from typing import Tuple, Dict, Any, Iterable, Iterator, List, Optional, Sequence
 
 from datetime import timedelta
 from django.utils import timezone
-from django.db.models import Sum, F, Avg, Q
-from django.db.models.functions import TruncDay, TruncMonth
+from django.db.models import Count, Exists, OuterRef, Sum, F, Q
+from django.db.models.functions import TruncDate
 
 from ventas.models import Venta, ItemVenta
 from clientes.models import Cliente
-from catalogo.models import Producto
+from catalogo.models import MovimientoInventario, Producto
+from catalogo.services import anotar_precio_final
+from .cache import dashboard_cacheado
+from core.fechas import a_fecha, q_rango
+from analitica.models import VentaDiaria
 
 # Excel
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, numbers, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
+from core.xlsx_stream import (
+    ESTILO_BORDE,
+    ESTILO_CENTRADO,
+    ESTILO_ENCABEZADO_OSCURO,
+    ESTILO_MONEDA,
+    xlsx_en_stream,
+)
+
+# Parquet / Arrow (opcional: sin pyarrow esos formatos responden 400)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:  # pragma: no cover
+    pa = pq = None
 
 # PDF
 from reportlab.lib.pagesizes import A4
@@ -28,12 +45,20 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 # Consultas de ventas
 # =========================
 
+# Agrupaciones de ventas que salen de VentaDiaria; cualquier otra es el
+# detalle por venta (folio), que no tiene cota de filas
+AGRUPACIONES_VENTAS = ("producto", "cliente", "categoria")
+
+
 def consultar_ventas(
     start_date: Optional[str],
     end_date: Optional[str],
     group_by: str,
     cliente: Optional[str] = None,
     contiene: Optional[str] = None,
+    offset: int = 0,
+    page_size: Optional[int] = None,
+    stream: bool = False,
 ) -> Tuple[List[str], List[List]]:
     """
     Reportes de ventas.
@@ -41,17 +66,51 @@ def consultar_ventas(
     - group_by = 'producto'  → productos vendidos
     - group_by = 'cliente'   → ventas por cliente
     - group_by = 'categoria' → ventas por categoría
+    - otro                   → detalle por venta (folio)
+
+    Las agrupaciones leen la tabla de hechos VentaDiaria (ya agregada por día);
+    solo el detalle por folio necesita ir a ItemVenta. El detalle se pagina en
+    la base (offset / page_size) y puede salir en streaming, igual que los
+    reportes de catálogo; las agrupaciones devuelven siempre todo.
     """
-    qs = ItemVenta.objects.select_related(
-        "venta", "producto", "venta__cliente", "producto__categoria"
+    if group_by in AGRUPACIONES_VENTAS:
+        return _ventas_agrupadas(start_date, end_date, group_by, cliente, contiene)
+
+    qs = _items_vendidos(start_date, end_date, cliente, contiene)
+
+    # Detalle por venta (folio); el folio desempata para que las páginas no se pisen
+    agg = (
+        qs.values(
+            folio=F("venta__folio"),
+            fecha=F("venta__creado_en__date"),
+            cliente=F("venta__cliente__nombre"),
+        )
+        .annotate(
+            cantidad=Sum("cantidad"),
+            monto=Sum(F("subtotal")),
+        )
+        .order_by("-fecha", "-monto", "folio")
+    )
+    headers = ["Folio", "Fecha", "Cliente", "Cantidad total", "Monto total"]
+    rows = (
+        [
+            r["folio"],
+            r["fecha"].strftime("%Y-%m-%d") if r["fecha"] else "",
+            r["cliente"] or "SIN NOMBRE",
+            int(r["cantidad"] or 0),
+            float(r["monto"] or 0.0),
+        ]
+        for r in _pagina(agg, offset, page_size, stream)
     )
 
-    if start_date:
-        qs = qs.filter(venta__creado_en__date__gte=start_date)
-    if end_date:
-        qs = qs.filter(venta__creado_en__date__lte=end_date)
+    return headers, rows if stream else list(rows)
 
-    qs = qs.filter(venta__estado__in=["pagada"])
+
+def _items_vendidos(start_date, end_date, cliente=None, contiene=None):
+    """ItemVenta de ventas pagadas, filtrado como el detalle de ventas."""
+    qs = ItemVenta.objects.filter(
+        q_rango("venta__creado_en", start_date, end_date), venta__estado="pagada"
+    )
 
     # Filtro por cliente (nombre o documento)
     if cliente:
@@ -63,17 +122,35 @@ def consultar_ventas(
     # Filtro por producto que "contiene"
     if contiene:
         qs = qs.filter(producto__nombre__icontains=contiene)
+    return qs
+
+
+def _hechos_ventas(start_date, end_date, cliente=None, contiene=None, categoria=None):
+    """VentaDiaria filtrada como los reportes de ventas (solo contiene pagadas)."""
+    qs = VentaDiaria.objects.all()
+    if start_date:
+        qs = qs.filter(fecha__gte=start_date)
+    if end_date:
+        qs = qs.filter(fecha__lte=end_date)
+    if cliente:
+        qs = qs.filter(
+            Q(cliente__nombre__icontains=cliente)
+            | Q(cliente__documento__icontains=cliente)
+        )
+    if contiene:
+        qs = qs.filter(producto__nombre__icontains=contiene)
+    if categoria:
+        qs = qs.filter(categoria__nombre__icontains=categoria)
+    return qs
 
-    rows: List[List] = []
-    headers: List[str] = []
+
+def _ventas_agrupadas(start_date, end_date, group_by, cliente=None, contiene=None):
+    qs = _hechos_ventas(start_date, end_date, cliente=cliente, contiene=contiene)
 
     if group_by == "producto":
         agg = (
             qs.values(nombre=F("producto__nombre"))
-            .annotate(
-                cantidad=Sum("cantidad"),
-                monto=Sum(F("subtotal")),
-            )
+            .annotate(cantidad=Sum("cantidad"), monto=Sum("monto"))
             .order_by("-monto", "-cantidad", "nombre")
         )
         headers = ["Producto", "Cantidad total", "Monto total"]
@@ -85,19 +162,16 @@ def consultar_ventas(
     elif group_by == "cliente":
         agg = (
             qs.values(
-                cliente=F("venta__cliente__nombre"),
-                doc=F("venta__cliente__documento"),
+                cliente_nombre=F("cliente__nombre"),
+                doc=F("cliente__documento"),
             )
-            .annotate(
-                cantidad=Sum("cantidad"),
-                monto=Sum(F("subtotal")),
-            )
-            .order_by("-monto", "-cantidad", "cliente")
+            .annotate(cantidad=Sum("cantidad"), monto=Sum("monto"))
+            .order_by("-monto", "-cantidad", "cliente_nombre")
         )
         headers = ["Cliente", "Documento", "Cantidad total", "Monto total"]
         rows = [
             [
-                r["cliente"] or "SIN NOMBRE",
+                r["cliente_nombre"] or "SIN NOMBRE",
                 r["doc"] or "",
                 int(r["cantidad"] or 0),
                 float(r["monto"] or 0.0),
@@ -105,13 +179,10 @@ def consultar_ventas(
             for r in agg
         ]
 
-    elif group_by == "categoria":
+    else:  # categoria
         agg = (
-            qs.values(cat=F("producto__categoria__nombre"))
-            .annotate(
-                cantidad=Sum("cantidad"),
-                monto=Sum(F("subtotal")),
-            )
+            qs.values(cat=F("categoria__nombre"))
+            .annotate(cantidad=Sum("cantidad"), monto=Sum("monto"))
             .order_by("-monto", "-cantidad", "cat")
         )
         headers = ["Categoría", "Cantidad total", "Monto total"]
@@ -123,31 +194,6 @@ def consultar_ventas(
             ]
             for r in agg
         ]
-    else:
-        # Detalle por venta (folio)
-        agg = (
-            qs.values(
-                folio=F("venta__folio"),
-                fecha=F("venta__creado_en__date"),
-                cliente=F("venta__cliente__nombre"),
-            )
-            .annotate(
-                cantidad=Sum("cantidad"),
-                monto=Sum(F("subtotal")),
-            )
-            .order_by("-fecha", "-monto")
-        )
-        headers = ["Folio", "Fecha", "Cliente", "Cantidad total", "Monto total"]
-        rows = [
-            [
-                r["folio"],
-                r["fecha"].strftime("%Y-%m-%d") if r["fecha"] else "",
-                r["cliente"] or "SIN NOMBRE",
-                int(r["cantidad"] or 0),
-                float(r["monto"] or 0.0),
-            ]
-            for r in agg
-        ]
 
     return headers, rows
 
@@ -158,19 +204,12 @@ def consultar_top_productos(
     limit: Optional[int],
     categoria: Optional[str] = None,
 ) -> Tuple[List[str], List[List]]:
-    """Ranking de productos más vendidos en un período."""
-    qs = ItemVenta.objects.select_related("venta", "producto", "producto__categoria")
-    if start_date:
-        qs = qs.filter(venta__creado_en__date__gte=start_date)
-    if end_date:
-        qs = qs.filter(venta__creado_en__date__lte=end_date)
-    qs = qs.filter(venta__estado__in=["pagada"])
-    if categoria:
-        qs = qs.filter(producto__categoria__nombre__icontains=categoria)
+    """Ranking de productos más vendidos en un período (desde VentaDiaria)."""
+    qs = _hechos_ventas(start_date, end_date, categoria=categoria)
 
     agg = (
         qs.values(n=F("producto__nombre"))
-        .annotate(cantidad=Sum("cantidad"), monto=Sum(F("subtotal")))
+        .annotate(cantidad=Sum("cantidad"), monto=Sum("monto"))
         .order_by("-cantidad", "-monto", "n")
     )
     if limit:
@@ -183,80 +222,141 @@ def consultar_top_productos(
     return headers, rows
 
 
-def consultar_sin_movimiento(
-    start_date: Optional[str],
-    end_date: Optional[str],
-    categoria: Optional[str] = None,
-) -> Tuple[List[str], List[List]]:
-    """Productos que NO tuvieron ventas en el período."""
-    vendibles = ItemVenta.objects.select_related("venta", "producto")
+# Filas por vuelta del cursor de servidor al exportar en streaming
+EXPORT_CHUNK = 2000
+
+
+def _pagina(qs, offset: int = 0, page_size: Optional[int] = None, stream: bool = False):
+    """
+    LIMIT/OFFSET en la base; sin page_size devuelve todo desde `offset`.
+    Con `stream` las filas salen de un cursor de servidor (.iterator()) y las
+    consultas de catálogo devuelven un generador en vez de una lista.
+    """
+    if page_size is None:
+        qs = qs[offset:] if offset else qs
+    else:
+        qs = qs[offset:offset + page_size]
+    return qs.iterator(chunk_size=EXPORT_CHUNK) if stream else qs
+
+
+# Anti-join correlacionado (NOT EXISTS) por producto: PostgreSQL lo resuelve
+# como un Anti Join que sondea el índice (producto, fecha/creado_en) del otro
+# lado, en vez de materializar un NOT IN sobre el DISTINCT de todo el historial.
+# Las ventas salen de VentaDiaria, que solo tiene ventas pagadas.
+_OBSERVACION_SIN_MOVIMIENTO = {
+    "ventas": "Sin ventas en el período",
+    "inventario": "Sin movimientos de inventario en el período",
+}
+
+
+def _movimientos_del_producto(movimiento: str, start_date, end_date):
+    if movimiento == "inventario":
+        return MovimientoInventario.objects.filter(
+            q_rango("creado_en", start_date, end_date), producto=OuterRef("pk")
+        )
+    hechos = VentaDiaria.objects.filter(producto=OuterRef("pk"))
     if start_date:
-        vendibles = vendibles.filter(venta__creado_en__date__gte=start_date)
+        hechos = hechos.filter(fecha__gte=a_fecha(start_date))
     if end_date:
-        vendibles = vendibles.filter(venta__creado_en__date__lte=end_date)
-    vendibles = vendibles.values_list("producto_id", flat=True).distinct()
+        hechos = hechos.filter(fecha__lte=a_fecha(end_date))
+    return hechos
 
-    qs = Producto.objects.exclude(id__in=vendibles).select_related("categoria")
+
+def qs_sin_movimiento(
+    start_date: Optional[str],
+    end_date: Optional[str],
+    categoria: Optional[str] = None,
+    movimiento: Optional[str] = None,
+):
+    if (movimiento or "ventas") not in _OBSERVACION_SIN_MOVIMIENTO:
+        raise ValueError(f"Tipo de movimiento no soportado: {movimiento}")
+    qs = Producto.objects.filter(
+        ~Exists(_movimientos_del_producto(movimiento or "ventas", start_date, end_date))
+    )
     if categoria:
         qs = qs.filter(categoria__nombre__icontains=categoria)
+    return qs.order_by("nombre").values_list("nombre", "categoria__nombre", "stock", "precio")
+
+
+def consultar_sin_movimiento(
+    start_date: Optional[str],
+    end_date: Optional[str],
+    categoria: Optional[str] = None,
+    movimiento: Optional[str] = None,
+    offset: int = 0,
+    page_size: Optional[int] = None,
+    stream: bool = False,
+) -> Tuple[List[str], List[List]]:
+    """Productos sin ventas pagadas (o sin movimientos de inventario) en el período."""
+    qs = qs_sin_movimiento(start_date, end_date, categoria=categoria, movimiento=movimiento)
+    observacion = _OBSERVACION_SIN_MOVIMIENTO[movimiento or "ventas"]
 
     headers = ["Producto", "Categoría", "Stock", "Precio", "Observación"]
-    rows = []
-    for p in qs.order_by("nombre"):
-        rows.append(
-            [
-                p.nombre,
-                getattr(p.categoria, "nombre", "")
-                if getattr(p, "categoria", None)
-                else "",
-                getattr(p, "stock", 0),
-                float(getattr(p, "precio", 0.0)),
-                "Sin ventas en el período",
-            ]
-        )
-    return headers, rows
+    rows = (
+        [nombre, cat or "", stock, float(precio), observacion]
+        for nombre, cat, stock, precio in _pagina(qs, offset, page_size, stream)
+    )
+    return headers, rows if stream else list(rows)
 
 
 # =========================
 # Stock / Precios
 # =========================
+# Las filas salen de values_list: ni instancias de Producto ni select_related,
+# solo las columnas que se muestran. Producto no tiene stock_minimo: la columna
+# "Stock mínimo" sale con el mismo valor por defecto que antes (0 / "-").
 
-def consultar_stock(
+def _productos_filtrados(
     categoria: Optional[str] = None,
     marca: Optional[str] = None,
     contiene: Optional[str] = None,
 ):
-    qs = Producto.objects.select_related("categoria")
+    qs = Producto.objects.all()
     if categoria:
         qs = qs.filter(categoria__nombre__icontains=categoria)
     if marca and hasattr(Producto, "marca"):
         qs = qs.filter(marca__nombre__icontains=marca)
     if contiene:
         qs = qs.filter(nombre__icontains=contiene)
+    return qs
+
+
+def qs_stock(
+    categoria: Optional[str] = None,
+    marca: Optional[str] = None,
+    contiene: Optional[str] = None,
+):
+    return (
+        _productos_filtrados(categoria, marca, contiene)
+        .order_by("nombre")
+        .values_list("nombre", "categoria__nombre", "stock", "precio")
+    )
+
+
+def consultar_stock(
+    categoria: Optional[str] = None,
+    marca: Optional[str] = None,
+    contiene: Optional[str] = None,
+    offset: int = 0,
+    page_size: Optional[int] = None,
+    stream: bool = False,
+):
+    qs = qs_stock(categoria, marca, contiene)
 
     headers = ["Producto", "Categoría", "Stock", "Stock mínimo", "Precio"]
-    rows = []
-    for p in qs.order_by("nombre"):
-        rows.append(
-            [
-                p.nombre,
-                getattr(p.categoria, "nombre", "")
-                if getattr(p, "categoria", None)
-                else "",
-                getattr(p, "stock", 0),
-                getattr(p, "stock_minimo", 0),
-                float(getattr(p, "precio", 0.0)),
-            ]
-        )
-    return headers, rows
+    rows = (
+        [nombre, cat or "", stock, 0, float(precio)]
+        for nombre, cat, stock, precio in _pagina(qs, offset, page_size, stream)
+    )
+    return headers, rows if stream else list(rows)
 
 
-def consultar_stock_bajo(
+def qs_stock_bajo(
     threshold: Optional[int] = None,
     categoria: Optional[str] = None,
     limit: Optional[int] = None,
 ):
-    qs = Producto.objects.select_related("categoria")
+    qs = Producto.objects.all()
 
     if categoria:
         qs = qs.filter(categoria__nombre__icontains=categoria)
@@ -268,122 +368,173 @@ def consultar_stock_bajo(
     else:
         qs = qs.filter(stock__lt=10)
 
-    qs = qs.order_by("stock", "nombre")
+    qs = qs.order_by("stock", "nombre").values_list(
+        "nombre", "categoria__nombre", "stock", "vendidas_30d"
+    )
     if limit:
         qs = qs[:limit]
+    return qs
+
+
+def consultar_stock_bajo(
+    threshold: Optional[int] = None,
+    categoria: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    page_size: Optional[int] = None,
+    stream: bool = False,
+):
+    qs = qs_stock_bajo(threshold, categoria, limit)
 
     headers = ["Producto", "Categoría", "Stock", "Stock mínimo", "Sugerencia"]
-    rows = []
-    for p in qs:
-        minimo = getattr(p, "stock_minimo", None)
-        sug = f"Reponer hasta {minimo}" if minimo else "Reponer"
-        rows.append(
-            [
-                p.nombre,
-                getattr(p.categoria, "nombre", "")
-                if getattr(p, "categoria", None)
-                else "",
-                getattr(p, "stock", 0),
-                minimo if minimo is not None else "-",
-                sug,
-            ]
-        )
-    return headers, rows
+    rows = (
+        # vendidas_30d: columna mantenida en Producto (analitica/velocidad.py)
+        [nombre, cat or "", stock, "-",
+         f"Reponer ({vendidas} vendidas en 30 días)" if vendidas else "Reponer"]
+        for nombre, cat, stock, vendidas in _pagina(qs, offset, page_size, stream)
+    )
+    return headers, rows if stream else list(rows)
+
+
+def qs_precios(
+    categoria: Optional[str] = None,
+    marca: Optional[str] = None,
+    contiene: Optional[str] = None,
+):
+    # Precio con la mejor oferta vigente, calculado en la misma consulta
+    qs = anotar_precio_final(_productos_filtrados(categoria, marca, contiene))
+    return qs.order_by("nombre").values_list(
+        "nombre", "categoria__nombre", "precio", "precio_con_oferta", "stock"
+    )
 
 
 def consultar_precios(
     categoria: Optional[str] = None,
     marca: Optional[str] = None,
     contiene: Optional[str] = None,
+    offset: int = 0,
+    page_size: Optional[int] = None,
+    stream: bool = False,
 ):
-    qs = Producto.objects.select_related("categoria")
-    if categoria:
-        qs = qs.filter(categoria__nombre__icontains=categoria)
-    if marca and hasattr(Producto, "marca"):
-        qs = qs.filter(marca__nombre__icontains=marca)
-    if contiene:
-        qs = qs.filter(nombre__icontains=contiene)
+    qs = qs_precios(categoria, marca, contiene)
 
-    headers = ["Producto", "Categoría", "Precio", "Stock"]
-    rows = []
-    for p in qs.order_by("nombre"):
-        rows.append(
-            [
-                p.nombre,
-                getattr(p.categoria, "nombre", "")
-                if getattr(p, "categoria", None)
-                else "",
-                float(getattr(p, "precio", 0.0)),
-                getattr(p, "stock", 0),
-            ]
-        )
-    return headers, rows
+    headers = ["Producto", "Categoría", "Precio", "Precio final", "Stock"]
+    rows = (
+        [nombre, cat or "", float(precio), float(final), stock]
+        for nombre, cat, precio, final, stock in _pagina(qs, offset, page_size, stream)
+    )
+    return headers, rows if stream else list(rows)
 
 
 # =========================
-# Exportadores Excel / PDF
+# Estimación de tamaño
 # =========================
 
-def generar_excel(headers: List[str], rows: List[List]) -> bytes:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Reporte"
+def _qs_filas(spec: Dict[str, Any]):
+    """
+    Consulta con una fila por fila del reporte de `spec` (solo para contarlas),
+    o None si la intención no tiene consulta propia (fallback).
+    """
+    intent = spec.get("intent", "ventas")
+    start_date = spec.get("start_date")
+    end_date = spec.get("end_date")
+    categoria = spec.get("categoria")
+    marca = spec.get("marca")
+    contiene = spec.get("contiene")
+
+    if intent == "ventas" and (spec.get("group_by") or "producto") not in AGRUPACIONES_VENTAS:
+        # Detalle por folio: una fila por venta
+        qs = _items_vendidos(start_date, end_date, spec.get("cliente"), contiene)
+        return qs.order_by().values("venta_id").distinct()
+
+    if intent in ("ventas", "top_productos"):
+        if intent == "ventas":
+            qs = _hechos_ventas(start_date, end_date, cliente=spec.get("cliente"), contiene=contiene)
+            clave = {
+                "producto": "producto__nombre",
+                "cliente": "cliente_id",
+                "categoria": "categoria__nombre",
+            }[spec.get("group_by") or "producto"]
+        else:
+            qs = _hechos_ventas(start_date, end_date, categoria=categoria)
+            clave = "producto__nombre"
+        return qs.order_by().values(clave).distinct()
+
+    if intent == "sin_movimiento":
+        return qs_sin_movimiento(
+            start_date, end_date, categoria=categoria, movimiento=spec.get("movimiento")
+        )
+    if intent == "stock":
+        return qs_stock(categoria, marca, contiene)
+    if intent == "stock_bajo":
+        # el `limit` se aplica al final, igual que en consultar_stock_bajo
+        return qs_stock_bajo(spec.get("threshold"), categoria)
+    if intent == "precios":
+        return _productos_filtrados(categoria, marca, contiene)
+    return None
 
-    ws.append(headers)
-    header_fill = PatternFill(
-        start_color="1E293B", end_color="1E293B", fill_type="solid"
-    )
-    header_ink = Font(bold=True, color="FFFFFF")
-    for col_idx, _ in enumerate(headers, start=1):
-        cell = ws.cell(row=1, column=col_idx)
-        cell.font = header_ink
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center", vertical="center")
 
-    for r in rows:
-        ws.append(r)
+def estimar_filas(spec: Dict[str, Any], tope: int) -> int:
+    """
+    Cantidad de filas que devolvería el reporte de `spec`, contando como mucho
+    hasta `tope + 1` (COUNT sobre un LIMIT): alcanza para decidir si la
+    exportación se hace en la petición o en un ReportJob, sin pagar el COUNT
+    completo. Intenciones sin consulta propia (fallback) devuelven 0.
+    """
+    qs = _qs_filas(spec)
+    if qs is None:
+        return 0
+    limit = spec.get("limit")
+    if limit and spec.get("intent") in ("top_productos", "stock_bajo"):
+        tope = min(tope, int(limit))
+    return qs.order_by()[: tope + 1].count()
+
+
+def contar_filas(spec: Dict[str, Any]) -> int:
+    """Total exacto de filas del reporte (`total_count` de la previsualización)."""
+    qs = _qs_filas(spec)
+    if qs is None:
+        return 0
+    total = qs.order_by().count()
+    limit = spec.get("limit")
+    if limit and spec.get("intent") in ("top_productos", "stock_bajo"):
+        total = min(total, int(limit))
+    return total
 
-    ws.freeze_panes = "A2"
 
+# =========================
+# Exportadores Excel / PDF / CSV / Parquet / Arrow
+# =========================
+
+def _estilos_excel(headers: List[str]) -> List[int]:
+    """Estilo de cada columna: moneda si la última es un monto, cantidades centradas."""
+    estilos = [
+        ESTILO_CENTRADO if "cantidad" in h.lower() else ESTILO_BORDE for h in headers
+    ]
     if headers and "monto" in headers[-1].lower():
-        for row_idx in range(2, ws.max_row + 1):
-            c = ws.cell(row=row_idx, column=len(headers))
-            try:
-                float(c.value)
-                c.number_format = numbers.FORMAT_CURRENCY_USD_SIMPLE
-                c.alignment = Alignment(horizontal="right")
-            except Exception:
-                pass
-
-    for idx, h in enumerate(headers, start=1):
-        if "cantidad" in h.lower():
-            for row_idx in range(2, ws.max_row + 1):
-                ws.cell(row=row_idx, column=idx).alignment = Alignment(
-                    horizontal="center"
-                )
+        estilos[-1] = ESTILO_MONEDA
+    return estilos
 
-    thin = Side(style="thin", color="DDDDDD")
-    border = Border(top=thin, left=thin, right=thin, bottom=thin)
-    for row in ws.iter_rows(
-        min_row=1, max_row=ws.max_row, min_col=1, max_col=len(headers)
-    ):
-        for cell in row:
-            cell.border = border
-
-    for col_idx in range(1, len(headers) + 1):
-        max_len = 0
-        for row_idx in range(1, ws.max_row + 1):
-            val = ws.cell(row=row_idx, column=col_idx).value
-            if val is None:
-                continue
-            max_len = max(max_len, len(str(val)))
-        ws.column_dimensions[get_column_letter(col_idx)].width = min(
-            max(12, max_len + 2), 42
-        )
 
-    out = BytesIO()
-    wb.save(out)
-    return out.getvalue()
+def excel_en_stream(headers: List[str], rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """
+    Excel del reporte en streaming (core/xlsx_stream.py): los estilos van por
+    columna mientras se escriben las filas, sin un Workbook en memoria ni
+    pasadas extra por la hoja. `rows` puede ser una lista o un generador.
+    """
+    return xlsx_en_stream(
+        headers,
+        rows,
+        hoja="Reporte",
+        estilo_encabezado=ESTILO_ENCABEZADO_OSCURO,
+        estilos_columnas=_estilos_excel(headers),
+        ancho_minimo=12,
+        ancho_maximo=42,
+    )
+
+
+def generar_excel(headers: List[str], rows: Iterable[Sequence]) -> bytes:
+    return b"".join(excel_en_stream(headers, rows))
 
 
 def generar_pdf(headers: List[str], rows: List[List], meta: Dict[str, Any]) -> bytes:
@@ -470,49 +621,265 @@ def generar_pdf(headers: List[str], rows: List[List], meta: Dict[str, Any]) -> b
     return pdf
 
 
+class _Buffer:
+    """
+    Destino de escritura para csv.writer y para los escritores de pyarrow:
+    junta lo escrito hasta que se retira (solo avanza, no se posiciona).
+    """
+
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+        self.closed = False
+
+    def write(self, datos) -> int:
+        datos = datos.encode("utf-8") if isinstance(datos, str) else bytes(datos)
+        self._partes.append(datos)
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self) -> int:
+        return self._posicion
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def retirar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def _bloques(rows: Iterable[Sequence], tamano: int) -> Iterator[List[Sequence]]:
+    bloque = []
+    for fila in rows:
+        bloque.append(fila)
+        if len(bloque) >= tamano:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def csv_en_stream(
+    headers: List[str], rows: Iterable[Sequence], gzip: bool = False
+) -> Iterator[bytes]:
+    """
+    CSV (UTF-8, separador coma) por bloques de EXPORT_CHUNK filas. Con `gzip`
+    todos los bloques pasan por el mismo compresor: el resultado es un único
+    .csv.gz válido, sin tenerlo entero en memoria.
+    """
+    buf = _Buffer()
+    escritor = csv.writer(buf, lineterminator="\n")
+    compresor = zlib.compressobj(wbits=31) if gzip else None  # 31: formato gzip
+
+    escritor.writerow(headers)
+    for bloque in _bloques(rows, EXPORT_CHUNK):
+        escritor.writerows(bloque)
+        datos = buf.retirar()
+        yield compresor.compress(datos) if compresor else datos
+    datos = buf.retirar()  # el encabezado, si no hubo filas
+    if compresor:
+        yield compresor.compress(datos) + compresor.flush()
+    elif datos:
+        yield datos
+
+
+def _columnas_arrow(headers: List[str], bloque: List[Sequence], schema=None) -> list:
+    """
+    Filas → arrays tipados de Arrow, columna por columna (sin formatear celda
+    por celda). El primer bloque fija el esquema; una columna con tipos
+    mezclados (ej. números y "-") queda como texto.
+    """
+    columnas = list(zip(*bloque)) if bloque else [[] for _ in headers]
+    arrays = []
+    for i, valores in enumerate(columnas):
+        tipo = schema.field(i).type if schema is not None else None
+        if tipo is not None and pa.types.is_string(tipo):
+            valores = [None if v is None else str(v) for v in valores]
+        try:
+            array = pa.array(valores, type=tipo)
+            if tipo is None:
+                array = _tipo_estable(array)
+            arrays.append(array)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            if tipo is not None:
+                raise ValueError(
+                    f"La columna '{headers[i]}' cambió de tipo a mitad del reporte."
+                )
+            arrays.append(pa.array([None if v is None else str(v) for v in valores], pa.string()))
+    return arrays
+
+
+def _tipo_estable(array):
+    """
+    Ajusta el tipo inferido del primer bloque para que sirva a los siguientes:
+    decimales con la precisión máxima (la inferida depende de los valores del
+    bloque) y columnas todavía vacías como texto.
+    """
+    if pa.types.is_decimal(array.type):
+        return array.cast(pa.decimal128(38, array.type.scale))
+    if pa.types.is_null(array.type):
+        return array.cast(pa.string())
+    return array
+
+
+def _escritor_arrow(formato: str, destino, schema):
+    if formato == "parquet":
+        return pq.ParquetWriter(destino, schema, compression="snappy")
+    return pa.ipc.new_file(destino, schema)
+
+
+def columnar_en_stream(
+    formato: str, headers: List[str], rows: Iterable[Sequence]
+) -> Iterator[bytes]:
+    """
+    Parquet o Arrow IPC (archivo) por lotes de EXPORT_CHUNK filas: cada lote
+    es un RecordBatch tipado (un row group en Parquet) que se escribe y se
+    entrega sin acumular filas.
+    """
+    buf = _Buffer()
+    destino = pa.PythonFile(buf, mode="w")
+    escritor = schema = None
+    for bloque in _bloques(rows, EXPORT_CHUNK):
+        lote = pa.RecordBatch.from_arrays(
+            _columnas_arrow(headers, bloque, schema), names=list(headers)
+        )
+        if escritor is None:
+            schema = lote.schema
+            escritor = _escritor_arrow(formato, destino, schema)
+        escritor.write_batch(lote)
+        yield buf.retirar()
+    if escritor is None:  # sin filas: archivo solo con el esquema (columnas de texto)
+        vacio = pa.RecordBatch.from_arrays(_columnas_arrow(headers, []), names=list(headers))
+        escritor = _escritor_arrow(formato, destino, vacio.schema)
+    escritor.close()
+    yield buf.retirar()
+
+
+CONTENT_TYPES = {
+    "excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+EXTENSIONES = {"excel": "xlsx", "pdf": "pdf", "csv": "csv", "parquet": "parquet", "arrow": "arrow"}
+ETIQUETAS = {"excel": "Excel", "pdf": "PDF", "csv": "CSV", "parquet": "Parquet", "arrow": "Arrow"}
+
+
+def exportar_en_stream(
+    formato: str, headers: List[str], rows: Iterable[Sequence], meta: Dict[str, Any]
+) -> Tuple[Iterator[bytes], str, str]:
+    """
+    Como generar_archivo, pero el contenido es un iterador de bytes: Excel,
+    CSV, Parquet y Arrow se generan a medida que se consumen
+    (StreamingHttpResponse o archivo temporal). Las validaciones ocurren acá,
+    antes de empezar a escribir.
+
+    CSV va comprimido con gzip si meta["compresion"] == "gzip".
+    """
+    if formato not in CONTENT_TYPES:
+        raise ValueError(f"Formato de exportación no soportado: {formato}")
+    if not headers and not rows:
+        raise ValueError(
+            f"El reporte no devolvió datos para generar {ETIQUETAS[formato]}."
+        )
+    if formato in ("parquet", "arrow") and pa is None:
+        raise ValueError(f"La exportación {ETIQUETAS[formato]} requiere pyarrow instalado.")
+
+    nombre = f"reporte.{EXTENSIONES[formato]}"
+    content_type = CONTENT_TYPES[formato]
+    if formato == "excel":
+        contenido = excel_en_stream(headers, rows)
+    elif formato == "csv":
+        gzip = meta.get("compresion") == "gzip"
+        contenido = csv_en_stream(headers, rows, gzip=gzip)
+        if gzip:
+            nombre, content_type = nombre + ".gz", "application/gzip"
+    elif formato in ("parquet", "arrow"):
+        contenido = columnar_en_stream(formato, headers, rows)
+    elif formato == "pdf":
+        contenido = iter([generar_pdf(headers, rows, {
+            "start_date": meta.get("start_date"),
+            "end_date": meta.get("end_date"),
+            "group_by": meta.get("group_by"),
+            "metrics": meta.get("metrics"),
+            "intent": meta.get("intent"),
+        })])
+    return contenido, content_type, nombre
+
+
+def generar_archivo(
+    formato: str, headers: List[str], rows: Iterable[Sequence], meta: Dict[str, Any]
+) -> Tuple[bytes, str, str]:
+    """
+    Genera el archivo de exportación completo. Devuelve (contenido, content_type, nombre).
+    """
+    contenido, content_type, nombre = exportar_en_stream(formato, headers, rows, meta)
+    return b"".join(contenido), content_type, nombre
+
+
 # =========================
 # Datos para Dashboard
 # =========================
 
 def get_dashboard_data() -> Dict[str, Any]:
-    now = timezone.now()
-    today = now.date()
+    """
+    Datos del dashboard, compartidos por todos los usuarios: se sirven del
+    caché y se recalculan en segundo plano antes de vencer (reportes/cache.py).
+    """
+    return dashboard_cacheado(calcular_dashboard)
+
+
+def calcular_dashboard() -> Dict[str, Any]:
+    """
+    Cuatro consultas en total:
+      1) ventas pagadas de los últimos 30 días agrupadas por día local: de ahí
+         salen la serie y los KPIs de hoy / del mes (el inicio de mes nunca es
+         anterior a hace 30 días),
+      2) clientes nuevos del mes,
+      3) categorías del mes desde VentaDiaria,
+      4) últimas ventas.
+
+    La serie y los KPIs suman Venta.total (con descuento e impuestos);
+    VentaDiaria guarda subtotales de ítems y solo se usa para las categorías,
+    que siempre se sumaron por ítem.
+    """
+    today = timezone.localdate()  # mismo día local que VentaDiaria.fecha
     start_of_month = today.replace(day=1)
     start_of_30_days = today - timedelta(days=30)
 
     ventas_pagadas = Venta.objects.filter(estado="pagada")
 
-    ventas_hoy = (
-        ventas_pagadas.filter(creado_en__date=today)
-        .aggregate(total=Sum("total"))["total"]
-        or 0
-    )
-    ventas_mes = (
-        ventas_pagadas.filter(creado_en__gte=start_of_month)
-        .aggregate(total=Sum("total"))["total"]
-        or 0
-    )
-    ticket_promedio = (
-        ventas_pagadas.filter(creado_en__gte=start_of_month)
-        .aggregate(avg=Avg("total"))["avg"]
-        or 0
-    )
+    por_dia: Dict[Any, Any] = {}
+    ventas_hoy = ventas_mes = 0
+    cantidad_mes = 0
+    for item in (
+        ventas_pagadas.filter(q_rango("creado_en", start_of_30_days))
+        .annotate(dia=TruncDate("creado_en"))
+        .values("dia")
+        .annotate(total=Sum("total"), n=Count("id"))
+        .order_by()
+    ):
+        por_dia[item["dia"]] = item["total"]
+        if item["dia"] >= start_of_month:
+            ventas_mes += item["total"]
+            cantidad_mes += item["n"]
+        if item["dia"] == today:
+            ventas_hoy = item["total"]
+    ticket_promedio = ventas_mes / cantidad_mes if cantidad_mes else 0
     nuevos_clientes_mes = Cliente.objects.filter(
-        creado_en__gte=start_of_month
+        q_rango("creado_en", start_of_month)
     ).count()
 
-    ventas_diarias = (
-        ventas_pagadas.filter(creado_en__gte=start_of_30_days)
-        .annotate(dia=TruncDay("creado_en"))
-        .values("dia")
-        .annotate(total=Sum("total"))
-        .order_by("dia")
-    )
-
     ventas_por_categoria = (
-        ventas_pagadas.filter(creado_en__gte=start_of_month)
-        .values("items__producto__categoria__nombre")
-        .annotate(total=Sum("items__subtotal"))
+        VentaDiaria.objects.filter(fecha__gte=start_of_month)
+        .values(categoria_nombre=F("categoria__nombre"))
+        .annotate(total=Sum("monto"))
         .order_by("-total")
     )
 
@@ -526,16 +893,12 @@ def get_dashboard_data() -> Dict[str, Any]:
             "ticket_promedio": f"{ticket_promedio:,.2f}",
         },
         "ventas_ultimos_30_dias": [
-            {"fecha": item["dia"].strftime("%Y-%m-%d"), "total": float(item["total"])}
-            for item in ventas_diarias
+            {"fecha": dia.strftime("%Y-%m-%d"), "total": float(total)}
+            for dia, total in sorted(por_dia.items())
         ],
         "ventas_por_categoria": [
-            {
-                "categoria": item["items__producto__categoria__nombre"],
-                "total": float(item["total"]),
-            }
+            {"categoria": item["categoria_nombre"], "total": float(item["total"])}
             for item in ventas_por_categoria
-            if item["items__producto__categoria__nombre"]
         ],
         "ultimas_ventas": [
             {
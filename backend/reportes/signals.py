@@ -0,0 +1,94 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from catalogo.models import Oferta, Producto
+from catalogo.services import stock_movido
+from ventas.models import ItemVenta, Venta
+
+from .cache import invalidar_datos
+
+
+def _invalidar_al_confirmar():
+    """Invalida ahora y otra vez al confirmar, para no cachear datos sin commit."""
+    invalidar_datos()
+    transaction.on_commit(invalidar_datos)
+
+
+# ==========================
+# Ventas: el cambio de estado (los reportes cuentan las pagadas) y los ítems
+# de las ya pagadas
+# ==========================
+
+@receiver(post_save, sender=Venta)
+def venta_guardada(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        # Una venta nace "pendiente" (carrito); recién cuenta al pagarse
+        if instance.estado == "pagada":
+            _invalidar_al_confirmar()
+    elif update_fields is None or "estado" in update_fields:
+        _invalidar_al_confirmar()
+
+
+@receiver(post_delete, sender=Venta)
+def venta_borrada(sender, **kwargs):
+    _invalidar_al_confirmar()
+
+
+# Ítems de una venta ya pagada: cambian los montos de ventas / top productos
+@receiver(post_save, sender=ItemVenta)
+@receiver(post_delete, sender=ItemVenta)
+def item_cambiado(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Venta) or getattr(origin, "model", None) is Venta:
+        return  # borrado en cascada de la venta: ya invalidó venta_borrada
+    if instance.venta.estado == "pagada":
+        _invalidar_al_confirmar()
+
+
+# ==========================
+# Productos: stock y precio (incluidas las ofertas, que cambian el precio final)
+# ==========================
+
+def _stock_precio(instance):
+    # Desde __dict__: leer un campo diferido (.only / .defer) haría una consulta
+    return instance.__dict__.get("stock"), instance.__dict__.get("precio")
+
+
+@receiver(post_init, sender=Producto)
+def producto_cargado(sender, instance, **kwargs):
+    # Valores con los que se cargó, para comparar en post_save sin releer la fila
+    instance._reportes_previo = _stock_precio(instance)
+
+
+@receiver(post_save, sender=Producto)
+def producto_guardado(sender, instance, created, update_fields=None, **kwargs):
+    previo = getattr(instance, "_reportes_previo", (None, None))
+    actual = _stock_precio(instance)
+    instance._reportes_previo = actual
+    if created:
+        _invalidar_al_confirmar()
+    elif update_fields is not None and not {"stock", "precio"} & set(update_fields):
+        return
+    elif None in previo or previo != actual:
+        # Sin valor cargado (campo diferido) no se puede comparar: se invalida
+        _invalidar_al_confirmar()
+
+
+@receiver(post_delete, sender=Producto)
+@receiver(post_save, sender=Oferta)
+@receiver(post_delete, sender=Oferta)
+def catalogo_cambiado(sender, **kwargs):
+    _invalidar_al_confirmar()
+
+
+@receiver(m2m_changed, sender=Oferta.productos_especificos.through)
+@receiver(m2m_changed, sender=Oferta.marcas.through)
+@receiver(m2m_changed, sender=Oferta.categorias.through)
+def oferta_alcance_cambiado(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        _invalidar_al_confirmar()
+
+
+@receiver(stock_movido)
+def stock_actualizado(sender, **kwargs):
+    _invalidar_al_confirmar()
@@ -1,7 +1,14 @@
 from django.urls import path
-from .views import ReportePromptView, dashboard_data_view
+from .views import (
+    ReportJobDescargaView,
+    ReportJobView,
+    ReportePromptView,
+    dashboard_data_view,
+)
 
 urlpatterns = [
     path("prompt/", ReportePromptView.as_view(), name="reporte_prompt"),
     path("dashboard/", dashboard_data_view, name="dashboard_data"),
+    path("jobs/<int:pk>/", ReportJobView.as_view(), name="reporte_job"),
+    path("jobs/<int:pk>/descargar/", ReportJobDescargaView.as_view(), name="reporte_job_descargar"),
 ]
@@ -1,23 +1,31 @@
 # reportes/views.py
 import re
 
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
 from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from rest_framework import views, permissions, status
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 
 from cuentas.permissions import RequierePermisos
+from cuentas.services import permisos_de_request
 from catalogo.models import Producto
 from clientes.models import Cliente
 
-from .runner import run_prompt
+from .jobs import encolar
+from .models import ReportJob
+from .runner import completar_con_query_builder, ejecutar_en_stream, ejecutar_pagina, run_prompt
 from .services import (
-    generar_excel,
-    generar_pdf,
+    CONTENT_TYPES,
+    EXTENSIONES,
+    estimar_filas,
+    exportar_en_stream,
     get_dashboard_data,
 )
-from .query_builder import build_queryset  # por si lo usas en el futuro
 
 
 # ============================
@@ -126,6 +134,10 @@ def _resolver_cliente_desde_prompt(prompt: str) -> Cliente | None:
     return qs.first()
 
 
+# Palabras del prompt que piden descargar un archivo (exigen reportes.exportar)
+_PALABRAS_EXPORTACION = ("pdf", "excel", "xlsx", "csv", "parquet", "arrow")
+
+
 def _to_bool(val) -> bool:
     """
     Convierte cualquier valor de request.data a booleano "real".
@@ -138,6 +150,27 @@ def _to_bool(val) -> bool:
     return str(val).strip().lower() in ("1", "true", "yes", "y", "on")
 
 
+def _paginacion(request):
+    """
+    offset / limit de la previsualización (body o query string).
+    limit por defecto y máximo: REPORTES_PREVIEW_LIMIT / REPORTES_PREVIEW_LIMIT_MAX.
+    """
+    def _entero(nombre, defecto):
+        valor = request.data.get(nombre, request.query_params.get(nombre))
+        if valor in (None, ""):
+            return defecto
+        try:
+            return int(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f"'{nombre}' debe ser un número entero.")
+
+    offset = _entero("offset", 0)
+    limit = _entero("limit", settings.REPORTES_PREVIEW_LIMIT)
+    if offset < 0 or limit < 1:
+        raise ValueError("'offset' no puede ser negativo y 'limit' debe ser mayor que 0.")
+    return offset, min(limit, settings.REPORTES_PREVIEW_LIMIT_MAX)
+
+
 # ============================
 # Dashboard estático
 # ============================
@@ -162,8 +195,11 @@ class ReportePromptView(views.APIView):
 
     Flujo:
       1) Detecta si el prompt es para "agregar al carrito" → responde directo.
-      2) Pasa el prompt a run_prompt(prompt, user) → obtiene spec, headers, rows, warnings.
-      3) Según 'format' (pantalla / pdf / excel) decide si exporta o previsualiza.
+      2) Interpreta el prompt (run_prompt) y ajusta el spec (fechas, cliente, formato).
+      3) Exportaciones (pdf / excel / csv / parquet / arrow) con más filas estimadas que
+         REPORTES_SYNC_MAX_FILAS → ReportJob en cola y 202 con `job_id`.
+      4) El resto se ejecuta en la petición: exporta o previsualiza. La
+         previsualización es paginada (`offset` / `limit`) y trae `total_count`.
     """
 
     permission_classes = [permissions.IsAuthenticated, RequierePermisos]
@@ -183,8 +219,8 @@ class ReportePromptView(views.APIView):
                 force_preview = _to_bool(data.get("force_preview"))
 
                 wants_export = (
-                    formato in ("pdf", "excel")
-                    or any(k in prompt for k in ("pdf", "excel", "xlsx"))
+                    formato in CONTENT_TYPES
+                    or any(k in prompt for k in _PALABRAS_EXPORTACION)
                 )
 
                 if wants_export and not force_preview:
@@ -239,20 +275,19 @@ class ReportePromptView(views.APIView):
                 )
 
         # ------------------------------------------------------------------
-        # 2) Interpretar y ejecutar reporte con el motor de IA / reglas
+        # 2) Interpretar el prompt con el motor de IA / reglas
         # ------------------------------------------------------------------
         try:
-            # run_prompt devuelve: (spec_dict, headers, rows, warnings)
-            spec, headers, rows, warnings = run_prompt(
-                prompt, user=request.user, parse_only=False
-            )
+            # spec tal como sale del parser: es la que se ejecuta
+            spec_ejecucion = run_prompt(prompt, user=request.user, parse_only=True)
         except Exception as e:
             return Response(
                 {"error": "No pude generar el reporte.", "detail": str(e)},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        spec = spec or {}
+        spec_ejecucion = spec_ejecucion or {}
+        spec = dict(spec_ejecucion)
 
         # Aseguramos fechas a partir del texto si el spec no las trajo
         spec = _ensure_dates_in_spec_from_prompt(spec, prompt)
@@ -270,11 +305,11 @@ class ReportePromptView(views.APIView):
                     spec["cliente"] = cli_obj.documento or cli_obj.nombre
 
         # ------------------------------------------------------------------
-        # 4) Resolver formato final (pantalla / pdf / excel)
+        # 4) Resolver formato final (pantalla o uno de CONTENT_TYPES)
         # ------------------------------------------------------------------
         formato_spec = (spec.get("format") or "").lower().strip()
 
-        if formato_cliente in ("pantalla", "pdf", "excel"):
+        if formato_cliente == "pantalla" or formato_cliente in CONTENT_TYPES:
             formato_final = formato_cliente
         else:
             formato_final = formato_spec or "pantalla"
@@ -283,9 +318,56 @@ class ReportePromptView(views.APIView):
             formato_final = "pantalla"
 
         spec["format"] = formato_final
+        if (request.data.get("compresion") or "").lower() == "gzip":
+            spec["compresion"] = "gzip"  # solo lo usa csv
 
         # ------------------------------------------------------------------
-        # 5) Sugerencias UX (hints)
+        # 5) Exportaciones grandes: a la cola (ReportJob) y 202 con el id
+        # ------------------------------------------------------------------
+        if formato_final in CONTENT_TYPES:
+            limite = settings.REPORTES_SYNC_MAX_FILAS
+            estimadas = estimar_filas(spec_ejecucion, limite)
+            if estimadas > limite:
+                job = encolar(
+                    request.user, prompt, formato_final, spec_ejecucion, spec,
+                    filas_estimadas=estimadas,
+                )
+                return Response(
+                    {
+                        "job_id": job.pk,
+                        "estado": job.estado,
+                        "estado_url": request.build_absolute_uri(
+                            reverse("reporte_job", args=[job.pk])
+                        ),
+                    },
+                    status=status.HTTP_202_ACCEPTED,
+                )
+
+        exporta = formato_final in CONTENT_TYPES
+        if not exporta:
+            try:
+                offset, page_size = _paginacion(request)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            if exporta:
+                # Catálogo: generador sobre un cursor de servidor, el archivo se
+                # escribe mientras llegan las filas (ver ejecutar_en_stream)
+                headers, rows, warnings = ejecutar_en_stream(spec_ejecucion)
+                headers, rows = completar_con_query_builder(spec, headers, rows)
+            else:
+                headers, rows, warnings, total = ejecutar_pagina(
+                    spec_ejecucion, offset, page_size
+                )
+        except Exception as e:
+            return Response(
+                {"error": "No pude generar el reporte.", "detail": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # ------------------------------------------------------------------
+        # 6) Sugerencias UX (hints)
         # ------------------------------------------------------------------
         hints = []
         if not spec.get("start_date") and not spec.get("end_date"):
@@ -300,64 +382,101 @@ class ReportePromptView(views.APIView):
             )
 
         # ------------------------------------------------------------------
-        # 6) Salidas: Excel / PDF / Pantalla
+        # 7) Salidas: Excel / PDF (síncronas) / Pantalla
         # ------------------------------------------------------------------
-        if formato_final == "excel":
-            if not headers and not rows and build_queryset is not None:
-                try:
-                    headers, rows = build_queryset(spec)
-                except Exception:
-                    pass
-
-            if not headers and not rows:
-                return Response(
-                    {"error": "El reporte no devolvió datos para generar Excel."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            xls = generar_excel(headers, rows)
-            resp = HttpResponse(
-                xls,
-                content_type=(
-                    "application/"
-                    "vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                ),
-            )
-            resp["Content-Disposition"] = 'attachment; filename="reporte.xlsx"'
-            return resp
-
-        if formato_final == "pdf":
-            if not headers and not rows and build_queryset is not None:
-                try:
-                    headers, rows = build_queryset(spec)
-                except Exception:
-                    pass
-
-            if not headers and not rows:
-                return Response(
-                    {"error": "El reporte no devolvió datos para generar PDF."},
-                    status=status.HTTP_400_BAD_REQUEST,
+        if exporta:
+            try:
+                contenido, content_type, nombre = exportar_en_stream(
+                    formato_final, headers, rows, spec
                 )
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            meta = {
-                "start_date": spec.get("start_date"),
-                "end_date": spec.get("end_date"),
-                "group_by": spec.get("group_by"),
-                "metrics": spec.get("metrics"),
-                "intent": spec.get("intent"),
-            }
-            pdf = generar_pdf(headers, rows, meta)
-            resp = HttpResponse(pdf, content_type="application/pdf")
-            resp["Content-Disposition"] = 'attachment; filename=\"reporte.pdf\"'
+            resp = StreamingHttpResponse(contenido, content_type=content_type)
+            resp["Content-Disposition"] = f'attachment; filename="{nombre}"'
             return resp
 
-        # Preview en pantalla
+        # Preview en pantalla (una página)
+        siguiente = offset + len(rows)
         return Response(
             {
                 "headers": headers,
                 "rows": rows,
+                "total_count": total,
+                "offset": offset,
+                "limit": page_size,
+                "next_offset": siguiente if siguiente < total else None,
                 "meta": spec,
                 "warnings": warnings,
                 "hints": hints,
             }
         )
+
+
+# ============================
+# Exportaciones en segundo plano (ReportJob)
+# ============================
+
+def _job_propio(request, pk) -> ReportJob:
+    """
+    Job del usuario (cualquiera si es superusuario). El permiso depende del
+    tipo: reportes.exportar para reportes, auditoria.ver para la bitácora.
+    """
+    qs = ReportJob.objects.all()
+    if not request.user.is_superuser:
+        qs = qs.filter(usuario=request.user)
+    job = get_object_or_404(qs, pk=pk)
+    if not request.user.is_superuser and ReportJob.PERMISOS[job.tipo] not in permisos_de_request(request):
+        raise PermissionDenied(RequierePermisos.message)
+    return job
+
+
+class ReportJobView(views.APIView):
+    """
+    GET /api/reportes/jobs/<id>/
+    Estado de una exportación encolada: pendiente / procesando / listo / error.
+    """
+    permission_classes = [permissions.IsAuthenticated]  # el permiso lo revisa _job_propio
+
+    def get(self, request, pk):
+        job = _job_propio(request, pk)
+        data = {
+            "job_id": job.pk,
+            "tipo": job.tipo,
+            "estado": job.estado,
+            "progreso": job.progreso,
+            "formato": job.formato,
+            "filas_estimadas": job.filas_estimadas,
+            "filas": job.filas,
+            "error": job.error or None,
+            "creado_en": job.creado_en,
+            "terminado_en": job.terminado_en,
+        }
+        if job.estado == ReportJob.LISTO:
+            data["descargar_url"] = request.build_absolute_uri(
+                reverse("reporte_job_descargar", args=[job.pk])
+            )
+        return Response(data)
+
+
+class ReportJobDescargaView(views.APIView):
+    """
+    GET /api/reportes/jobs/<id>/descargar/
+    Entrega el archivo generado (el storage de media no se expone directo).
+    """
+    permission_classes = [permissions.IsAuthenticated]  # el permiso lo revisa _job_propio
+
+    def get(self, request, pk):
+        job = _job_propio(request, pk)
+        if job.estado != ReportJob.LISTO or not job.archivo:
+            return Response(
+                {"detail": "El reporte todavía no está disponible."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        comprimido = job.archivo.name.endswith(".gz")
+        return FileResponse(
+            job.archivo.open("rb"),
+            as_attachment=True,
+            filename=f"{job.tipo}.{EXTENSIONES[job.formato]}" + (".gz" if comprimido else ""),
+            content_type="application/gzip" if comprimido else CONTENT_TYPES[job.formato],
+        )
@@ -0,0 +1,83 @@
+# ventas/management/commands/bench_checkout.py
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from catalogo.models import Categoria, Producto
+from clientes.models import Cliente
+from ventas.services import crear_venta_desde_carrito
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide consultas SQL y tiempo de crear_venta_desde_carrito para carritos "
+        "de distintos tamaños. Todo corre dentro de una transacción que se revierte."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lineas", type=int, nargs="+", default=[1, 10, 50, 200],
+            help="Tamaños de carrito (líneas) a medir",
+        )
+        parser.add_argument(
+            "--repeticiones", type=int, default=5,
+            help="Corridas por tamaño (se reporta la mediana)",
+        )
+
+    def handle(self, *args, **opts):
+        cliente = Cliente.objects.order_by("id").first()
+        if not cliente:
+            raise CommandError("No hay clientes. Ejecuta primero 'seed_demo'.")
+
+        resultados = []
+        try:
+            with transaction.atomic():
+                productos = self._preparar_productos(max(opts["lineas"]))
+                for n in opts["lineas"]:
+                    items = [{"producto": p.pk, "cantidad": 1} for p in productos[:n]]
+                    consultas, tiempos = 0, []
+                    for _ in range(opts["repeticiones"]):
+                        with CaptureQueriesContext(connection) as ctx:
+                            t0 = time.perf_counter()
+                            crear_venta_desde_carrito(cliente, None, items)
+                            tiempos.append((time.perf_counter() - t0) * 1000)
+                        consultas = len(ctx.captured_queries)
+                    resultados.append((n, consultas, statistics.median(tiempos)))
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Checkout por lotes (crear_venta_desde_carrito)"))
+        self.stdout.write(f"{'Líneas':>8} {'Consultas':>10} {'Mediana ms':>12}")
+        for n, consultas, ms in resultados:
+            self.stdout.write(f"{n:>8} {consultas:>10} {ms:>12.1f}")
+
+    def _preparar_productos(self, n):
+        """Asegura n productos activos con stock de sobra (solo dentro de la transacción)."""
+        faltan = n - Producto.objects.filter(activo=True).count()
+        if faltan > 0:
+            categoria = Categoria.objects.order_by("id").first() or Categoria.objects.create(
+                nombre="Benchmark"
+            )
+            Producto.objects.bulk_create(
+                [
+                    Producto(
+                        codigo=f"BENCH-{i:04d}",
+                        nombre=f"Producto benchmark {i}",
+                        categoria=categoria,
+                        precio=Decimal("10.00"),
+                    )
+                    for i in range(faltan)
+                ]
+            )
+        productos = list(Producto.objects.filter(activo=True).order_by("id")[:n])
+        Producto.objects.filter(pk__in=[p.pk for p in productos]).update(stock=1_000_000)
+        return productos
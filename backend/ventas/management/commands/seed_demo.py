@@ -8,6 +8,7 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.db import transaction
 
+from analitica import hechos, velocidad
 from cuentas.models import Rol
 from clientes.models import Cliente
 from catalogo.models import Producto
@@ -235,6 +236,7 @@ class Command(BaseCommand):
                 v.recalc_totales()
 
                 # aseguramos que la fecha no se “resetee”
+                # (.update() no dispara señales: los hechos se reconstruyen al final)
                 Venta.objects.filter(pk=v.pk).update(
                     creado_en=fecha,
                     actualizado_en=fecha,
@@ -248,6 +250,13 @@ class Command(BaseCommand):
                 f"(items: {total_items_creados})"
             )
         )
+        # Los hechos se mantuvieron con la fecha real de creación; con las
+        # fechas ya reescritas se recalculan desde cero
+        filas = hechos.reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"✔ VentaDiaria reconstruida: {filas} filas"))
+        productos = velocidad.reconciliar()  # después de los hechos: lee sus ventanas
+        self.stdout.write(self.style.SUCCESS(f"✔ Velocidad de ventas reconciliada: {productos} productos"))
+
         self.stdout.write(
             "- Usuarios demo: admin/1234, empleado1/1234, "
             "cliente1..cliente80 (pass: 1234)"
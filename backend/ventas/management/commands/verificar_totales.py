@@ -0,0 +1,55 @@
+# ventas/management/commands/verificar_totales.py
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from ventas.models import Venta
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula subtotal/total de las ventas desde sus ítems y reporta las que "
+        "no coinciden con los totales guardados (mantenidos de forma incremental)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--estado", default=None,
+            help="Revisar solo ventas en este estado (ej: pendiente)",
+        )
+        parser.add_argument(
+            "--corregir", action="store_true",
+            help="Corrige las ventas con desvío usando Venta.recalc_totales()",
+        )
+
+    def handle(self, *args, **opts):
+        money = DecimalField(max_digits=12, decimal_places=2)
+        qs = Venta.objects.annotate(
+            suma_items=Coalesce(Sum("items__subtotal"), Value(Decimal("0.00")), output_field=money)
+        ).filter(
+            ~Q(subtotal=F("suma_items"))
+            | ~Q(total=F("suma_items") - F("descuento") + F("impuestos"))
+        )
+        if opts["estado"]:
+            qs = qs.filter(estado=opts["estado"])
+
+        desvios = list(qs.order_by("id"))
+        if not desvios:
+            self.stdout.write(self.style.SUCCESS("✔ Sin desvíos: todos los totales coinciden con sus ítems."))
+            return
+
+        for v in desvios:
+            self.stdout.write(
+                f"{v.folio} ({v.estado}): subtotal guardado {v.subtotal} vs ítems {v.suma_items}; "
+                f"total guardado {v.total}"
+            )
+            if opts["corregir"]:
+                v.recalc_totales()
+
+        msg = f"{len(desvios)} venta(s) con desvío"
+        if opts["corregir"]:
+            self.stdout.write(self.style.SUCCESS(f"✔ {msg} corregidas."))
+        else:
+            self.stdout.write(self.style.WARNING(f"⚠ {msg}. Usa --corregir para recalcularlas."))
@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import F
 from django.conf import settings
+from django.utils import timezone
 from decimal import Decimal
 from django.utils.crypto import get_random_string
 from clientes.models import Cliente
@@ -40,6 +42,11 @@ class Venta(models.Model):
 
     class Meta:
         ordering = ["-creado_en"]
+        indexes = [
+            # Reportes y dashboard: estado = 'pagada' AND creado_en en un rango
+            # (ver core/fechas.py para filtrar sin castear la columna)
+            models.Index(fields=["estado", "creado_en"], name="venta_estado_creado_idx"),
+        ]
 
     def __str__(self):
         return f"{self.folio} - {self.cliente.nombre} - {self.estado}"
@@ -51,6 +58,22 @@ class Venta(models.Model):
         self.total = (self.subtotal - self.descuento + self.impuestos).quantize(Decimal("0.01"))
         self.save(update_fields=["subtotal", "total", "actualizado_en"])
 
+    def aplicar_delta(self, delta: Decimal):
+        """
+        Suma `delta` (subtotal nuevo - subtotal anterior de un ítem) a subtotal
+        y total con un UPDATE atómico: O(1), sin releer los ítems de la venta.
+        El descuento y los impuestos no cambian, así que el total se mueve igual.
+        Para detectar desvíos: `manage.py verificar_totales`.
+        """
+        if not delta:
+            return
+        Venta.objects.filter(pk=self.pk).update(
+            subtotal=F("subtotal") + delta,
+            total=F("total") + delta,
+            actualizado_en=timezone.now(),
+        )
+        self.refresh_from_db(fields=["subtotal", "total", "actualizado_en"])
+
     @property
     def puede_anular(self):
         return self.estado in ("pendiente", "pagada")
@@ -1,7 +1,30 @@
 # ventas/services.py
+from decimal import Decimal
+
 from django.db import transaction
-from catalogo.models import MovimientoInventario
-from .models import Venta
+from django.db.models import Prefetch, prefetch_related_objects
+from catalogo.models import Producto
+from catalogo.services import agrupar_cantidades, anotar_precio_final, mover_stock
+from .models import Venta, ItemVenta
+
+
+def _bloquear_venta(venta: Venta) -> Venta:
+    """
+    Bloquea la fila de la venta y refresca su estado, para que dos pagos o
+    anulaciones concurrentes de la misma venta se apliquen una sola vez.
+    """
+    venta.estado = (
+        Venta.objects.select_for_update()
+        .filter(pk=venta.pk)
+        .values_list("estado", flat=True)
+        .get()
+    )
+    return venta
+
+
+def _cantidades_venta(venta: Venta):
+    return agrupar_cantidades(venta.items.values_list("producto_id", "cantidad"))
+
 
 @transaction.atomic
 def anular_venta(venta: Venta, usuario):
@@ -9,22 +32,18 @@ def anular_venta(venta: Venta, usuario):
     Anula la venta. Si estaba pagada, reingresa stock.
     Si estaba pendiente, NO toca stock (porque aún no se descontó).
     """
+    _bloquear_venta(venta)
     if not venta.puede_anular:
         raise ValueError("La venta no puede ser anulada en su estado actual.")
 
     if venta.estado == "pagada":
         # Reingreso por anulación (venta ya había descontado stock)
-        for it in venta.items.select_related("producto"):
-            prod = it.producto
-            prod.stock = prod.stock + it.cantidad
-            prod.save(update_fields=["stock"])
-            MovimientoInventario.objects.create(
-                producto=prod,
-                tipo="IN",
-                cantidad=it.cantidad,
-                motivo=f"Reingreso por anulación {venta.folio}",
-                usuario=usuario,
-            )
+        mover_stock(
+            _cantidades_venta(venta),
+            "IN",
+            f"Reingreso por anulación {venta.folio}",
+            usuario=usuario,
+        )
 
     venta.estado = "anulada"
     venta.save(update_fields=["estado"])
@@ -32,34 +51,28 @@ def anular_venta(venta: Venta, usuario):
 
 
 @transaction.atomic
-def marcar_pagada(venta: Venta, usuario=None):
+def marcar_pagada(venta: Venta, usuario=None, cantidades=None):
     """
     Marca venta como 'pagada' y DESCUENTA stock (con movimientos OUT).
     Idempotente: si ya está 'pagada' no repite.
+
+    `cantidades` ({producto_id: cantidad}) evita releer los ítems cuando quien
+    llama acaba de crearlos.
     """
+    _bloquear_venta(venta)
     if venta.estado == "pagada":
         return venta
 
     if not venta.puede_confirmar_pago:
         raise ValueError(f"No se puede marcar como pagada desde estado '{venta.estado}'")
 
-    # Descuento de stock
-    for it in venta.items.select_related("producto"):
-        prod = it.producto
-        if prod.stock < it.cantidad:
-            raise ValueError(
-                f"Stock insuficiente para {prod.nombre}. "
-                f"Disponible: {prod.stock}, requerido: {it.cantidad}"
-            )
-        prod.stock -= it.cantidad
-        prod.save(update_fields=["stock"])
-        MovimientoInventario.objects.create(
-            producto=prod,
-            tipo="OUT",
-            cantidad=it.cantidad,
-            motivo=f"Venta {venta.folio}",
-            usuario=usuario,
-        )
+    # Descuento de stock en bloque (falla con ValueError si no alcanza)
+    mover_stock(
+        cantidades if cantidades is not None else _cantidades_venta(venta),
+        "OUT",
+        f"Venta {venta.folio}",
+        usuario=usuario,
+    )
 
     venta.estado = "pagada"
     venta.save(update_fields=["estado"])
@@ -72,6 +85,7 @@ def marcar_reembolsada(venta: Venta, usuario):
     Cambia la venta a 'reembolsada' y reingresa stock con movimientos IN.
     Idempotente: si ya está 'reembolsada' no repite.
     """
+    _bloquear_venta(venta)
     if venta.estado == "reembolsada":
         return venta
 
@@ -80,18 +94,78 @@ def marcar_reembolsada(venta: Venta, usuario):
             f"Solo se puede reembolsar una venta 'pagada'; estado actual '{venta.estado}'"
         )
 
-    for it in venta.items.select_related("producto"):
-        prod = it.producto
-        prod.stock += it.cantidad
-        prod.save(update_fields=["stock"])
-        MovimientoInventario.objects.create(
-            producto=prod,
-            tipo="IN",
-            cantidad=it.cantidad,
-            motivo=f"Reingreso por reembolso {venta.folio}",
-            usuario=usuario,
-        )
+    mover_stock(
+        _cantidades_venta(venta),
+        "IN",
+        f"Reingreso por reembolso {venta.folio}",
+        usuario=usuario,
+    )
 
     venta.estado = "reembolsada"
     venta.save(update_fields=["estado"])
     return venta
+
+
+@transaction.atomic
+def crear_venta_desde_carrito(cliente, usuario, items_data) -> Venta:
+    """
+    Crea una venta pagada a partir de un carrito [{producto, cantidad}, ...]
+    con un número de consultas constante, sin importar cuántas líneas tenga:
+
+      1) carga todos los productos con su precio final en una consulta (in_bulk),
+      2) crea la venta con los totales ya calculados en Python,
+      3) inserta los ítems con un solo bulk_create,
+      4) descuenta stock en bloque vía marcar_pagada.
+
+    Las líneas con producto inexistente, inactivo o cantidad <= 0 se ignoran;
+    las líneas repetidas del mismo producto se suman.
+    Lanza ValueError si no queda ninguna línea válida o falta stock.
+    """
+    pedidos = agrupar_cantidades(
+        (int(raw.get("producto")), raw.get("cantidad") or 0)
+        for raw in items_data
+        if raw.get("producto")
+    )
+    pedidos = {pid: cant for pid, cant in pedidos.items() if cant > 0}
+
+    productos = anotar_precio_final(Producto.objects.all()).in_bulk(list(pedidos))
+
+    items = []
+    subtotal = Decimal("0.00")
+    for prod_id, cantidad in pedidos.items():
+        producto = productos.get(prod_id)
+        if not producto or not producto.activo:
+            continue
+        precio_unit = producto.precio_con_oferta  # usa descuento si lo hay
+        item = ItemVenta(
+            producto=producto,
+            cantidad=cantidad,
+            precio_unit=precio_unit,
+            subtotal=precio_unit * cantidad,
+        )
+        items.append(item)
+        subtotal += item.subtotal
+
+    if not items:
+        raise ValueError("La venta no tiene ítems válidos.")
+
+    venta = Venta(cliente=cliente, usuario=usuario, estado="pendiente", subtotal=subtotal)
+    # Misma política que Venta.recalc_totales
+    venta.total = (venta.subtotal - venta.descuento + venta.impuestos).quantize(Decimal("0.01"))
+    venta.save()
+
+    for item in items:
+        item.venta = venta
+    ItemVenta.objects.bulk_create(items)
+
+    marcar_pagada(
+        venta,
+        usuario=usuario,
+        cantidades={it.producto_id: it.cantidad for it in items},
+    )
+
+    # Deja los ítems precargados para serializar la respuesta sin N+1
+    prefetch_related_objects(
+        [venta], Prefetch("items", queryset=ItemVenta.objects.select_related("producto"))
+    )
+    return venta
@@ -1,5 +1,8 @@
 # ventas/views.py
+from decimal import Decimal
+
 from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from django.http import HttpResponse
 
 from rest_framework import viewsets, permissions, status
@@ -12,7 +15,7 @@ from .serializers import VentaSerializer
 from cuentas.permissions import RequierePermisos
 from clientes.models import Cliente
 from catalogo.models import Producto
-from .services import marcar_pagada, anular_venta
+from .services import marcar_pagada, anular_venta, crear_venta_desde_carrito
 from .pdf import generar_comprobante_pdf
 
 
@@ -69,6 +72,14 @@ class VentaViewSet(viewsets.ModelViewSet):
         )
         return venta
 
+    def _serializar_carrito(self, venta, request):
+        """Serializa la venta precargando ítems y productos (sin N+1)."""
+        prefetch_related_objects(
+            [venta],
+            Prefetch("items", queryset=ItemVenta.objects.select_related("producto")),
+        )
+        return VentaSerializer(venta, context={"request": request}).data
+
     # ======================
     # Queryset / permisos
     # ======================
@@ -164,8 +175,13 @@ class VentaViewSet(viewsets.ModelViewSet):
         with transaction.atomic():
             venta = self._get_or_create_carrito(usuario, cliente)
 
-            item = ItemVenta.objects.filter(venta=venta, producto=producto).first()
+            item = (
+                ItemVenta.objects.select_for_update()
+                .filter(venta=venta, producto=producto)
+                .first()
+            )
             cantidad_actual = item.cantidad if item else 0
+            subtotal_anterior = item.subtotal if item else Decimal("0.00")
             nueva_cantidad = cantidad_actual + cantidad
 
             # validarStock
@@ -179,17 +195,17 @@ class VentaViewSet(viewsets.ModelViewSet):
                 item.precio_unit = precio_unit
                 item.save()
             else:
-                ItemVenta.objects.create(
+                item = ItemVenta.objects.create(
                     venta=venta,
                     producto=producto,
                     cantidad=cantidad,
                     precio_unit=precio_unit,
                 )
 
-            venta.recalc_totales()
+            # Totales incrementales: solo se aplica la diferencia del ítem
+            venta.aplicar_delta(item.subtotal - subtotal_anterior)
 
-        ser = VentaSerializer(venta, context={"request": request})
-        return Response(ser.data, status=status.HTTP_200_OK)
+        return Response(self._serializar_carrito(venta, request), status=status.HTTP_200_OK)
 
     @action(
         detail=False,
@@ -204,39 +220,45 @@ class VentaViewSet(viewsets.ModelViewSet):
         """
         usuario = request.user
 
-        try:
-            item = (
-                ItemVenta.objects.select_related("venta", "producto").get(
-                    pk=item_id,
-                    venta__usuario=usuario,
-                    venta__estado="pendiente",
+        with transaction.atomic():
+            try:
+                item = (
+                    ItemVenta.objects.select_related("venta", "producto")
+                    .select_for_update(of=("self",))
+                    .get(
+                        pk=item_id,
+                        venta__usuario=usuario,
+                        venta__estado="pendiente",
+                    )
+                )
+            except ItemVenta.DoesNotExist:
+                return Response(
+                    {"detail": "Ítem no encontrado."},
+                    status=status.HTTP_404_NOT_FOUND,
                 )
-            )
-        except ItemVenta.DoesNotExist:
-            return Response(
-                {"detail": "Ítem no encontrado."},
-                status=status.HTTP_404_NOT_FOUND,
-            )
 
-        venta = item.venta
+            venta = item.venta
+            subtotal_anterior = item.subtotal
 
-        with transaction.atomic():
             if request.method == "DELETE":
                 item.delete()
+                subtotal_nuevo = Decimal("0.00")
             else:  # PATCH
                 cantidad = int(request.data.get("cantidad") or 0)
                 if cantidad <= 0:
                     item.delete()
+                    subtotal_nuevo = Decimal("0.00")
                 else:
                     if cantidad > item.producto.stock:
                         raise ValidationError({"cantidad": "No hay stock suficiente."})
                     item.cantidad = cantidad
                     item.save()
+                    subtotal_nuevo = item.subtotal
 
-            venta.recalc_totales()
+            # Totales incrementales: solo se aplica la diferencia del ítem
+            venta.aplicar_delta(subtotal_nuevo - subtotal_anterior)
 
-        ser = VentaSerializer(venta, context={"request": request})
-        return Response(ser.data, status=status.HTTP_200_OK)
+        return Response(self._serializar_carrito(venta, request), status=status.HTTP_200_OK)
 
     @action(detail=False, methods=["post"], url_path="carrito/confirmar")
     def confirmar_carrito(self, request):
@@ -324,46 +346,11 @@ class VentaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        with transaction.atomic():
-            # 2) Crear venta en estado 'pendiente'
-            venta = Venta.objects.create(
-                cliente=cliente,
-                usuario=u,
-                estado="pendiente",
-            )
-
-            # 3) Crear items con el precio actual del producto (precio_final si hay oferta)
-            for raw_item in items_data:
-                prod_id = raw_item.get("producto")
-                cantidad = int(raw_item.get("cantidad") or 0)
-
-                if not prod_id or cantidad <= 0:
-                    continue
-
-                # Igual que arriba: ya no filtramos por activo en la consulta,
-                # pero sí lo comprobamos.
-                producto = Producto.objects.filter(pk=prod_id).first()
-                if not producto:
-                    continue
-                if not producto.activo:
-                    continue
-
-                precio_unit = producto.precio_final  # usa descuento si lo hay
-                ItemVenta.objects.create(
-                    venta=venta,
-                    producto=producto,
-                    cantidad=cantidad,
-                    precio_unit=precio_unit,
-                    subtotal=precio_unit * cantidad,
-                )
-
-            # Validar que haya items
-            if not venta.items.exists():
-                raise ValueError("La venta no tiene ítems válidos.")
-
-            # 4) Recalcular totales y marcar pagada (descuento de stock)
-            venta.recalc_totales()
-            marcar_pagada(venta, usuario=u)
+        # 2) Venta + ítems + descuento de stock en un solo paso por lotes
+        try:
+            venta = crear_venta_desde_carrito(cliente, u, items_data)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = VentaSerializer(venta, context={"request": request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
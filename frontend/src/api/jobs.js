@@ -0,0 +1,34 @@
+// api/jobs.js
+import api from './axios'
+
+// Exportaciones en segundo plano (ReportJob): consulta el estado hasta que el
+// job termina, con tope de intentos y cancelable (AbortController al desmontar).
+export const JOB_INTERVALO_MS = 2000
+export const JOB_MAX_INTENTOS = 150 // ~5 minutos
+
+const pausa = (ms, signal) =>
+  new Promise((resolve, reject) => {
+    const t = setTimeout(resolve, ms)
+    signal?.addEventListener('abort', () => {
+      clearTimeout(t)
+      reject(new DOMException('Cancelado', 'AbortError'))
+    }, { once: true })
+  })
+
+export const esCancelacion = (err) =>
+  err?.name === 'AbortError' || err?.name === 'CanceledError'
+
+/**
+ * Espera a que el job de `estadoUrl` quede listo y devuelve su estado final.
+ * Lanza Error si termina con error o se agotan los intentos, y AbortError si
+ * se cancela con `signal`.
+ */
+export async function esperarJob(estadoUrl, { signal, intervaloMs = JOB_INTERVALO_MS, maxIntentos = JOB_MAX_INTENTOS } = {}) {
+  for (let intento = 0; intento < maxIntentos; intento++) {
+    await pausa(intervaloMs, signal)
+    const estado = (await api.get(estadoUrl, { signal })).data
+    if (estado.estado === 'listo') return estado
+    if (estado.estado === 'error') throw new Error(estado.error || 'Exportación fallida')
+  }
+  throw new Error('La exportación está tardando demasiado. Intenta de nuevo más tarde.')
+}
@@ -1,6 +1,7 @@
-import { useEffect, useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import api from '../api/axios'
 import { PATHS } from '../api/paths'
+import { esCancelacion, esperarJob } from '../api/jobs'
 import { saveAs } from 'file-saver'
 
 const toLocalDT = (d) => {
@@ -16,10 +17,16 @@ const toLocalDT = (d) => {
 
 export default function Bitacora() {
   const [items, setItems] = useState([])
+  const [next, setNext] = useState(null)
   const [loading, setLoading] = useState(true)
   const [filters, setFilters] = useState({ desde: '', hasta: '', usuario: '', modulo: '', q: '' })
   const [usuarios, setUsuarios] = useState([])
   const [modulos, setModulos] = useState([])
+  const [exportando, setExportando] = useState(false)
+  const [exportError, setExportError] = useState(null)
+  // Cancela la espera de una exportación en curso si se sale de la página
+  const exportAbort = useRef(null)
+  useEffect(() => () => exportAbort.current?.abort(), [])
 
   // ---------- filtros rápidos de rango ----------
   const quickRange = {
@@ -65,9 +72,11 @@ export default function Bitacora() {
       try {
         const params = new URLSearchParams(filters).toString()
         const r = await api.get(`${PATHS.auditoria}?ordering=-creado_en&${params}`)
-        setItems(r.data || [])
+        setItems(r.data?.results || [])
+        setNext(r.data?.next || null)
       } catch {
         setItems([])
+        setNext(null)
       } finally {
         setLoading(false)
       }
@@ -75,16 +84,45 @@ export default function Bitacora() {
     loadAuditData()
   }, [filters])
 
+  // La bitácora se pagina por cursor: `next` trae la siguiente página
+  const loadMore = async () => {
+    if (!next) return
+    try {
+      const r = await api.get(next)
+      setItems(prev => [...prev, ...(r.data?.results || [])])
+      setNext(r.data?.next || null)
+    } catch (error) {
+      console.error("Error al cargar más registros:", error)
+    }
+  }
+
   const handleExport = async (format) => {
+    exportAbort.current?.abort()
+    const ctrl = new AbortController()
+    exportAbort.current = ctrl
+    setExportError(null)
+    setExportando(true)
     try {
       const params = new URLSearchParams(filters).toString()
       const url = `${PATHS.auditoria}exportar-${format}/?${params}`
-      const response = await api.get(url, { responseType: 'blob' })
+      let response = await api.get(url, { responseType: 'blob', signal: ctrl.signal })
+      if (response.status === 202) {
+        // Exportación grande: se genera en segundo plano; consultamos hasta que esté lista
+        const job = JSON.parse(await response.data.text())
+        const estado = await esperarJob(job.estado_url, { signal: ctrl.signal })
+        response = await api.get(estado.descargar_url, { responseType: 'blob', signal: ctrl.signal })
+      }
       const ext = format === 'excel' ? 'xlsx' : format
       saveAs(response.data, `auditoria.${ext}`)
     } catch (error) {
+      if (esCancelacion(error)) return
       console.error(`Error al exportar a ${format}:`, error)
-      alert(`No se pudo generar el archivo ${format}.`)
+      setExportError(error.message || `No se pudo generar el archivo ${format}.`)
+    } finally {
+      if (exportAbort.current === ctrl) {
+        exportAbort.current = null
+        setExportando(false)
+      }
     }
   }
 
@@ -147,9 +185,14 @@ export default function Bitacora() {
 
         {/* Export */}
         <div className="btn-row" style={{ marginTop: 8 }}>
-          <button onClick={() => handleExport('excel')}>Descargar Excel</button>
-          <button onClick={() => handleExport('pdf')}>Descargar PDF</button>
+          <button onClick={() => handleExport('excel')} disabled={exportando}>Descargar Excel</button>
+          <button onClick={() => handleExport('pdf')} disabled={exportando}>
+            {exportando ? 'Generando…' : 'Descargar PDF'}
+          </button>
         </div>
+        {exportError && (
+          <p style={{ color: '#dc2626', marginTop: 6 }}>{exportError}</p>
+        )}
 
         {/* TABLA */}
         <div className="table-responsive" style={{ marginTop: 12 }}>
@@ -200,6 +243,11 @@ export default function Bitacora() {
             </tbody>
           </table>
         </div>
+        {next && !loading && (
+          <div className="btn-row" style={{ marginTop: 8 }}>
+            <button onClick={loadMore}>Cargar más</button>
+          </div>
+        )}
       </div>
     </div>
   )
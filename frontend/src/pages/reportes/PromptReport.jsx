@@ -4,19 +4,27 @@
 import { useRef, useState, useMemo, useEffect } from "react";
 import api from "../../api/axios";
 import { PATHS } from "../../api/paths";
+import { esCancelacion, esperarJob } from "../../api/jobs";
 import { Mic, StopCircle, Eye, Download, Loader2, Sparkles } from "lucide-react";
 
 const includesPdf = (s) => /\bpdf\b/i.test(s || "");
 const includesExcel = (s) => /\bexcel\b|\bxlsx\b/i.test(s || "");
+// Cualquier formato de descarga (PDF, Excel, CSV, Parquet, Arrow)
+const FORMATOS_RE = /\b(pdf|excel|xlsx|csv|parquet|arrow)\b/gi;
+const includesFormato = (s) => new RegExp(FORMATOS_RE.source, "i").test(s || "");
 
 export default function PromptReport(){
   const [text, setText] = useState("");
   const [data, setData] = useState(null);
   const [loading, setLoading] = useState(false);
   const [listening, setListening] = useState(false);
-  const [format, setFormat] = useState("auto");     // auto | pantalla | pdf | excel
+  const [format, setFormat] = useState("auto");     // auto | pantalla | pdf | excel | csv | parquet | arrow
   const [forcePreview, setForcePreview] = useState(false);
+  const [error, setError] = useState(null);
   const recRef = useRef(null);
+  const previewPromptRef = useRef(""); // prompt de la previsualización (páginas siguientes)
+  const downloadAbort = useRef(null); // cancela la descarga / espera del job al desmontar
+  useEffect(() => () => downloadAbort.current?.abort(), []);
 
   // --- Auto: si termina la voz, previsualiza ---
   useEffect(()=>{
@@ -31,11 +39,12 @@ export default function PromptReport(){
       if(t){
         setText(t);
         // previsualización automática
-        const p = t.replace(/\b(pdf|excel|xlsx)\b/gi, "").trim();
+        const p = t.replace(FORMATOS_RE, "").trim();
         if(p){
           setLoading(true);
           try{
             const res = await api.post(PATHS.reportes, { prompt: p });
+            previewPromptRef.current = p;
             setData(res.data);
           }catch(err){
             console.error(err);
@@ -62,12 +71,11 @@ export default function PromptReport(){
     const raw = (text || "").trim();
     if (!raw) return "";
 
-    if (forcePreview) return raw.replace(/\b(pdf|excel|xlsx)\b/gi, "").trim();
+    if (forcePreview) return raw.replace(FORMATOS_RE, "").trim();
 
-    if (includesPdf(raw) || includesExcel(raw)) return raw; // ya lo dijo
+    if (includesFormato(raw)) return raw; // ya lo dijo
 
-    if (format === "pdf")   return raw + " en pdf";
-    if (format === "excel") return raw + " en excel";
+    if (format !== "auto" && format !== "pantalla") return raw + " en " + format;
     return raw; // auto
   }, [text, format, forcePreview]);
 
@@ -75,34 +83,65 @@ export default function PromptReport(){
     const base = (text || "").trim();
     if(!base) return;
     const p = (forcePreview || format === "pantalla")
-      ? base.replace(/\b(pdf|excel|xlsx)\b/gi, "")
-      : base.replace(/\b(pdf|excel|xlsx)\b/gi, ""); // siempre limpio para preview
+      ? base.replace(FORMATOS_RE, "")
+      : base.replace(FORMATOS_RE, ""); // siempre limpio para preview
     setLoading(true);
     try{
       const res = await api.post(PATHS.reportes, { prompt: p.trim() });
+      previewPromptRef.current = p.trim();
       setData(res.data);
     }finally{ setLoading(false); }
   };
 
+  // La previsualización llega paginada: las páginas siguientes se agregan a la tabla
+  const loadMore = async () => {
+    if (data?.next_offset == null) return;
+    setLoading(true);
+    try{
+      const res = await api.post(PATHS.reportes, { prompt: previewPromptRef.current, offset: data.next_offset });
+      setData(prev => ({ ...res.data, rows: [...(prev?.rows || []), ...(res.data.rows || [])] }));
+    }finally{ setLoading(false); }
+  };
+
   const download = async () => {
     if (forcePreview) return; // bloqueado con toggle
     const p = downloadPrompt;
     if(!p) return;
-    if (format === "auto" && !includesPdf(p) && !includesExcel(p)){
-      alert("Indica el formato (PDF o Excel) en el selector o en el prompt.");
+    if (format === "auto" && !includesFormato(p)){
+      alert("Indica el formato (PDF, Excel, CSV, Parquet o Arrow) en el selector o en el prompt.");
       return;
     }
+    downloadAbort.current?.abort();
+    const ctrl = new AbortController();
+    downloadAbort.current = ctrl;
+    setError(null);
     setLoading(true);
     try{
-      const res = await api.post(PATHS.reportes, { prompt: p }, { responseType: "blob" });
+      let res = await api.post(PATHS.reportes, { prompt: p }, { responseType: "blob", signal: ctrl.signal });
+      if (res.status === 202) {
+        // Reporte grande: lo genera el worker; consultamos hasta que esté listo
+        const job = JSON.parse(await res.data.text());
+        const estado = await esperarJob(job.estado_url, { signal: ctrl.signal });
+        res = await api.get(estado.descargar_url, { responseType: "blob", signal: ctrl.signal });
+      }
       const cd = res.headers["content-disposition"] || "";
       const match = cd.match(/filename="(.+?)"/i);
-      const filename = match ? match[1] : (includesPdf(p) ? "reporte.pdf" : includesExcel(p) ? "reporte.xlsx" : "reporte.bin");
+      const otro = (p.match(/\b(csv|parquet|arrow)\b/i) || [])[1];
+      const filename = match ? match[1] : (includesPdf(p) ? "reporte.pdf" : includesExcel(p) ? "reporte.xlsx" : otro ? `reporte.${otro.toLowerCase()}` : "reporte.bin");
       const url = URL.createObjectURL(res.data);
       const a = document.createElement("a");
       a.href = url; a.download = filename; a.click();
       URL.revokeObjectURL(url);
-    }finally{ setLoading(false); }
+    }catch(err){
+      if (esCancelacion(err)) return;
+      console.error(err);
+      setError(err.message || "No se pudo descargar el reporte.");
+    }finally{
+      if (downloadAbort.current === ctrl) {
+        downloadAbort.current = null;
+        setLoading(false);
+      }
+    }
   };
 
   const cols = data?.headers || [];
@@ -146,6 +185,9 @@ export default function PromptReport(){
               <option value="pantalla">Pantalla</option>
               <option value="pdf">PDF</option>
               <option value="excel">Excel</option>
+              <option value="csv">CSV</option>
+              <option value="parquet">Parquet</option>
+              <option value="arrow">Arrow</option>
             </select>
 
             <label className="inline-flex items-center gap-2 px-3 py-2 rounded-xl border border-neutral-800 bg-neutral-950 text-neutral-200">
@@ -163,6 +205,8 @@ export default function PromptReport(){
             </button>
           </div>
         </div>
+
+        {error && <p className="mt-3 text-sm text-red-400">{error}</p>}
       </div>
 
       {/* Tabla */}
@@ -191,6 +235,16 @@ export default function PromptReport(){
               </tbody>
             </table>
           </div>
+          {data.total_count > 0 && (
+            <div className="mt-3 flex items-center justify-between text-sm text-neutral-400">
+              <span>Mostrando {rows.length} de {data.total_count} filas</span>
+              {data.next_offset != null && (
+                <button onClick={loadMore} disabled={loading} className="px-3 py-1.5 rounded-xl border border-neutral-800 bg-neutral-950 hover:bg-neutral-900 text-neutral-200">
+                  Cargar más
+                </button>
+              )}
+            </div>
+          )}
         </div>
       )}
     </div>
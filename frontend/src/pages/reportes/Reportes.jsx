@@ -1,6 +1,7 @@
 // src/pages/reportes/Reportes.jsx
 import { useState, useEffect, useRef } from 'react';
 import api from '../../api/axios.js';
+import { esCancelacion, esperarJob } from '../../api/jobs.js';
 import { Mic, StopCircle, Download, Eye, Loader2, Info } from 'lucide-react';
 
 const EXAMPLES = [
@@ -43,6 +44,9 @@ export default function Reportes() {
   const [previewData, setPreviewData] = useState(null);
 
   const recRef = useRef(null);
+  const previewPromptRef = useRef(''); // prompt de la previsualización (para pedir más páginas)
+  const downloadAbort = useRef(null); // cancela la descarga / espera del job al desmontar
+  useEffect(() => () => downloadAbort.current?.abort(), []);
 
   // -----------------------------
   // Configuración de voz
@@ -63,7 +67,7 @@ export default function Reportes() {
       const t = evt.results?.[0]?.[0]?.transcript || '';
       setPrompt(t);
 
-      // Auto-previsualizar en pantalla (quitamos "en pdf/excel")
+      // Auto-previsualizar en pantalla (quitamos "en pdf/excel/csv/...")
       try {
         setIsLoading(true);
         setLoadingAction('preview');
@@ -71,9 +75,10 @@ export default function Reportes() {
         setPreviewData(null);
         setSuccessMessage(null);
 
-        const clean = t.replace(/\b(en\s+)?(pdf|excel|xlsx)\b/gi, '').trim();
+        const clean = t.replace(/\b(en\s+)?(pdf|excel|xlsx|csv|parquet|arrow)\b/gi, '').trim();
         if (clean) {
           const r = await api.post('reportes/prompt/', { prompt: clean });
+          previewPromptRef.current = clean;
           setPreviewData(r.data);
         }
       } catch (err) {
@@ -141,11 +146,12 @@ export default function Reportes() {
     try {
       // Para previsualizar siempre forzamos "en pantalla"
       const previewPrompt = prompt
-        .replace(/\b(en\s+)?(pdf|excel|xlsx)\b/gi, '')
+        .replace(/\b(en\s+)?(pdf|excel|xlsx|csv|parquet|arrow)\b/gi, '')
         .trim();
       const response = await api.post('reportes/prompt/', {
         prompt: previewPrompt,
       });
+      previewPromptRef.current = previewPrompt;
       setPreviewData(response.data);
     } catch (err) {
       setError(
@@ -159,12 +165,41 @@ export default function Reportes() {
     }
   };
 
+  // La previsualización llega paginada: las páginas siguientes se agregan a la tabla
+  const handleLoadMore = async () => {
+    if (previewData?.next_offset == null) return;
+
+    setIsLoading(true);
+    setLoadingAction('preview');
+    setError(null);
+
+    try {
+      const response = await api.post('reportes/prompt/', {
+        prompt: previewPromptRef.current,
+        offset: previewData.next_offset,
+      });
+      setPreviewData((prev) => ({
+        ...response.data,
+        rows: [...(prev?.rows || []), ...(response.data.rows || [])],
+      }));
+    } catch (err) {
+      setError(
+        err.response?.data?.error ||
+          err.response?.data?.detail ||
+          'Ocurrió un error al cargar más filas.'
+      );
+    } finally {
+      setIsLoading(false);
+      setLoadingAction(null);
+    }
+  };
+
   const handleDownload = async (e) => {
     e?.preventDefault?.();
     if (!prompt.trim()) return;
 
-    if (!/pdf|excel|xlsx/i.test(prompt)) {
-      setError("Para descargar, especifica 'en PDF' o 'en Excel' en el prompt.");
+    if (!/pdf|excel|xlsx|csv|parquet|arrow/i.test(prompt)) {
+      setError("Para descargar, especifica 'en PDF', 'en Excel', 'en CSV' o 'en Parquet' en el prompt.");
       return;
     }
 
@@ -174,14 +209,27 @@ export default function Reportes() {
     setPreviewData(null);
     setSuccessMessage(null);
 
+    downloadAbort.current?.abort();
+    const ctrl = new AbortController();
+    downloadAbort.current = ctrl;
+
     try {
-      const response = await api.post(
+      let response = await api.post(
         'reportes/prompt/',
         { prompt },
-        { responseType: 'blob' }
+        { responseType: 'blob', signal: ctrl.signal }
       );
+      if (response.status === 202) {
+        // Reporte grande: lo genera el worker; consultamos hasta que esté listo
+        const job = JSON.parse(await response.data.text());
+        const estado = await esperarJob(job.estado_url, { signal: ctrl.signal });
+        response = await api.get(estado.descargar_url, { responseType: 'blob', signal: ctrl.signal });
+      }
 
-      const ext = /pdf/i.test(prompt) ? 'pdf' : 'xlsx';
+      // La extensión sale del nombre que manda el servidor (ej. reporte.csv.gz)
+      const cd = response.headers['content-disposition'] || '';
+      const ext = (cd.match(/filename="reporte\.(.+?)"/i) || [])[1]
+        || (/pdf/i.test(prompt) ? 'pdf' : 'xlsx');
       const filename = `reporte-${new Date().toISOString().slice(0, 10)}.${ext}`;
 
       const url = window.URL.createObjectURL(new Blob([response.data]));
@@ -195,14 +243,19 @@ export default function Reportes() {
 
       setSuccessMessage(`¡Reporte "${filename}" descargado con éxito!`);
     } catch (err) {
+      if (esCancelacion(err)) return;
       setError(
         err.response?.data?.detail ||
           err.response?.data?.error ||
+          err.message ||
           'Ocurrió un error al descargar el archivo.'
       );
     } finally {
-      setIsLoading(false);
-      setLoadingAction(null);
+      if (downloadAbort.current === ctrl) {
+        downloadAbort.current = null;
+        setIsLoading(false);
+        setLoadingAction(null);
+      }
     }
   };
 
@@ -459,6 +512,24 @@ export default function Reportes() {
                   </table>
                 </div>
               </div>
+
+              {previewData?.total_count > 0 && (
+                <div className="mt-2 flex items-center justify-between text-[11px] text-neutral-400">
+                  <span>
+                    Mostrando {rows.length} de {previewData.total_count} filas
+                  </span>
+                  {previewData.next_offset != null && (
+                    <button
+                      type="button"
+                      onClick={handleLoadMore}
+                      disabled={isLoading}
+                      className="px-3 py-1 rounded-lg border border-neutral-800 bg-neutral-950 hover:bg-neutral-900 text-neutral-200 disabled:opacity-60"
+                    >
+                      Cargar más
+                    </button>
+                  )}
+                </div>
+              )}
             </>
           ) : (
             <div className="flex-1 flex items-center justify-center text-center text-neutral-500 text-xs sm:text-sm border border-dashed border-neutral-800 rounded-xl bg-neutral-950/40 px-4 py-8">